@@ -0,0 +1,155 @@
+"""
+Alert State Machine
+Decides when a listing's availability is worth a notification
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from src.rollups import is_available
+
+logger = logging.getLogger(__name__)
+
+SOLD_OUT = 'sold_out'
+AVAILABLE = 'available'
+LEAVING = 'leaving'
+
+class AlertStateMachine:
+    """
+    Per-listing alert states with hysteresis
+    
+    sold_out  --available-->  available   alert (first alert, no delay)
+    available --available-->  available   re-alert every realert_interval
+    available --sold_out--->  leaving     no alert yet
+    leaving   --available-->  available   flap suppressed, no alert
+    leaving   --sold_out--->  sold_out    after sold_out_confirmations checks
+    
+    'unknown' results never move a listing between states. The state is a
+    plain dict keyed by listing id so it can be persisted between runs.
+    
+    A decision whose alert couldn't be delivered is handed back with
+    undelivered(): the listing returns to its state before the decision,
+    so the next check makes it (and alerts) again.
+    """
+    
+    def __init__(
+        self,
+        state: Optional[Dict] = None,
+        sold_out_confirmations: int = 2,
+        realert_interval: float = 1800
+    ):
+        self.sold_out_confirmations = max(sold_out_confirmations, 1)
+        self.realert_interval = realert_interval
+        self.state: Dict[str, Dict] = dict(state or {})
+        # Each listing's entry as it was before its last decision
+        self._before: Dict[str, Dict] = {}
+    
+    def to_dict(self) -> Dict:
+        return {listing_id: dict(entry) for listing_id, entry in self.state.items()}
+    
+    def forget(self, listing_id: str):
+        """Drop a listing that is no longer on the page"""
+        self.state.pop(listing_id, None)
+    
+    def undelivered(self, listing_id: str, kind: str):
+        """
+        The alert for this check's decision (or new listing) wasn't delivered
+        
+        The decision is undone, or for a new listing a 'new_listing'
+        decision is kept for the next check, so the alert is retried.
+        """
+        entry = self.state.get(listing_id)
+        if entry is None:
+            return
+        if kind == 'new_listing':
+            entry['undelivered'] = kind
+        elif listing_id in self._before:
+            self.state[listing_id] = self._before.pop(listing_id)
+    
+    def _new_entry(self, previous_status: Optional[str], now: datetime) -> Dict:
+        available = previous_status is not None and is_available(previous_status)
+        return {
+            'state': AVAILABLE if available else SOLD_OUT,
+            'since': now.isoformat(),
+            # Don't re-alert straight away for a listing already known to be available
+            'last_alert': now.isoformat() if available else None,
+            'sold_out_streak': 0,
+            'reported_status': previous_status
+        }
+    
+    def observe(
+        self,
+        listing_id: str,
+        status: str,
+        now: Optional[datetime] = None,
+        previous_status: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Feed one check result for a listing into the state machine
+        
+        Args:
+            listing_id: Normalized listing id
+            status: Status seen by this check
+            now: Time of the check (defaults to now)
+            previous_status: Last known status, used only for listings the
+                machine hasn't seen yet (None for a brand new listing)
+        
+        Returns:
+            None, or a decision dict with 'kind' ('available', 'still_available',
+            'sold_out', or 'new_listing' for an undelivered new listing alert)
+            and the correct 'previous_status'
+        """
+        now = now or datetime.now()
+        entry = self.state.get(listing_id)
+        if entry is None:
+            entry = self.state[listing_id] = self._new_entry(previous_status, now)
+        self._before[listing_id] = dict(entry)
+        
+        if status == 'unknown':
+            return None
+        
+        decision = None
+        reported_status = entry['reported_status']
+        
+        if is_available(status):
+            entry['sold_out_streak'] = 0
+            if entry['state'] == SOLD_OUT:
+                decision = self._transition(entry, AVAILABLE, 'available', now)
+            elif entry['state'] == LEAVING:
+                logger.info(f"{listing_id} is available again before being confirmed sold out")
+                entry['state'] = AVAILABLE
+            elif self._realert_due(entry, now):
+                decision = {'kind': 'still_available'}
+        else:
+            if entry['state'] != SOLD_OUT:
+                entry['sold_out_streak'] += 1
+                if entry['sold_out_streak'] >= self.sold_out_confirmations:
+                    decision = self._transition(entry, SOLD_OUT, 'sold_out', now)
+                else:
+                    entry['state'] = LEAVING
+        
+        if decision:
+            decision.update({'listing_id': listing_id, 'status': status, 'previous_status': reported_status})
+            if decision['kind'] != 'sold_out':
+                entry['last_alert'] = now.isoformat()
+            entry['reported_status'] = status
+        elif entry['state'] == SOLD_OUT:
+            entry['reported_status'] = status
+        
+        # A new listing alert that wasn't delivered is retried, unless a real decision supersedes it
+        if entry.pop('undelivered', None) and decision is None:
+            decision = {'kind': 'new_listing', 'listing_id': listing_id, 'status': status, 'previous_status': None}
+        return decision
+    
+    def _transition(self, entry: Dict, new_state: str, kind: str, now: datetime) -> Dict:
+        entry['state'] = new_state
+        entry['since'] = now.isoformat()
+        entry['sold_out_streak'] = 0
+        return {'kind': kind}
+    
+    def _realert_due(self, entry: Dict, now: datetime) -> bool:
+        if not self.realert_interval or not entry['last_alert']:
+            return False
+        elapsed = (now - datetime.fromisoformat(entry['last_alert'])).total_seconds()
+        return elapsed >= self.realert_interval
@@ -0,0 +1,234 @@
+"""
+Browser Launch Profiles
+Browser engine, viewport and launch flags, with a calibration run to pick the fastest
+"""
+
+import json
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_FILE = "data/browser_profile.json"
+DEFAULT_PROFILE = 'chromium'
+
+ENGINES = ('chromium', 'firefox', 'webkit')
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+# Chromium flags that trade speed for a smaller footprint on small runners
+LOW_MEMORY_ARGS = [
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--renderer-process-limit=1',
+    '--js-flags=--max-old-space-size=128'
+]
+
+class LaunchProfile:
+    """
+    How to launch the browser and set up its contexts
+    
+    For Chromium, headless_shell picks the old headless mode (the
+    lightweight headless shell); otherwise the full browser runs in the
+    new headless mode.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        engine: str = 'chromium',
+        headless_shell: bool = True,
+        viewport: Optional[Dict] = None,
+        javascript: bool = True,
+        low_memory: bool = False
+    ):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown browser engine: {engine}")
+        self.name = name
+        self.engine = engine
+        self.headless_shell = headless_shell
+        self.viewport = viewport or {'width': 1920, 'height': 1080}
+        self.javascript = javascript
+        self.low_memory = low_memory
+    
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'engine': self.engine,
+            'headless_shell': self.headless_shell,
+            'viewport': self.viewport,
+            'javascript': self.javascript,
+            'low_memory': self.low_memory
+        }
+    
+    def launch_options(self, per_context_proxy: bool = False) -> Dict:
+        """Options for playwright.<engine>.launch()"""
+        options = {'headless': True}
+        if self.engine != 'chromium':
+            return options
+        
+        args = ['--disable-blink-features=AutomationControlled']
+        if not self.headless_shell:
+            args.append('--headless=new')
+        if self.low_memory:
+            args.extend(LOW_MEMORY_ARGS)
+        options['args'] = args
+        if per_context_proxy:
+            # Chromium needs a placeholder browser-wide proxy for per-context proxies on some platforms
+            options['proxy'] = {'server': 'http://per-context'}
+        return options
+    
+    def context_options(self) -> Dict:
+        """Options for browser.new_context()"""
+        options = {'viewport': self.viewport, 'java_script_enabled': self.javascript}
+        # Firefox and WebKit would give themselves away with a Chrome user agent
+        if self.engine == 'chromium':
+            options['user_agent'] = USER_AGENT
+        return options
+    
+    async def launch(self, playwright, per_context_proxy: bool = False):
+        return await getattr(playwright, self.engine).launch(**self.launch_options(per_context_proxy))
+
+PROFILES = {
+    profile.name: profile for profile in (
+        LaunchProfile('chromium'),
+        LaunchProfile('chromium-full', headless_shell=False),
+        LaunchProfile('chromium-small', viewport={'width': 1280, 'height': 720}),
+        LaunchProfile('chromium-low-memory', viewport={'width': 1280, 'height': 720}, low_memory=True),
+        LaunchProfile('chromium-no-js', javascript=False),
+        LaunchProfile('firefox', engine='firefox'),
+        LaunchProfile('webkit', engine='webkit')
+    )
+}
+
+def get_profile(name: str) -> LaunchProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown browser profile '{name}' (choose from {', '.join(PROFILES)})")
+
+def load_profile(name: Optional[str] = None, path: str = DEFAULT_PROFILE_FILE) -> LaunchProfile:
+    """
+    Profile to launch with: `name` (or BROWSER_PROFILE) if given, otherwise
+    the one saved by the last calibration, otherwise the default
+    """
+    name = name or os.environ.get('BROWSER_PROFILE')
+    if name:
+        return get_profile(name)
+    
+    try:
+        with open(path, 'r') as f:
+            saved = json.load(f)
+        profile = get_profile(saved['profile'])
+        logger.info(f"Using calibrated browser profile {profile.name} (from {saved.get('calibrated_at', '?')[:19]})")
+        return profile
+    except FileNotFoundError:
+        pass
+    except (ValueError, KeyError) as e:
+        logger.warning(f"Ignoring saved browser profile in {path}: {e}")
+    return PROFILES[DEFAULT_PROFILE]
+
+def save_profile(profile: LaunchProfile, results: List[Dict], url: str, path: str = DEFAULT_PROFILE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'profile': profile.name,
+            'settings': profile.to_dict(),
+            'calibrated_at': datetime.now().isoformat(),
+            'url': url,
+            'results': results
+        }, f, indent=2)
+    logger.info(f"Saved browser profile {profile.name} to {path}")
+
+async def _time_profile(monitor, playwright, profile: LaunchProfile) -> Dict:
+    """One cold run: launch, load the page and extract the target"""
+    started = time.perf_counter()
+    browser = None
+    context = None
+    monitor.check_diagnostics = monitor.diagnostics.begin(monitor.target_name, monitor.url)
+    try:
+        browser = await profile.launch(playwright)
+        launched = time.perf_counter()
+        context = await monitor._new_context(browser, profile=profile)
+        result = await monitor._fetch_page(context)
+        listing = result[0].get(monitor.target_id) if result else None
+        return {
+            'ok': listing is not None and listing['status'] != 'unknown',
+            'status': listing['status'] if listing else None,
+            'launch_seconds': round(launched - started, 3),
+            'total_seconds': round(time.perf_counter() - started, 3)
+        }
+    except Exception as e:
+        return {'ok': False, 'error': str(e)[:200], 'total_seconds': round(time.perf_counter() - started, 3)}
+    finally:
+        if context:
+            await context.close()
+        if browser:
+            await browser.close()
+
+async def calibrate(
+    monitor,
+    profiles: Optional[List[LaunchProfile]] = None,
+    runs: int = 3,
+    path: str = DEFAULT_PROFILE_FILE
+) -> Optional[LaunchProfile]:
+    """
+    Run each profile against the monitor's page and save the fastest one
+    that extracted the target on every run
+    
+    Use a monitor replaying a HAR recording to calibrate against a fixture
+    instead of the live site. Nothing is written to the monitor's state.
+    
+    Returns: the chosen profile, or None if no profile worked
+    """
+    from playwright.async_api import async_playwright
+    
+    results = []
+    async with async_playwright() as p:
+        for profile in profiles or list(PROFILES.values()):
+            logger.info(f"Calibrating browser profile {profile.name}")
+            attempts = []
+            for _ in range(runs):
+                attempts.append(await _time_profile(monitor, p, profile))
+                if not attempts[-1]['ok']:
+                    # A profile that fails once is out, don't spend more runs on it
+                    break
+            ok = len(attempts) == runs and all(attempt['ok'] for attempt in attempts)
+            results.append({
+                'profile': profile.name,
+                'ok': ok,
+                'median_seconds': statistics.median(attempt['total_seconds'] for attempt in attempts) if ok else None,
+                'runs': attempts
+            })
+    
+    working = [result for result in results if result['ok']]
+    chosen = min(working, key=lambda result: result['median_seconds']) if working else None
+    
+    print("\n" + "="*50)
+    print("BROWSER PROFILE CALIBRATION")
+    print("="*50)
+    print(f"Target: {monitor.target_name}")
+    for result in results:
+        if result['ok']:
+            print(f"  {result['profile']:<22} {result['median_seconds']:.2f}s median over {runs} runs")
+        else:
+            last = result['runs'][-1]
+            reason = last.get('error') or (f"status {last['status']}" if last.get('status') else "target not found")
+            print(f"  {result['profile']:<22} ❌ {reason}")
+    print(f"Fastest working profile: {chosen['profile'] if chosen else 'none'}")
+    print("="*50 + "\n")
+    
+    if not chosen:
+        logger.error("No browser profile extracted the target, keeping the current one")
+        return None
+    profile = get_profile(chosen['profile'])
+    save_profile(profile, results, monitor.url, path)
+    return profile
@@ -7,25 +7,120 @@ import json
 import os
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional
 import logging
 
+from src.rollups import AvailabilityRollups, is_available
+
 logger = logging.getLogger(__name__)
 
 class CheckLogger:
-    """Log all parking checks to a CSV/JSON file for history"""
+    """
+    Log all parking checks as run-length encoded status intervals
+    
+    Consecutive checks with the same status and price for a target collapse
+    into one interval (target, status, price, first_seen, last_seen,
+    check_count). Full per-check detail is only kept around transitions and
+    for every Nth check.
+    """
     
-    def __init__(self, log_file: str = "data/check_history.json"):
+    HISTORY_VERSION = 2
+    
+    def __init__(
+        self,
+        log_file: str = "data/check_history.json",
+        rollup_file: str = "data/rollups.json",
+        sample_every: int = 12,
+        max_samples: int = 500,
+        history: Optional[Dict] = None,
+        rollups: Optional[Dict] = None
+    ):
+        """
+        Args:
+            history, rollups: Restored history and rollups (e.g. from a state
+                snapshot). The history is then kept in memory and the JSON
+                files are not read or written; the text log is still appended.
+        """
         self.log_file = Path(log_file)
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
-        self._ensure_log_file()
+        self.sample_every = sample_every
+        self.max_samples = max_samples
+        self.in_memory = history is not None
+        self.history = history if self.in_memory else self._load_history()
+        self.rollups = AvailabilityRollups(rollup_file, data=rollups)
+        self._index_intervals()
+    
+    def _index_intervals(self):
+        # Index of the open (most recent) interval for each target
+        self._open_intervals: Dict[str, int] = {}
+        for index, interval in enumerate(self.history["intervals"]):
+            self._open_intervals[interval["target"]] = index
     
-    def _ensure_log_file(self):
-        """Create log file if it doesn't exist"""
-        if not self.log_file.exists():
-            with open(self.log_file, 'w') as f:
-                json.dump([], f)
+    def reload(self):
+        """Re-read the history and rollup files (another run may have written them)"""
+        if self.in_memory:
+            return
+        self.history = self._load_history()
+        self.rollups = AvailabilityRollups(self.rollups.rollup_file)
+        self._index_intervals()
+    
+    def _load_history(self) -> Dict:
+        """Load the history file, migrating the old one-record-per-check list"""
+        try:
+            if self.log_file.exists():
+                with open(self.log_file, 'r') as f:
+                    data = json.load(f)
+                if isinstance(data, dict) and data.get("version") == self.HISTORY_VERSION:
+                    return data
+                if isinstance(data, list):
+                    return self._migrate_check_list(data)
+        except Exception as e:
+            logger.error(f"Error reading check history: {e}")
+        return {"version": self.HISTORY_VERSION, "intervals": [], "samples": []}
+    
+    def _migrate_check_list(self, checks: List[Dict]) -> Dict:
+        """Fold the old list of check records into intervals"""
+        history = {"version": self.HISTORY_VERSION, "intervals": [], "samples": checks[-self.max_samples:]}
+        open_intervals = {}
+        
+        for check in checks:
+            target = check.get("target") or "default"
+            index = open_intervals.get(target)
+            interval = history["intervals"][index] if index is not None else None
+            
+            if interval and interval["status"] == check["status"] and interval["price"] == check["price"]:
+                interval["last_seen"] = check["timestamp"]
+                interval["check_count"] += 1
+                interval["notified"] = interval["notified"] or check.get("notification_sent", False)
+            else:
+                open_intervals[target] = len(history["intervals"])
+                history["intervals"].append(self._new_interval(
+                    target, check["status"], check["price"], check["timestamp"], check.get("notification_sent", False)
+                ))
+        
+        logger.info(f"Migrated {len(checks)} checks into {len(history['intervals'])} intervals")
+        return history
     
-    def log_check(self, status: str, price: str, notification_sent: bool = False):
+    @staticmethod
+    def _new_interval(target: str, status: str, price: str, timestamp: str, notified: bool) -> Dict:
+        return {
+            "target": target,
+            "status": status,
+            "price": price,
+            "first_seen": timestamp,
+            "last_seen": timestamp,
+            "check_count": 1,
+            "notified": notified
+        }
+    
+    def log_check(
+        self,
+        status: str,
+        price: str,
+        notification_sent: bool = False,
+        target: Optional[str] = None,
+        deliveries: Optional[List[Dict]] = None
+    ):
         """
         Log a parking check
         
@@ -33,73 +128,112 @@ class CheckLogger:
             status: Current parking status
             price: Current price
             notification_sent: Whether a notification was sent
+            target: Name of the checked listing
+            deliveries: Per-channel delivery records of the notification
         """
+        now = datetime.now()
+        target = target or "default"
+        
+        # Rollups are updated incrementally so reports never rescan the history
+        self.rollups.record_check(target, status, now)
+        
         try:
-            # Read existing logs
-            with open(self.log_file, 'r') as f:
-                logs = json.load(f)
-            
-            # Add new entry
             entry = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now.isoformat(),
+                "target": target,
                 "status": status,
                 "price": price,
                 "notification_sent": notification_sent,
-                "human_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                "human_time": now.strftime("%Y-%m-%d %H:%M:%S")
             }
+            if deliveries:
+                entry["deliveries"] = [
+                    {key: delivery[key] for key in ('channel', 'ok', 'attempts', 'latency_ms')}
+                    for delivery in deliveries
+                ]
             
-            logs.append(entry)
+            index = self._open_intervals.get(target)
+            interval = self.history["intervals"][index] if index is not None else None
             
-            # Keep only last 1000 entries to prevent file from growing too large
-            if len(logs) > 1000:
-                logs = logs[-1000:]
+            if interval and interval["status"] == status and interval["price"] == price:
+                # Same as the open interval: just bump it in place
+                interval["last_seen"] = entry["timestamp"]
+                interval["check_count"] += 1
+                interval["notified"] = interval["notified"] or notification_sent
+                transition = False
+            else:
+                self._open_intervals[target] = len(self.history["intervals"])
+                self.history["intervals"].append(self._new_interval(
+                    target, status, price, entry["timestamp"], notification_sent
+                ))
+                transition = True
+            
+            # Keep per-check detail only around transitions, notifications
+            # and every Nth check of a long interval
+            current = self.history["intervals"][self._open_intervals[target]]
+            if transition or notification_sent or current["check_count"] % self.sample_every == 0:
+                self.history["samples"].append(entry)
+                self.history["samples"] = self.history["samples"][-self.max_samples:]
             
             # Write back
-            with open(self.log_file, 'w') as f:
-                json.dump(logs, f, indent=2)
+            if not self.in_memory:
+                with open(self.log_file, 'w') as f:
+                    json.dump(self.history, f, indent=2)
             
             logger.info(f"Check logged: {entry}")
             
-            # Also create a simple text log for easy reading
-            self._write_simple_log(entry)
-            
+            # The text log only gets a line when the status or price changes
+            if transition:
+                self._write_simple_log(entry, previous=interval)
+        
         except Exception as e:
             logger.error(f"Error logging check: {e}")
     
-    def _write_simple_log(self, entry):
+    def _write_simple_log(self, entry, previous: Optional[Dict] = None):
         """Write a simple text log that's easy to read"""
-        simple_log = Path("data/check_history.txt")
+        simple_log = self.log_file.with_suffix(".txt")
         
         with open(simple_log, 'a') as f:
             status_emoji = "✅" if entry['status'] != 'sold_out' else "❌"
             notif_text = "📨 NOTIFIED" if entry['notification_sent'] else ""
+            previous_text = ""
+            if previous:
+                previous_text = f"(was {previous['status']} x{previous['check_count']} since {previous['first_seen'][:16]}) "
             
-            f.write(f"{entry['human_time']} | {status_emoji} {entry['status']} | {entry['price']} {notif_text}\n")
+            f.write(f"{entry['human_time']} | {entry['target']} | {status_emoji} {entry['status']} | {entry['price']} {previous_text}{notif_text}\n")
             
             # If status changed to available, add a highlight
-            if entry['status'] != 'sold_out':
+            if is_available(entry['status']) and not (previous and is_available(previous['status'])):
                 f.write(f"{'='*50}\n")
                 f.write(f"🎉 PARKING AVAILABLE at {entry['human_time']}!\n")
                 f.write(f"{'='*50}\n")
     
     def get_recent_checks(self, limit: int = 10):
-        """Get the most recent checks"""
-        try:
-            with open(self.log_file, 'r') as f:
-                logs = json.load(f)
-            return logs[-limit:] if logs else []
-        except:
-            return []
+        """Get the most recent sampled checks"""
+        samples = self.history["samples"]
+        return samples[-limit:] if samples else []
     
-    def get_last_available_time(self):
-        """Find when parking was last available"""
-        try:
-            with open(self.log_file, 'r') as f:
-                logs = json.load(f)
-            
-            for log in reversed(logs):
-                if log['status'] != 'sold_out' and log['status'] != 'unknown':
-                    return log['timestamp']
-            return None
-        except:
-            return None
\ No newline at end of file
+    def get_recent_intervals(self, limit: int = 10, target: Optional[str] = None) -> List[Dict]:
+        """Get the most recent status intervals, optionally for one target"""
+        intervals = self.history["intervals"]
+        if target:
+            intervals = [interval for interval in intervals if interval["target"] == target]
+        return intervals[-limit:]
+    
+    def _last_available_interval(self, target: Optional[str] = None) -> Optional[Dict]:
+        for interval in reversed(self.history["intervals"]):
+            if target and interval["target"] != target:
+                continue
+            if is_available(interval["status"]):
+                return interval
+        return None
+    
+    def get_last_available_time(self, target: Optional[str] = None):
+        """Find when parking was last seen available"""
+        interval = self._last_available_interval(target)
+        return interval["last_seen"] if interval else None
+    
+    def get_last_became_available_time(self, target: Optional[str] = None):
+        """Find when parking most recently became available"""
+        interval = self._last_available_interval(target)
+        return interval["first_seen"] if interval else None
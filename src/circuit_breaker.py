@@ -0,0 +1,139 @@
+"""
+Circuit Breaker
+Stops launching the browser for a target while its page keeps failing
+"""
+
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """
+    Per-target circuit breaker with exponential backoff and jitter
+    
+    closed    -> checks run normally; consecutive failures are counted
+    open      -> checks are skipped until the backoff delay has passed
+    half_open -> a single probe check is allowed; success closes the
+                 circuit, failure re-opens it with a doubled delay
+    
+    The state is a plain dict so it can be persisted between runs.
+    """
+    
+    def __init__(
+        self,
+        state: Optional[Dict] = None,
+        failure_threshold: int = 3,
+        base_delay: float = 600,
+        max_delay: float = 4 * 3600,
+        jitter: float = 0.2
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.state = {
+            'state': CLOSED,
+            'failures': 0,
+            'trips': 0,
+            'incident_started': None,
+            'retry_at': None,
+            'degraded_alerted': False,
+            'probe_in_flight': False
+        }
+        self.state.update(state or {})
+        # A probe that was in flight when the last run ended never finished
+        self.state['probe_in_flight'] = False
+    
+    @property
+    def is_open(self) -> bool:
+        return self.state['state'] == OPEN
+    
+    @property
+    def retry_at(self) -> Optional[str]:
+        return self.state['retry_at']
+    
+    def to_dict(self) -> Dict:
+        return dict(self.state)
+    
+    def _backoff_delay(self) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** max(self.state['trips'] - 1, 0))
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+    
+    def allow_request(self, now: Optional[datetime] = None) -> bool:
+        """Whether a check should run now; may move open -> half_open"""
+        now = now or datetime.now()
+        
+        if self.state['state'] == CLOSED:
+            return True
+        
+        if self.state['state'] == OPEN:
+            if now < datetime.fromisoformat(self.state['retry_at']):
+                return False
+            logger.info("Circuit half-open, sending a single probe check")
+            self.state['state'] = HALF_OPEN
+            self.state['probe_in_flight'] = False
+        
+        # Half-open: only one probe at a time
+        if self.state['probe_in_flight']:
+            return False
+        self.state['probe_in_flight'] = True
+        return True
+    
+    def record_success(self) -> Optional[str]:
+        """
+        Close the circuit after a successful check
+        
+        Returns:
+            'recovered' if this ends an incident that was alerted on
+        """
+        recovered = self.state['degraded_alerted']
+        if self.state['state'] != CLOSED:
+            logger.info("Circuit closed after successful check")
+        
+        self.state.update({
+            'state': CLOSED,
+            'failures': 0,
+            'trips': 0,
+            'incident_started': None,
+            'retry_at': None,
+            'degraded_alerted': False,
+            'probe_in_flight': False
+        })
+        return 'recovered' if recovered else None
+    
+    def record_failure(self, now: Optional[datetime] = None) -> Optional[str]:
+        """
+        Count a failed check, opening the circuit if needed
+        
+        Returns:
+            'degraded' the first time the circuit opens during an incident
+        """
+        now = now or datetime.now()
+        self.state['failures'] += 1
+        self.state['probe_in_flight'] = False
+        self.state['incident_started'] = self.state['incident_started'] or now.isoformat()
+        
+        if self.state['state'] == CLOSED and self.state['failures'] < self.failure_threshold:
+            return None
+        
+        # Threshold reached, or the half-open probe failed: (re)open with backoff
+        self.state['trips'] += 1
+        retry_at = now + timedelta(seconds=self._backoff_delay())
+        self.state['state'] = OPEN
+        self.state['retry_at'] = retry_at.isoformat()
+        logger.warning(
+            f"Circuit open after {self.state['failures']} consecutive failures, "
+            f"next probe at {retry_at.strftime('%Y-%m-%d %H:%M:%S')}"
+        )
+        
+        if self.state['degraded_alerted']:
+            return None
+        self.state['degraded_alerted'] = True
+        return 'degraded'
@@ -0,0 +1,111 @@
+"""
+Monitor Configuration
+Targets, intervals and webhooks read from config.json
+"""
+
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+from src.listings import normalize_listing_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_FILE = "config.json"
+
+DEFAULT_TARGET = {
+    'name': "Samuel Merritt University Fall 2025 Parking",
+    'url': "https://space.aceparking.com/site/reserve/4fac9ba115140ac4f1c22da82aa0bc7f"
+}
+
+DEFAULT_INTERVAL = 60
+
+def normalize_config(raw: Dict) -> Dict:
+    """
+    Fill in defaults and key the targets by id
+    
+    Input:
+    {"interval": 60, "discord_webhook_url": "...",
+     "targets": [{"name": "...", "url": "...", "interval": 30, "discord_webhook_url": "..."}]}
+    
+    Returns:
+        {"interval": ..., "discord_webhook_url": ..., "targets": {id: target}}
+        where every target has name, url, interval and discord_webhook_url
+    """
+    interval = float(raw.get('interval', DEFAULT_INTERVAL))
+    webhook = raw.get('discord_webhook_url') or os.environ.get('DISCORD_WEBHOOK_URL')
+    
+    targets: Dict[str, Dict] = {}
+    for entry in raw.get('targets') or [DEFAULT_TARGET]:
+        if not entry.get('name') or not entry.get('url'):
+            logger.error(f"Skipping target without name/url: {entry}")
+            continue
+        target_id = normalize_listing_id(entry['name'])
+        targets[target_id] = {
+            'id': target_id,
+            'name': entry['name'],
+            'url': entry['url'],
+            'interval': float(entry.get('interval', interval)),
+            'discord_webhook_url': entry.get('discord_webhook_url') or webhook
+        }
+    
+    return {'interval': interval, 'discord_webhook_url': webhook, 'targets': targets}
+
+def load_config(path: str = DEFAULT_CONFIG_FILE) -> Dict:
+    """
+    Read and normalize the config file; a missing file gives the default target
+    
+    Raises:
+        ValueError if the file exists but can't be parsed
+    """
+    if not os.path.exists(path):
+        return normalize_config({})
+    try:
+        with open(path, 'r') as f:
+            return normalize_config(json.load(f))
+    except Exception as e:
+        raise ValueError(f"Invalid config file {path}: {e}")
+
+class ConfigDiff:
+    """What changed between two normalized configs"""
+    
+    def __init__(self, added: List[Dict], removed: List[Dict], restarted: List[Dict],
+                 interval_changed: List[Dict], webhook_changed: List[Dict]):
+        self.added = added
+        self.removed = removed
+        # Same target id but a different URL: torn down and started again
+        self.restarted = restarted
+        self.interval_changed = interval_changed
+        self.webhook_changed = webhook_changed
+    
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.restarted or self.interval_changed or self.webhook_changed)
+    
+    def summary(self) -> str:
+        return (f"{len(self.added)} added, {len(self.removed)} removed, {len(self.restarted)} restarted, "
+                f"{len(self.interval_changed)} interval changes, {len(self.webhook_changed)} webhook changes")
+
+def diff_configs(old: Optional[Dict], new: Dict) -> ConfigDiff:
+    """Compare two normalized configs target by target"""
+    old_targets = old['targets'] if old else {}
+    new_targets = new['targets']
+    
+    added = [target for target_id, target in new_targets.items() if target_id not in old_targets]
+    removed = [target for target_id, target in old_targets.items() if target_id not in new_targets]
+    restarted, interval_changed, webhook_changed = [], [], []
+    
+    for target_id, target in new_targets.items():
+        previous = old_targets.get(target_id)
+        if previous is None:
+            continue
+        if previous['url'] != target['url']:
+            restarted.append(target)
+            continue
+        if previous['interval'] != target['interval']:
+            interval_changed.append(target)
+        if previous['discord_webhook_url'] != target['discord_webhook_url']:
+            webhook_changed.append(target)
+    
+    return ConfigDiff(added, removed, restarted, interval_changed, webhook_changed)
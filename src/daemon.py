@@ -0,0 +1,415 @@
+"""
+Monitor Daemon
+Runs every configured target on one warm browser and hot-reloads config.json
+"""
+
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+from src.check_logger import CheckLogger
+from src.config import DEFAULT_CONFIG_FILE, diff_configs, load_config
+from src.browser_profiles import LaunchProfile, load_profile
+from src.page_watcher import PageWatcher
+from src.proxy_pool import Proxy, ProxyPool
+from src.single_flight import PageTargets, SingleFlight
+from src.state_snapshot import StateSnapshot
+from src.status_api import StatusBoard, StatusServer
+from src.subscriptions import SubscriptionStore
+from src.scraper import ParkingMonitor
+
+logger = logging.getLogger(__name__)
+
+class SharedPage:
+    """
+    One browser context and watched page per distinct reserve URL
+    
+    Targets listed on the same page share it, so the page is loaded once
+    per cycle however many targets it serves. The context keeps cookies
+    and consent state between checks. The context is opened through the
+    best proxy at the time and reopened through another if that proxy is
+    quarantined.
+    
+    A target whose check fails on the shared page moves to a page of its
+    own in the same context, so the other targets keep theirs; only the
+    last target on a page closes it to start over.
+    """
+    
+    def __init__(self, key: str):
+        self.key = key
+        self.context = None
+        self.watcher: Optional[PageWatcher] = None
+        self.proxy: Optional[Proxy] = None
+        self.pool: Optional[ProxyPool] = None
+        self.monitors: List[ParkingMonitor] = []
+    
+    @property
+    def users(self) -> int:
+        return len(self.monitors)
+    
+    async def open(self, browser, monitor: ParkingMonitor):
+        self.pool = monitor.proxy_pool
+        proxy = self.pool.pick()
+        self.context = await monitor._new_context(browser, proxy=proxy)
+        self.proxy = proxy
+        self.pool.attach(proxy)
+        self.watcher = self.own_watcher(monitor)
+        for attached in self.monitors:
+            self._point(attached)
+    
+    def own_watcher(self, monitor: ParkingMonitor) -> PageWatcher:
+        """A new page in this context (opened on its first refresh)"""
+        return PageWatcher(
+            self.context, monitor.url,
+            extract_snapshot=monitor._extract_snapshot,
+            prepare_page=monitor._prepare_page
+        )
+    
+    def shared_by_others(self, monitor: ParkingMonitor) -> bool:
+        """Whether another target is still on the page `monitor` is on"""
+        return monitor.page_watcher is self.watcher and any(
+            other is not monitor and other.page_watcher is self.watcher for other in self.monitors
+        )
+    
+    def _point(self, monitor: ParkingMonitor):
+        monitor.page_watcher = self.watcher
+        monitor.context_proxy = self.proxy
+        monitor.shared_page = self
+    
+    def attach(self, monitor: ParkingMonitor):
+        self.monitors.append(monitor)
+        self._point(monitor)
+    
+    async def detach(self, monitor: ParkingMonitor):
+        self.monitors.remove(monitor)
+        if monitor.page_watcher is not None and monitor.page_watcher is not self.watcher:
+            # The page it moved to after a failure
+            await monitor.page_watcher.close()
+        monitor.page_watcher = None
+        monitor.context_proxy = None
+        monitor.shared_page = None
+    
+    def needs_reopen(self) -> bool:
+        """The context failed to reopen, or its proxy is quarantined and a better one is available"""
+        if self.context is None:
+            return True
+        return bool(self.proxy and self.proxy.is_quarantined() and self.pool.pick() is not self.proxy)
+    
+    async def reopen(self, browser):
+        """Open a new context, through the best proxy now, for the same targets"""
+        if self.proxy:
+            logger.info(f"Proxy {self.proxy.server} quarantined, reopening page {self.key}")
+        await self.close()
+        await self.open(browser, self.monitors[0])
+    
+    async def close(self):
+        if self.watcher:
+            await self.watcher.close()
+            self.watcher = None
+        if self.context:
+            await self.context.close()
+            self.context = None
+        if self.pool:
+            self.pool.detach(self.proxy)
+            self.proxy = None
+
+class TargetRunner:
+    """
+    One target's monitor and check loop
+    
+    The loop sleeps on an event so an interval change or a stop takes
+    effect without waiting out the old interval. Stopping never cancels a
+    check that is in flight: the loop exits after it. on_result is called
+    with each check's result.
+    """
+    
+    def __init__(
+        self,
+        target: Dict,
+        monitor: ParkingMonitor,
+        on_result: Optional[Callable[[Dict, ParkingMonitor, Optional[Dict]], None]] = None
+    ):
+        self.target = target
+        self.monitor = monitor
+        self.on_result = on_result
+        self.interval = target['interval']
+        self.monitor.fit_deadline(self.interval)
+        self.task: Optional[asyncio.Task] = None
+        self.checking = False
+        self._stopping = False
+        self._wake = asyncio.Event()
+    
+    def start(self, page: SharedPage):
+        page.attach(self.monitor)
+        self.task = asyncio.create_task(self._loop(), name=f"target:{self.target['id']}")
+    
+    def set_interval(self, interval: float):
+        self.interval = interval
+        self.monitor.fit_deadline(interval)
+        self._wake.set()
+    
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            started = loop.time()
+            self.checking = True
+            try:
+                result = await self.monitor.check_and_notify()
+                if self.on_result:
+                    self.on_result(self.target, self.monitor, result)
+            except Exception as e:
+                logger.error(f"Check failed for {self.target['name']}: {e}")
+            finally:
+                self.checking = False
+            
+            # Sleep until the next check, or until woken by a config change
+            while not self._stopping:
+                remaining = self.interval - (loop.time() - started)
+                if remaining <= 0:
+                    break
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+    
+    async def stop(self):
+        """Let an in-flight check finish, then detach from the page"""
+        self._stopping = True
+        self._wake.set()
+        if self.task:
+            await self.task
+
+class MonitorDaemon:
+    """
+    Long-running monitor for every target in the config file
+    
+    The config file's mtime is polled; on a change the new config is
+    diffed against the running one and only the difference is applied:
+    new targets start, removed targets are torn down, interval and
+    webhook changes are applied to the running monitors. The browser is
+    launched once and kept for the life of the daemon.
+    
+    Targets on the same reserve page share one context and page, and their
+    checks are coalesced: concurrent refreshes of a page share one load,
+    and a fresh result is reused for PAGE_CACHE_TTL seconds (default 2,
+    keep it below the shortest interval).
+    """
+    
+    def __init__(
+        self,
+        config_path: str = DEFAULT_CONFIG_FILE,
+        poll_interval: float = 2.0,
+        state_dir: str = "data/state",
+        browser_profile: Optional[LaunchProfile] = None,
+        status_port: Optional[int] = None,
+        status_host: str = '127.0.0.1',
+        state_snapshot: Optional[StateSnapshot] = None
+    ):
+        self.config_path = config_path
+        self.poll_interval = poll_interval
+        self.state_dir = state_dir
+        self.browser_profile = browser_profile or load_profile()
+        self.config: Optional[Dict] = None
+        self.runners: Dict[str, TargetRunner] = {}
+        self.browser = None
+        # All targets' state in one snapshot file, written after each round of checks
+        self.state_snapshot = state_snapshot
+        self._snapshot_dirty = False
+        # One history writer and one proxy pool shared by every target
+        if state_snapshot:
+            state_snapshot.restore(self._state_files(), "data/check_history.json", "data/rollups.json")
+            self.check_logger = state_snapshot.check_logger("data/check_history.json", "data/rollups.json")
+        else:
+            self.check_logger = CheckLogger()
+        self.proxy_pool = ProxyPool.from_env()
+        self._proxy_health_loaded = False
+        # One subscriber index for every target's alerts
+        self.subscriptions = SubscriptionStore.from_env()
+        self.pages: Dict[str, SharedPage] = {}
+        self.page_flight = SingleFlight(ttl=float(os.environ.get('PAGE_CACHE_TTL', 2)))
+        # One monitor per listing alerts and logs, however many targets share its page
+        self.page_targets = PageTargets()
+        self._mtime: Optional[float] = None
+        # Latest results in memory, served by the status API if a port is set
+        self.status_board = StatusBoard()
+        self.status_server = StatusServer(self.status_board, status_host, status_port) if status_port else None
+    
+    def _config_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.config_path).st_mtime
+        except FileNotFoundError:
+            return None
+    
+    def _state_files(self) -> Dict:
+        """Per-target state files of the configured targets, to migrate into a snapshot"""
+        try:
+            targets = load_config(self.config_path)['targets']
+        except ValueError:
+            return {}
+        return {
+            target_id: (os.path.join(self.state_dir, f"{target_id}.json"),
+                        os.path.join(self.state_dir, f"{target_id}.snapshot.json"))
+            for target_id in targets
+        }
+    
+    def _new_monitor(self, target: Dict) -> ParkingMonitor:
+        return ParkingMonitor.for_target(
+            target, self.state_dir,
+            restored=self.state_snapshot.target(target['id']) if self.state_snapshot else None,
+            check_logger=self.check_logger,
+            proxy_pool=self.proxy_pool,
+            subscriptions=self.subscriptions,
+            page_flight=self.page_flight,
+            page_targets=self.page_targets,
+            browser_profile=self.browser_profile
+        )
+    
+    async def _start_target(self, target: Dict) -> bool:
+        """Start a target's monitor and loop; a target that fails to start is logged and skipped"""
+        monitor = None
+        try:
+            monitor = self._new_monitor(target)
+            if self.proxy_pool and not self._proxy_health_loaded:
+                # Every target persists the shared pool's health; the first one started seeds it
+                self.proxy_pool.load_state(monitor.state_manager.get_section('proxies'))
+                self._proxy_health_loaded = True
+            page = self.pages.get(monitor.page_key)
+            if page is None:
+                page = SharedPage(monitor.page_key)
+                await page.open(self.browser, monitor)
+                self.pages[monitor.page_key] = page
+        except Exception as e:
+            logger.error(f"Could not start {target['name']}: {e}")
+            if monitor is not None:
+                self.page_targets.unregister(monitor.page_key, monitor)
+            return False
+        
+        self.status_board.add_target(target)
+        runner = TargetRunner(target, monitor, on_result=self._record_result)
+        runner.start(page)
+        self.runners[target['id']] = runner
+        logger.info(f"▶️ Started {target['name']} every {target['interval']}s ({page.users} targets on its page)")
+        return True
+    
+    async def _stop_target(self, target_id: str):
+        runner = self.runners.pop(target_id, None)
+        if runner:
+            if runner.checking:
+                logger.info(f"Waiting for the in-flight check of {runner.target['name']}")
+            await runner.stop()
+            self.page_targets.unregister(runner.monitor.page_key, runner.monitor)
+            self.status_board.remove_target(target_id)
+            if self.state_snapshot:
+                # A restarted target picks its state back up from here
+                self.state_snapshot.capture(target_id, runner.monitor)
+            logger.info(f"⏹️ Stopped {runner.target['name']}")
+            
+            # Close the page once no target uses it
+            page = self.pages.get(runner.monitor.page_key)
+            if page:
+                await page.detach(runner.monitor)
+                if page.users <= 0:
+                    del self.pages[page.key]
+                    await page.close()
+                    logger.info(f"Closed page {page.key}")
+    
+    async def rotate_proxies(self):
+        """Move pages off quarantined proxies, between their checks"""
+        for page in list(self.pages.values()):
+            if not page.needs_reopen():
+                continue
+            if any(runner.checking for runner in self.runners.values() if runner.monitor in page.monitors):
+                continue
+            try:
+                await page.reopen(self.browser)
+            except Exception as e:
+                logger.error(f"Could not reopen page {page.key}: {e}")
+    
+    def _record_result(self, target: Dict, monitor: ParkingMonitor, result: Optional[Dict]):
+        self.status_board.update(target['id'], result, circuit=monitor.circuit_breaker.state['state'])
+        self._snapshot_dirty = True
+    
+    def save_state_snapshot(self):
+        """Write the state snapshot if any check finished since the last write"""
+        if not (self.state_snapshot and self._snapshot_dirty):
+            return
+        self._snapshot_dirty = False
+        try:
+            self.state_snapshot.save(
+                {target_id: runner.monitor for target_id, runner in self.runners.items()},
+                self.check_logger
+            )
+        except OSError as e:
+            logger.error(f"Error writing state snapshot: {e}")
+    
+    async def apply_config(self, config: Dict):
+        """Apply the difference between the running config and `config`"""
+        diff = diff_configs(self.config, config)
+        if not diff.has_changes:
+            self.config = config
+            return
+        logger.info(f"Applying config change: {diff.summary()}")
+        
+        for target in diff.removed + diff.restarted:
+            await self._stop_target(target['id'])
+        failed = set()
+        for target in diff.added + diff.restarted:
+            if not await self._start_target(target):
+                failed.add(target['id'])
+        for target in diff.interval_changed:
+            self.runners[target['id']].set_interval(target['interval'])
+            self.status_board.add_target(target)
+            logger.info(f"Interval for {target['name']} is now {target['interval']}s")
+        for target in diff.webhook_changed:
+            self.runners[target['id']].monitor.set_webhook(target['discord_webhook_url'])
+            logger.info(f"Webhook for {target['name']} updated")
+        
+        # Targets that failed to start are left out, so the next config change starts them again
+        self.config = {**config, 'targets': {
+            target_id: target for target_id, target in config['targets'].items() if target_id not in failed
+        }}
+    
+    async def reload_if_changed(self) -> bool:
+        """Reload the config file if its mtime changed"""
+        mtime = self._config_mtime()
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            config = load_config(self.config_path)
+        except ValueError as e:
+            # Keep running the last good config until the file is fixed
+            logger.error(f"{e}; keeping the current config")
+            return False
+        await self.apply_config(config)
+        return True
+    
+    async def run(self):
+        """Run until cancelled"""
+        async with async_playwright() as p:
+            self.browser = await ParkingMonitor.launch_browser(
+                p, per_context_proxy=bool(self.proxy_pool), profile=self.browser_profile
+            )
+            try:
+                if self.status_server:
+                    await self.status_server.start()
+                await self.reload_if_changed()
+                logger.info(f"Daemon watching {self.config_path} with {len(self.runners)} targets")
+                while True:
+                    await asyncio.sleep(self.poll_interval)
+                    await self.reload_if_changed()
+                    await self.rotate_proxies()
+                    self.save_state_snapshot()
+            finally:
+                for target_id in list(self.runners):
+                    await self._stop_target(target_id)
+                self._snapshot_dirty = True
+                self.save_state_snapshot()
+                if self.status_server:
+                    await self.status_server.stop()
+                await self.browser.close()
+                self.browser = None
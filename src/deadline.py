@@ -0,0 +1,98 @@
+"""
+Check Deadlines
+One time budget per check, shared by every phase of it
+"""
+
+import asyncio
+import contextlib
+import math
+import time
+from typing import Awaitable, Dict, Optional, TypeVar
+
+T = TypeVar('T')
+
+class DeadlineExceeded(Exception):
+    """A check ran out of its time budget"""
+    
+    def __init__(self, phase: str, budget: float):
+        super().__init__(f"deadline of {budget:.0f}s exceeded in {phase}")
+        self.phase = phase
+
+class Deadline:
+    """
+    Time budget for one check
+    
+    Work that takes its own timeout (navigation, waits, notification
+    sends) asks for timeout_ms()/remaining() so it never outlives the
+    check. run() cancels an awaitable that overruns, optionally keeping a
+    reserve back for the phases after it (so a slow page load still leaves
+    time to persist and notify). step() only names and times a stretch of
+    work (concurrent steps of the same name add up); the innermost step
+    that ends past the budget is recorded as the phase that blew it.
+    
+    A Deadline with no budget never expires.
+    """
+    
+    def __init__(self, budget: Optional[float] = None):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.expires_at = self.started + budget if budget else math.inf
+        # End of the window run() is currently enforcing (expires_at minus its reserve)
+        self._cutoff = self.expires_at
+        self.phases: Dict[str, float] = {}
+        self.exceeded_in: Optional[str] = None
+    
+    def remaining(self, reserve: float = 0) -> float:
+        return self.expires_at - reserve - time.monotonic()
+    
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self._cutoff
+    
+    def timeout_ms(self, cap_ms: float) -> float:
+        """A Playwright timeout: cap_ms or the time left, whichever is less (never 0, which means no timeout)"""
+        return max(1, min(cap_ms, self.remaining() * 1000))
+    
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(max(0, min(seconds, self.remaining())))
+    
+    @contextlib.contextmanager
+    def step(self, name: str):
+        started = time.monotonic()
+        try:
+            yield self
+        finally:
+            # Steps unwind innermost first, so the first one out past the cutoff is to blame
+            if self.expired and self.exceeded_in is None:
+                self.exceeded_in = name
+            self.phases[name] = round(self.phases.get(name, 0) + (time.monotonic() - started) * 1000, 1)
+    
+    async def run(self, name: str, awaitable: Awaitable[T], reserve: float = 0) -> T:
+        """
+        Await within the budget, less `reserve` seconds kept for later phases
+        
+        Raises:
+            DeadlineExceeded naming the phase that was running out of time
+        """
+        if self.budget is None:
+            with self.step(name):
+                return await awaitable
+        # Never hold back more than a quarter of the budget
+        reserve = min(reserve, self.budget / 4)
+        self._cutoff = self.expires_at - reserve
+        try:
+            async with asyncio.timeout(self.remaining(reserve)):
+                with self.step(name):
+                    return await awaitable
+        except TimeoutError:
+            raise DeadlineExceeded(self.exceeded_in or name, self.budget) from None
+        finally:
+            self._cutoff = self.expires_at
+    
+    def to_dict(self) -> Dict:
+        return {
+            'budget_seconds': self.budget,
+            'elapsed_ms': round((time.monotonic() - self.started) * 1000, 1),
+            'phases': self.phases,
+            'exceeded_in': self.exceeded_in
+        }
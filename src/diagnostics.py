@@ -0,0 +1,230 @@
+"""
+Check Diagnostics
+Keeps lightweight diagnostics for recent checks and saves them when a check fails
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Characters of page text kept either side of the target name
+SNIPPET_CHARS = 600
+# Failed requests kept per check
+MAX_FAILED_REQUESTS = 10
+
+class CheckDiagnostics:
+    """
+    What happened during one check
+    
+    Recording is cheap: a timeline of named events, request counters fed by
+    the browser context's events and a few notes. The screenshot and DOM
+    snippet are only captured when the check looks like a failure.
+    """
+    
+    def __init__(self, target_name: str, url: str):
+        self.target_name = target_name
+        self.url = url
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self.events: List[Dict] = []
+        self.network = {'requests': 0, 'finished': 0, 'failed': 0, 'by_status': {}, 'by_type': {}}
+        self.failed_requests: List[Dict] = []
+        self.notes: Dict = {}
+        self.snippet: Optional[str] = None
+        self.screenshot: Optional[bytes] = None
+        self.outcome: Optional[str] = None
+        self.trace_path: Optional[Path] = None
+    
+    def mark(self, name: str, **details):
+        """Add an event to the timeline, in ms since the check started"""
+        self.events.append({
+            'at_ms': round((time.perf_counter() - self._started) * 1000, 1),
+            'event': name,
+            **details
+        })
+    
+    def note(self, key: str, value):
+        self.notes[key] = value
+    
+    def watch_network(self, context):
+        """Count the context's requests and responses"""
+        def on_request(request):
+            self.network['requests'] += 1
+            by_type = self.network['by_type']
+            by_type[request.resource_type] = by_type.get(request.resource_type, 0) + 1
+        
+        def on_response(response):
+            bucket = f"{response.status // 100}xx"
+            self.network['by_status'][bucket] = self.network['by_status'].get(bucket, 0) + 1
+        
+        def on_finished(request):
+            self.network['finished'] += 1
+        
+        def on_failed(request):
+            self.network['failed'] += 1
+            if len(self.failed_requests) < MAX_FAILED_REQUESTS:
+                self.failed_requests.append({'url': request.url[:200], 'error': request.failure})
+        
+        context.on('request', on_request)
+        context.on('response', on_response)
+        context.on('requestfinished', on_finished)
+        context.on('requestfailed', on_failed)
+    
+    async def capture_page(self, page):
+        """
+        Screenshot the page and keep the text around the target listing
+        
+        Only called for checks that are about to be reported as failures.
+        """
+        if self.screenshot is not None:
+            return
+        try:
+            self.screenshot = await page.screenshot(full_page=True)
+            text = await page.inner_text('body')
+            pos = text.find(self.target_name)
+            if pos < 0:
+                self.snippet = text[:SNIPPET_CHARS * 2]
+                self.note('target_in_page', False)
+            else:
+                self.snippet = text[max(0, pos - SNIPPET_CHARS):pos + len(self.target_name) + SNIPPET_CHARS]
+                self.note('target_in_page', True)
+            self.mark('captured_page')
+        except Exception as e:
+            logger.debug(f"Could not capture page for diagnostics: {e}")
+            self.note('capture_error', str(e))
+    
+    def to_dict(self) -> Dict:
+        return {
+            'target': self.target_name,
+            'url': self.url,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': round((time.perf_counter() - self._started) * 1000, 1),
+            'outcome': self.outcome,
+            'events': self.events,
+            'network': self.network,
+            'failed_requests': self.failed_requests,
+            'notes': self.notes
+        }
+
+class DiagnosticsRecorder:
+    """
+    Ring buffer of the last `max_checks` checks' diagnostics
+    
+    Nothing is written for a successful check. When a check fails or
+    returns an unknown status, its diagnostics are saved together with the
+    recent checks (for comparison), the page screenshot and DOM snippet and,
+    if tracing is enabled, a Playwright trace of that check only. At most
+    `keep_failures` failure directories are kept, and never fewer than the
+    one just written (so 0 keeps only the latest failure).
+    """
+    
+    def __init__(
+        self,
+        output_dir: str = "data/diagnostics",
+        max_checks: int = 20,
+        keep_failures: int = 20,
+        trace: bool = False
+    ):
+        self.output_dir = Path(output_dir)
+        self.recent: Deque[Dict] = deque(maxlen=max_checks)
+        self.keep_failures = keep_failures
+        self.trace = trace
+    
+    def begin(self, target_name: str, url: str) -> CheckDiagnostics:
+        return CheckDiagnostics(target_name, url)
+    
+    def check_dir(self, diagnostics: CheckDiagnostics) -> Path:
+        stamp = diagnostics.started_at.strftime('%Y%m%d-%H%M%S-%f')
+        name = ''.join(c if c.isalnum() else '-' for c in diagnostics.target_name.lower()).strip('-')
+        return self.output_dir / f"{stamp}-{name or 'target'}"
+    
+    async def start_trace(self, context, diagnostics: CheckDiagnostics):
+        """Record a trace of this check's context if tracing is enabled"""
+        if not self.trace:
+            return
+        try:
+            await context.tracing.start(screenshots=True, snapshots=True)
+            diagnostics.trace_path = self.check_dir(diagnostics) / 'trace.zip'
+        except Exception as e:
+            logger.warning(f"Could not start trace: {e}")
+    
+    async def stop_trace(self, context, diagnostics: CheckDiagnostics, keep: bool):
+        """Write the trace out for a failed check, otherwise discard it"""
+        if diagnostics.trace_path is None:
+            return
+        try:
+            if keep:
+                diagnostics.trace_path.parent.mkdir(parents=True, exist_ok=True)
+                await context.tracing.stop(path=str(diagnostics.trace_path))
+            else:
+                await context.tracing.stop()
+                diagnostics.trace_path = None
+        except Exception as e:
+            logger.warning(f"Could not stop trace: {e}")
+            diagnostics.trace_path = None
+    
+    def finish(self, diagnostics: CheckDiagnostics, outcome: str, failure: bool = False) -> Optional[Path]:
+        """
+        Add a finished check to the ring buffer, saving it if it failed
+        
+        Returns: the directory the diagnostics were saved to, if any
+        """
+        diagnostics.outcome = outcome
+        diagnostics.mark('finished', outcome=outcome)
+        recent = list(self.recent)
+        self.recent.append(diagnostics.to_dict())
+        if not failure:
+            return None
+        
+        try:
+            directory = self.check_dir(diagnostics)
+            directory.mkdir(parents=True, exist_ok=True)
+            if diagnostics.screenshot:
+                (directory / 'screenshot.png').write_bytes(diagnostics.screenshot)
+            if diagnostics.snippet:
+                (directory / 'snippet.txt').write_text(diagnostics.snippet)
+            with open(directory / 'diagnostics.json', 'w') as f:
+                json.dump({
+                    'check': diagnostics.to_dict(),
+                    'trace': diagnostics.trace_path.name if diagnostics.trace_path else None,
+                    'recent_checks': recent
+                }, f, indent=2, default=str)
+            logger.warning(f"🩺 Check {outcome}, diagnostics saved to {directory}")
+            self._prune(directory)
+            return directory
+        except Exception as e:
+            logger.error(f"Error saving diagnostics: {e}")
+            return None
+        finally:
+            # Don't hold on to the screenshot in the ring buffer's checks
+            diagnostics.screenshot = None
+    
+    def _prune(self, current: Path):
+        """Delete the oldest failure directories, never `current`"""
+        older = sorted(path for path in self.output_dir.iterdir() if path.is_dir() and path != current)
+        keep = max(self.keep_failures - 1, 0)
+        for directory in older[:len(older) - keep]:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    @classmethod
+    def from_env(cls) -> 'DiagnosticsRecorder':
+        """
+        DIAGNOSTICS_DIR       Where failed checks are saved (default data/diagnostics)
+        DIAGNOSTICS_CHECKS    Recent checks kept in memory (default 20)
+        DIAGNOSTICS_KEEP      Failed checks kept on disk (default 20)
+        DIAGNOSTICS_TRACE     1 to record a Playwright trace of each browser check
+        """
+        return cls(
+            output_dir=os.environ.get('DIAGNOSTICS_DIR', 'data/diagnostics'),
+            max_checks=int(os.environ.get('DIAGNOSTICS_CHECKS', 20)),
+            keep_failures=int(os.environ.get('DIAGNOSTICS_KEEP', 20)),
+            trace=os.environ.get('DIAGNOSTICS_TRACE') == '1'
+        )
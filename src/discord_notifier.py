@@ -19,7 +19,8 @@ async def send_discord_notification(
     fields: Optional[List[Dict]] = None,
     url: Optional[str] = None,
     timestamp: Optional[str] = None,
-    footer_text: str = "ACE Parking Monitor"
+    footer_text: str = "ACE Parking Monitor",
+    timeout: float = 30
 ) -> bool:
     """
     Send a rich embed notification to Discord
@@ -33,6 +34,7 @@ async def send_discord_notification(
         url: URL to link in the embed
         timestamp: ISO timestamp
         footer_text: Footer text for the embed
+        timeout: Seconds before the request is abandoned (aiohttp's own default is 5 minutes)
     
     Returns:
         True if successful, False otherwise
@@ -72,7 +74,7 @@ async def send_discord_notification(
     
     # Send webhook
     try:
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
             async with session.post(webhook_url, json=payload) as response:
                 if response.status == 204:
                     logger.info("Discord notification sent successfully")
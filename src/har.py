@@ -0,0 +1,99 @@
+"""
+HAR Record / Replay
+Capture a monitor run's network traffic and serve it back offline
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class HarOptions:
+    """
+    Record a run to a HAR file, or replay one through Playwright routing
+    
+    In replay mode every request is answered from the HAR (anything not in
+    it is aborted), so runs are deterministic and need no network access.
+    """
+    
+    def __init__(self, mode: str, path: str, latency_ms: int = 0):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown HAR mode: {mode}")
+        self.mode = mode
+        self.path = Path(path)
+        self.latency_ms = latency_ms
+    
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+    
+    @property
+    def metadata_path(self) -> Path:
+        return self.path.with_suffix('.meta.json')
+    
+    def context_options(self) -> Dict:
+        """Extra options for browser.new_context()"""
+        # Service workers would bypass both recording and routing
+        options = {'service_workers': 'block'}
+        if self.mode == 'record':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            options.update({
+                'record_har_path': str(self.path),
+                'record_har_mode': 'full',
+                'record_har_content': 'embed'
+            })
+        return options
+    
+    async def attach(self, context):
+        """Install the replay routes on a new browser context"""
+        if not self.replaying:
+            return
+        
+        if not self.path.exists():
+            raise FileNotFoundError(f"HAR file not found: {self.path}")
+        
+        await context.route_from_har(self.path, not_found='abort')
+        
+        if self.latency_ms:
+            # Routes run last-registered first, so this delays each request
+            # and then falls back to the HAR route above
+            async def add_latency(route):
+                await asyncio.sleep(self.latency_ms / 1000)
+                await route.fallback()
+            
+            await context.route('**/*', add_latency)
+        
+        logger.info(f"Replaying {self.path} with {self.latency_ms}ms latency")
+    
+    def write_metadata(self, url: str, target_name: str, extra: Optional[Dict] = None):
+        """Save what was recorded next to the HAR file"""
+        if self.mode != 'record':
+            return
+        try:
+            from playwright._repo_version import version as playwright_version
+        except ImportError:
+            playwright_version = None
+        
+        metadata = {
+            'url': url,
+            'target_name': target_name,
+            'recorded_at': datetime.now().isoformat(),
+            'playwright_version': playwright_version,
+            **(extra or {})
+        }
+        with open(self.metadata_path, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        logger.info(f"Recorded run saved to {self.path}")
+    
+    def load_metadata(self) -> Dict:
+        """Read the metadata saved alongside a recording"""
+        try:
+            with open(self.metadata_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"No metadata for {self.path}: {e}")
+            return {}
@@ -0,0 +1,136 @@
+"""
+Hedged Fetches
+Start a backup attempt when the first one is slower than usual
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+class HedgePolicy:
+    """
+    Decide when to hedge, and how often
+    
+    The hedge delay is a percentile of recent attempt durations, clamped to
+    [min_delay, max_delay]. At most max_hedge_ratio of fetches may hedge, so
+    the extra load on the site stays bounded. The state is a plain dict so
+    the latency window and counters survive between runs.
+    """
+    
+    def __init__(
+        self,
+        state: Optional[Dict] = None,
+        percentile: float = 0.95,
+        min_delay: float = 5.0,
+        max_delay: float = 20.0,
+        default_delay: float = 15.0,
+        max_hedge_ratio: float = 0.1,
+        window: int = 50
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.window = window
+        self.state = {
+            'latencies': [],
+            'fetches': 0,
+            'hedges_fired': 0,
+            'hedges_won': 0
+        }
+        self.state.update(state or {})
+    
+    def to_dict(self) -> Dict:
+        return dict(self.state, latencies=list(self.state['latencies']))
+    
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary attempt before hedging"""
+        latencies: List[float] = sorted(self.state['latencies'])
+        if len(latencies) < 5:
+            return self.default_delay
+        index = min(int(len(latencies) * self.percentile), len(latencies) - 1)
+        return min(max(latencies[index], self.min_delay), self.max_delay)
+    
+    def record_latency(self, seconds: float):
+        latencies = self.state['latencies']
+        latencies.append(round(seconds, 3))
+        del latencies[:-self.window]
+    
+    def try_acquire_hedge(self) -> bool:
+        """Whether the hedge budget allows another attempt"""
+        budget = self.max_hedge_ratio * self.state['fetches'] + 1
+        if self.state['hedges_fired'] >= budget:
+            logger.info("Hedge budget exhausted, waiting on the primary attempt")
+            return False
+        self.state['hedges_fired'] += 1
+        return True
+
+async def run_hedged(attempt: Callable[[int], Awaitable[Optional[T]]], policy: HedgePolicy) -> Optional[T]:
+    """
+    Run attempt(0), and attempt(1) as well if attempt(0) is slow
+    
+    The first attempt to return a result wins and the other one is
+    cancelled. If every attempt fails, the first error is re-raised (or
+    None is returned if the attempts just found nothing).
+    
+    Every attempt that finishes (won, lost or failed) records its latency,
+    timed from its own start: a hedge's doesn't include the hedge delay.
+    An attempt cancelled before it finished records nothing, so hedging
+    never feeds the delay it is measured against.
+    
+    Args:
+        attempt: Coroutine factory taking the attempt number
+        policy: Hedge delay, budget and counters
+    
+    Returns:
+        The winning attempt's result
+    """
+    loop = asyncio.get_running_loop()
+    policy.state['fetches'] += 1
+    
+    tasks = {asyncio.create_task(attempt(0)): 0}
+    started = {number: loop.time() for number in tasks.values()}
+    errors = []
+    
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=policy.hedge_delay())
+        if not done and policy.try_acquire_hedge():
+            logger.info(f"Primary attempt still running after {policy.hedge_delay():.1f}s, hedging")
+            tasks[asyncio.create_task(attempt(1))] = 1
+            started[1] = loop.time()
+        
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                policy.record_latency(loop.time() - started[tasks[task]])
+            for task in done:
+                number = tasks[task]
+                if task.exception() is not None:
+                    logger.warning(f"Attempt {number} failed: {task.exception()}")
+                    errors.append(task.exception())
+                    continue
+                
+                result = task.result()
+                if result is None:
+                    continue
+                
+                if number == 1:
+                    policy.state['hedges_won'] += 1
+                    logger.info("Hedged attempt won")
+                return result
+        
+        if errors:
+            raise errors[0]
+        return None
+    
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,84 @@
+"""
+HTTP Fast Path
+Reads a reserve page over plain HTTP and stops as soon as the watched listings are found
+"""
+
+import codecs
+import logging
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import aiohttp
+
+from src.listings import ListingStreamParser
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+async def fetch_listings(
+    url: str,
+    watched: Iterable[str],
+    proxy: Optional[str] = None,
+    chunk_size: int = 16384,
+    timeout: float = 15
+) -> Tuple[Dict[str, Dict], bool, Dict]:
+    """
+    Stream the page through ListingStreamParser
+    
+    The body is decoded and parsed one chunk at a time. Once every watched
+    listing id has been seen the connection is closed without reading the
+    rest, so memory is bounded by the chunk size and large pages answer
+    early.
+    
+    Args:
+        url: Reserve page URL
+        watched: Listing ids the caller needs
+        proxy: Optional proxy URL
+        chunk_size: Bytes read per chunk
+        timeout: Total request timeout in seconds
+    
+    Returns:
+        (snapshot, complete, stats) where complete is False if reading
+        stopped early, and stats has bytes_read, content_length, early_exit
+        and elapsed_ms
+    
+    Raises:
+        aiohttp.ClientError on connection errors and non-2xx responses
+    """
+    started = time.perf_counter()
+    parser = ListingStreamParser(watched)
+    bytes_read = 0
+    early_exit = False
+    
+    async with aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        headers={'User-Agent': USER_AGENT, 'Accept': 'text/html'}
+    ) as session:
+        async with session.get(url, proxy=proxy) as response:
+            response.raise_for_status()
+            decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+            content_length = response.content_length
+            
+            async for chunk in response.content.iter_chunked(chunk_size):
+                bytes_read += len(chunk)
+                parser.feed(decoder.decode(chunk))
+                if parser.done:
+                    early_exit = True
+                    # Drop the connection rather than draining the rest of the body
+                    response.close()
+                    break
+            else:
+                parser.feed(decoder.decode(b'', final=True))
+                parser.close()
+    
+    stats = {
+        'bytes_read': bytes_read,
+        'content_length': content_length,
+        'early_exit': early_exit,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    logger.info(f"HTTP fetch read {bytes_read} bytes in {stats['elapsed_ms']}ms, "
+                f"{len(parser.snapshot)} listings{' (stopped early)' if early_exit else ''}")
+    return parser.snapshot, not early_exit, stats
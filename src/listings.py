@@ -0,0 +1,397 @@
+"""
+Listing Snapshots
+Extracts every listing on a reserve page and diffs it against the previous run
+"""
+
+import json
+import logging
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRICE_PATTERN = re.compile(r'\$[\d,]+(?:\.\d{1,2})?')
+
+# Short lines that end a listing block on the rendered page
+STATUS_MARKERS = {
+    'sold out': 'sold_out',
+    'add to cart': 'available',
+    'available': 'available',
+}
+
+# Finds the smallest container around each status button that also holds a price
+LISTING_CONTAINERS_JS = """
+() => {
+    const marker = /^(sold out|add to cart|available)\\b/i;
+    const price = /\\$[\\d,]+(\\.\\d{1,2})?/;
+    const containers = new Set();
+    for (const el of document.querySelectorAll('button, a, span, div, p')) {
+        if (el.children.length) continue;
+        const text = (el.innerText || '').trim();
+        if (!text || text.length > 30 || !marker.test(text)) continue;
+        let node = el.parentElement;
+        while (node && node !== document.body && !price.test(node.innerText || '')) {
+            node = node.parentElement;
+        }
+        if (node && node !== document.body) containers.add(node);
+    }
+    return Array.from(containers, node => node.innerText);
+}
+"""
+
+def normalize_listing_id(name: str) -> str:
+    """Stable id for a listing name: lowercase words joined by dashes"""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+def parse_status(text: str) -> str:
+    """Map free text from a listing to sold_out / available / unknown"""
+    lowered = text.lower()
+    if "sold out" in lowered:
+        return "sold_out"
+    if "available" in lowered or "add to cart" in lowered:
+        return "available"
+    return "unknown"
+
+def make_listing(name: str, status: str, price: Optional[str]) -> Dict:
+    """Build a snapshot entry for a listing"""
+    return {
+        'id': normalize_listing_id(name),
+        'name': name,
+        'status': status,
+        'price': price or 'N/A'
+    }
+
+def _status_marker(line: str) -> Optional[str]:
+    lowered = line.lower()
+    if len(lowered) > 30:
+        return None
+    for marker, status in STATUS_MARKERS.items():
+        if lowered.startswith(marker):
+            return status
+    return None
+
+def listings_from_containers(texts: List[str]) -> Dict[str, Dict]:
+    """
+    Build a snapshot from the text of each listing's container element
+    
+    The name is the first line that isn't a price or a status button.
+    """
+    snapshot = {}
+    for text in texts:
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        name = next((line for line in lines
+                     if not PRICE_PATTERN.search(line) and _status_marker(line) is None), None)
+        price = PRICE_PATTERN.search(text)
+        if not name:
+            continue
+        listing = make_listing(name, parse_status(text), price.group(0) if price else None)
+        snapshot.setdefault(listing['id'], listing)
+    return snapshot
+
+def extract_listings(text: str) -> Dict[str, Dict]:
+    """
+    Parse the rendered text of a whole reserve page into a snapshot
+    
+    Used when the listing containers can't be found in the DOM. Each listing on the page renders as a name, a price and a status button
+    ("Sold Out" / "Add to Cart"). The status line closes a block; the price is
+    the last price in the block and the name is the line just before it.
+    Further status lines before the next price belong to the same listing
+    ("Available 8/15 - 12/20", then "Sold Out"), and as in parse_status,
+    sold out wins.
+    
+    Args:
+        text: Page text with one element per line (e.g. body.innerText)
+    
+    Returns:
+        Snapshot dict keyed by normalized listing id
+    """
+    blocks = ListingBlocks()
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if line:
+            blocks.feed(line)
+    blocks.close()
+    return blocks.snapshot
+
+class ListingBlocks:
+    """
+    Groups lines of page text into listings, one line at a time
+    
+    A status line closes a block, but its listing stays open until the
+    next price starts another one, so every status line of a listing is
+    seen before it is recorded.
+    """
+    
+    def __init__(self, max_block_lines: Optional[int] = None):
+        self.max_block_lines = max_block_lines
+        self.snapshot: Dict[str, Dict] = {}
+        self.block: List[str] = []
+        self.open: Optional[Dict] = None
+    
+    def feed(self, line: str):
+        status = _status_marker(line)
+        if status is None:
+            if self.open and PRICE_PATTERN.search(line):
+                self._record()
+            self.block.append(line)
+            if self.max_block_lines:
+                del self.block[:-self.max_block_lines]
+            return
+        
+        if self.open:
+            # Another status line of the same listing; sold out wins
+            if status == 'sold_out':
+                self.open['status'] = 'sold_out'
+        else:
+            self.open = _listing_from_block(self.block, status)
+        self.block = []
+    
+    def close(self):
+        self._record()
+    
+    def _record(self):
+        if self.open and self.open['id'] not in self.snapshot:
+            self.snapshot[self.open['id']] = self.open
+        self.open = None
+
+def _listing_from_block(block: List[str], status: str) -> Optional[Dict]:
+    """Find the name and price in the lines preceding a status marker"""
+    for index in range(len(block) - 1, -1, -1):
+        match = PRICE_PATTERN.search(block[index])
+        if not match:
+            continue
+        
+        # Name and price can share a line ("Lot A Parking $67.45")
+        name = block[index][:match.start()].strip(' -|:')
+        if not name and index > 0:
+            name = block[index - 1]
+        if name and not PRICE_PATTERN.fullmatch(name):
+            return make_listing(name, status, match.group(0))
+        return None
+    return None
+
+# Tags that start a new line of rendered text; inline tags (b, span, ...) don't
+LINE_BREAK_TAGS = {
+    'address', 'article', 'br', 'button', 'dd', 'div', 'dt', 'footer', 'form', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'header', 'hr', 'label', 'li', 'main', 'nav', 'option', 'p', 'section',
+    'table', 'td', 'th', 'tr', 'ul', 'ol'
+}
+
+# Content that is never rendered as text
+HIDDEN_TAGS = {'script', 'style', 'noscript', 'template', 'svg'}
+
+class ListingStreamParser(HTMLParser):
+    """
+    Incremental version of extract_listings() for raw HTML
+    
+    Feed the page in chunks; text is split into lines at block-level tags
+    and grouped into listing blocks exactly like the rendered-text parser.
+    Only the current block (at most max_block_lines lines) is kept, so
+    memory doesn't grow with the page. `done` turns True once every
+    watched listing has been found (a listing is complete once the next
+    one's price is seen), so the caller can stop reading.
+    """
+    
+    def __init__(self, watched: Optional[Iterable[str]] = None, max_block_lines: int = 20):
+        super().__init__(convert_charrefs=True)
+        self.watched = set(watched or ())
+        self._blocks = ListingBlocks(max_block_lines)
+        self.snapshot = self._blocks.snapshot
+        self._text: List[str] = []
+        self._hidden = 0
+    
+    @property
+    def done(self) -> bool:
+        return bool(self.watched) and self.watched.issubset(self.snapshot)
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in HIDDEN_TAGS:
+            self._hidden += 1
+        elif tag in LINE_BREAK_TAGS:
+            self._end_line()
+    
+    def handle_endtag(self, tag):
+        if tag in HIDDEN_TAGS:
+            self._hidden = max(self._hidden - 1, 0)
+        elif tag in LINE_BREAK_TAGS:
+            self._end_line()
+    
+    def handle_data(self, data):
+        if not self._hidden:
+            self._text.append(data)
+    
+    def close(self):
+        super().close()
+        self._end_line()
+        self._blocks.close()
+    
+    def _end_line(self):
+        line = " ".join("".join(self._text).split())
+        self._text = []
+        if line:
+            self._blocks.feed(line)
+
+# Keys the reserve page's data responses use for listing fields
+JSON_NAME_KEYS = ('name', 'title', 'productName', 'displayName', 'description')
+JSON_PRICE_KEYS = ('price', 'amount', 'rate', 'cost', 'totalPrice')
+JSON_SOLD_OUT_KEYS = ('soldOut', 'sold_out', 'isSoldOut')
+JSON_AVAILABLE_KEYS = ('available', 'isAvailable', 'inStock')
+JSON_STATUS_KEYS = ('status', 'availability', 'state')
+JSON_QUANTITY_KEYS = ('quantityAvailable', 'quantity', 'inventory', 'remaining', 'spacesAvailable')
+
+def _json_status(item: Dict) -> Optional[str]:
+    for key in JSON_SOLD_OUT_KEYS:
+        if isinstance(item.get(key), bool):
+            return 'sold_out' if item[key] else 'available'
+    for key in JSON_AVAILABLE_KEYS:
+        if isinstance(item.get(key), bool):
+            return 'available' if item[key] else 'sold_out'
+    for key in JSON_QUANTITY_KEYS:
+        value = item.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return 'available' if value > 0 else 'sold_out'
+    for key in JSON_STATUS_KEYS:
+        if isinstance(item.get(key), str):
+            status = parse_status(item[key].lower().replace('_', ' ').replace('soldout', 'sold out'))
+            # Unrelated "state"/"status" strings (e.g. an address) aren't listings
+            if status != 'unknown':
+                return status
+    return None
+
+def _json_price(item: Dict) -> Optional[str]:
+    for key in JSON_PRICE_KEYS:
+        value = item.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return f"${value:,.2f}"
+        if isinstance(value, str) and value.strip():
+            match = PRICE_PATTERN.search(value)
+            return match.group(0) if match else f"${value.strip()}"
+    return None
+
+def listings_from_json(data) -> Dict[str, Dict]:
+    """
+    Build a snapshot from a JSON data response of the reserve page
+    
+    Any object with a name and an availability field (sold out flag,
+    available flag, quantity or status string) counts as a listing.
+    """
+    snapshot = {}
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(reversed(item))
+            continue
+        if not isinstance(item, dict):
+            continue
+        
+        name = next((item[key] for key in JSON_NAME_KEYS if isinstance(item.get(key), str) and item[key].strip()), None)
+        status = _json_status(item)
+        if name and status:
+            listing = make_listing(name.strip(), status, _json_price(item))
+            snapshot.setdefault(listing['id'], listing)
+        else:
+            stack.extend(reversed([value for value in item.values() if isinstance(value, (dict, list))]))
+    return snapshot
+
+class SnapshotDiff:
+    """Changes between two listing snapshots"""
+    
+    def __init__(self):
+        self.added: List[Dict] = []
+        self.removed: List[Dict] = []
+        self.status_changed: List[Tuple[Dict, Dict]] = []
+        self.price_changed: List[Tuple[Dict, Dict]] = []
+    
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.status_changed or self.price_changed)
+    
+    def summary(self) -> str:
+        return (f"{len(self.added)} added, {len(self.removed)} removed, "
+                f"{len(self.status_changed)} status changed, {len(self.price_changed)} price changed")
+
+def diff_snapshots(previous: Dict[str, Dict], current: Dict[str, Dict]) -> SnapshotDiff:
+    """
+    Compare two snapshots with one hashed lookup per listing
+    
+    Status and price changes are reported as (previous, current) pairs.
+    """
+    diff = SnapshotDiff()
+    
+    for listing_id, listing in current.items():
+        old = previous.get(listing_id)
+        if old is None:
+            diff.added.append(listing)
+            continue
+        if old['status'] != listing['status']:
+            diff.status_changed.append((old, listing))
+        if old['price'] != listing['price']:
+            diff.price_changed.append((old, listing))
+    
+    for listing_id, listing in previous.items():
+        if listing_id not in current:
+            diff.removed.append(listing)
+    
+    return diff
+
+class SnapshotStore:
+    """Persist the last listing snapshot in a compact row format"""
+    
+    FIELDS = ('id', 'name', 'status', 'price')
+    
+    def __init__(self, snapshot_file: str = "data/last_snapshot.json", initial: Optional[List[List]] = None):
+        """
+        Args:
+            snapshot_file: Snapshot file
+            initial: Restored listing rows (e.g. from a state snapshot); the
+                snapshot is then kept in memory instead of in the file
+        """
+        self.snapshot_file = Path(snapshot_file)
+        self.in_memory = initial is not None
+        self.rows: Optional[List[List]] = initial or None
+        if not self.in_memory:
+            self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    @classmethod
+    def to_rows(cls, snapshot: Dict[str, Dict]) -> List[List]:
+        return [[listing[field] for field in cls.FIELDS] for listing in snapshot.values()]
+    
+    @classmethod
+    def from_rows(cls, rows: List[List]) -> Dict[str, Dict]:
+        return {row[0]: dict(zip(cls.FIELDS, row)) for row in rows}
+    
+    def load(self) -> Optional[Dict[str, Dict]]:
+        """Load the previous snapshot, or None if there isn't one"""
+        if self.in_memory:
+            return self.from_rows(self.rows) if self.rows else None
+        try:
+            if not self.snapshot_file.exists():
+                return None
+            with open(self.snapshot_file, 'r') as f:
+                data = json.load(f)
+            return self.from_rows(data['listings'])
+        except Exception as e:
+            logger.error(f"Error reading snapshot file: {e}")
+            return None
+    
+    def save(self, snapshot: Dict[str, Dict], url: Optional[str] = None):
+        """Save a snapshot as one row per listing"""
+        if self.in_memory:
+            self.rows = self.to_rows(snapshot)
+            return
+        data = {
+            'version': 1,
+            'url': url,
+            'timestamp': datetime.now().isoformat(),
+            'fields': list(self.FIELDS),
+            'listings': self.to_rows(snapshot)
+        }
+        try:
+            with open(self.snapshot_file, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+        except Exception as e:
+            logger.error(f"Error saving snapshot: {e}")
@@ -0,0 +1,459 @@
+"""
+Load Test Harness
+Drives the monitor against a simulated ACE site and Discord webhook
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from src.daemon import MonitorDaemon
+
+logger = logging.getLogger(__name__)
+
+class FlipSchedule:
+    """
+    Scripted availability flips for every listing
+    
+    Every listing starts sold out and stays that way during the warmup, so
+    the monitors can take their first snapshot. After that it alternates
+    between sold out and available with exponentially distributed
+    durations. Times are seconds relative to the start of the run.
+    """
+    
+    def __init__(
+        self,
+        names: List[str],
+        duration: float,
+        warmup: float,
+        mean_sold_out: float = 300,
+        mean_available: float = 120,
+        seed: int = 1
+    ):
+        rng = random.Random(seed)
+        # listing name -> sorted [(time, status)] changes
+        self.changes: Dict[str, List[tuple]] = {}
+        for name in names:
+            changes = []
+            t = warmup + rng.expovariate(1 / mean_sold_out)
+            status = 'available'
+            while t < duration:
+                changes.append((round(t, 3), status))
+                mean = mean_available if status == 'available' else mean_sold_out
+                t += max(1.0, rng.expovariate(1 / mean))
+                status = 'sold_out' if status == 'available' else 'available'
+            self.changes[name] = changes
+    
+    def status_at(self, name: str, t: float) -> str:
+        status = 'sold_out'
+        for change_time, change_status in self.changes.get(name, []):
+            if change_time > t:
+                break
+            status = change_status
+        return status
+    
+    def to_dict(self) -> Dict:
+        return self.changes
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>Reserve parking</title></head>
+<body>
+<div id="products">{products}</div>
+<script>
+fetch('/api/reserve/{page_id}/products', {{headers: {{'Accept': 'application/json'}}}})
+    .then(response => response.json())
+    .then(data => {{
+        document.getElementById('products').innerHTML = data.products.map(p =>
+            `<div class="product"><h3>${{p.name}}</h3><span class="price">$${{p.price.toFixed(2)}}</span>` +
+            `<button>${{p.soldOut ? 'Sold Out' : 'Add to Cart'}}</button></div>`
+        ).join('');
+    }});
+</script>
+</body></html>
+"""
+
+PRODUCT_TEMPLATE = ('<div class="product"><h3>{name}</h3><span class="price">${price:.2f}</span>'
+                    '<button>{button}</button></div>')
+
+class FakeAceSite:
+    """Reserve pages plus the JSON endpoint they load their listings from"""
+    
+    def __init__(self, pages: Dict[str, List[str]], schedule: FlipSchedule, started: float,
+                 latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0, seed: int = 1):
+        self.pages = pages
+        self.schedule = schedule
+        self.started = started
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.prices = {name: 40 + index % 60 for page in pages.values() for index, name in enumerate(page)}
+        self.stats = {'page_requests': 0, 'api_requests': 0, 'errors_injected': 0}
+    
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/site/reserve/{page_id}', self.page)
+        app.router.add_get('/api/reserve/{page_id}/products', self.products)
+        return app
+    
+    async def _delay_or_fail(self) -> Optional[web.Response]:
+        delay = self.latency_ms + self.rng.uniform(0, self.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if self.rng.random() < self.error_rate:
+            self.stats['errors_injected'] += 1
+            return web.Response(status=503, text="Service Unavailable")
+        return None
+    
+    def _products(self, page_id: str) -> List[Dict]:
+        t = time.time() - self.started
+        return [{
+            'name': name,
+            'price': self.prices[name],
+            'soldOut': self.schedule.status_at(name, t) != 'available'
+        } for name in self.pages[page_id]]
+    
+    async def page(self, request: web.Request) -> web.Response:
+        self.stats['page_requests'] += 1
+        page_id = request.match_info['page_id']
+        if page_id not in self.pages:
+            raise web.HTTPNotFound()
+        failure = await self._delay_or_fail()
+        if failure:
+            return failure
+        products = "".join(PRODUCT_TEMPLATE.format(
+            name=product['name'], price=product['price'],
+            button='Sold Out' if product['soldOut'] else 'Add to Cart'
+        ) for product in self._products(page_id))
+        return web.Response(text=PAGE_TEMPLATE.format(products=products, page_id=page_id), content_type='text/html')
+    
+    async def products(self, request: web.Request) -> web.Response:
+        self.stats['api_requests'] += 1
+        page_id = request.match_info['page_id']
+        if page_id not in self.pages:
+            raise web.HTTPNotFound()
+        failure = await self._delay_or_fail()
+        if failure:
+            return failure
+        return web.json_response({'products': self._products(page_id)})
+
+class FakeDiscord:
+    """Webhook endpoint that timestamps every alert it receives"""
+    
+    def __init__(self):
+        self.received: List[Dict] = []
+    
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/webhook', self.webhook)
+        return app
+    
+    async def webhook(self, request: web.Request) -> web.Response:
+        received = time.time()
+        payload = await request.json()
+        for embed in payload.get('embeds', []):
+            self.received.append({
+                'time': received,
+                'title': embed.get('title'),
+                'description': embed.get('description')
+            })
+        return web.Response(status=204)
+
+async def _start_app(app: web.Application) -> tuple:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+def _serve(settings: Dict, ready, stop, results):
+    """Server process: run both fake services until told to stop"""
+    async def serve():
+        started = time.time()
+        schedule = FlipSchedule(
+            [name for names in settings['pages'].values() for name in names],
+            settings['duration'], settings['warmup'],
+            settings['mean_sold_out'], settings['mean_available'], settings['seed']
+        )
+        site = FakeAceSite(settings['pages'], schedule, started, settings['latency_ms'],
+                           settings['jitter_ms'], settings['error_rate'], settings['seed'])
+        discord = FakeDiscord()
+        site_runner, site_port = await _start_app(site.app())
+        discord_runner, discord_port = await _start_app(discord.app())
+        ready.put({'site_port': site_port, 'discord_port': discord_port, 'started': started, 'pid': os.getpid()})
+        
+        while not stop.is_set():
+            await asyncio.sleep(0.2)
+        
+        results.put({'schedule': schedule.to_dict(), 'received': discord.received, 'stats': site.stats})
+        await site_runner.cleanup()
+        await discord_runner.cleanup()
+    
+    asyncio.run(serve())
+
+class ProcessTreeSampler:
+    """
+    CPU time and RSS of this process and its children (the browser)
+    
+    Read from /proc, so Linux only. Processes listed in `exclude` (the
+    fake server) and their children are left out.
+    """
+    
+    def __init__(self, exclude: Optional[List[int]] = None, interval: float = 1.0):
+        self.exclude = set(exclude or [])
+        self.interval = interval
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.ticks = os.sysconf('SC_CLK_TCK')
+        self.rss_samples: List[int] = []
+        self.cpu_start = 0.0
+        self.cpu_end = 0.0
+        # Last CPU time seen per pid, so exited children still count
+        self._cpu_by_pid: Dict[int, float] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def _tree(self) -> List[int]:
+        children: Dict[int, List[int]] = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                children.setdefault(int(fields[1]), []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+        pids, stack = [], [os.getpid()]
+        while stack:
+            pid = stack.pop()
+            if pid in self.exclude:
+                continue
+            pids.append(pid)
+            stack.extend(children.get(pid, []))
+        return pids
+    
+    def sample(self):
+        rss = 0
+        for pid in self._tree():
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                with open(f'/proc/{pid}/statm') as f:
+                    rss += int(f.read().split()[1]) * self.page_size
+            except (OSError, IndexError, ValueError):
+                continue
+            # utime and stime are fields 14 and 15 of stat (11 and 12 after the name)
+            self._cpu_by_pid[pid] = (int(fields[11]) + int(fields[12])) / self.ticks
+        self.rss_samples.append(rss)
+    
+    @property
+    def cpu_seconds(self) -> float:
+        return sum(self._cpu_by_pid.values())
+    
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+    
+    def start(self):
+        self.sample()
+        self.cpu_start = self.cpu_seconds
+        self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self.sample()
+        self.cpu_end = self.cpu_seconds
+
+def _percentile(values: List[float], percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(len(values) * percentile), len(values) - 1)], 3)
+
+def detection_report(schedule: Dict[str, List[tuple]], received: List[Dict], started: float,
+                     ended: float, grace: float) -> Dict:
+    """
+    Match every flip to available with the first alert for that listing
+    
+    A flip is detected by the first availability alert received after it
+    and before the listing's next flip to available. Flips less than
+    `grace` seconds before the end are reported as pending, not missed.
+    """
+    alerts_by_name: Dict[str, List[float]] = {}
+    for alert in received:
+        # Only the sold out -> available alert counts, not re-alerts or new listings
+        if 'PARKING ALERT' not in (alert['title'] or ''):
+            continue
+        alerts_by_name.setdefault(alert['description'], []).append(alert['time'])
+    
+    latencies, missed, pending, duplicates = [], 0, 0, 0
+    for name, changes in schedule.items():
+        flips = [started + t for t, status in changes if status == 'available']
+        alerts = sorted(alerts_by_name.get(name, []))
+        for index, flip in enumerate(flips):
+            window_end = flips[index + 1] if index + 1 < len(flips) else ended
+            matched = [t for t in alerts if flip <= t < window_end]
+            if matched:
+                latencies.append(matched[0] - flip)
+                duplicates += len(matched) - 1
+            elif ended - flip < grace:
+                pending += 1
+            else:
+                missed += 1
+    
+    return {
+        'flips_to_available': len(latencies) + missed + pending,
+        'detected': len(latencies),
+        'missed': missed,
+        'pending': pending,
+        'duplicate_alerts': duplicates,
+        'alerts_received': len(received),
+        'latency_seconds': {
+            'p50': _percentile(latencies, 0.5),
+            'p90': _percentile(latencies, 0.9),
+            'p99': _percentile(latencies, 0.99),
+            'max': round(max(latencies), 3) if latencies else None
+        }
+    }
+
+async def drive(config_path: str, state_dir: str, duration: float, exclude_pid: int) -> Dict:
+    """Run the monitor daemon for `duration` seconds while sampling resources"""
+    
+    sampler = ProcessTreeSampler(exclude=[exclude_pid])
+    sampler.start()
+    daemon = MonitorDaemon(config_path, state_dir=state_dir)
+    task = asyncio.create_task(daemon.run())
+    started = time.time()
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout=duration)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await sampler.stop()
+    elapsed = time.time() - started
+    
+    cpu = sampler.cpu_end - sampler.cpu_start
+    return {
+        'elapsed_seconds': round(elapsed, 1),
+        'cpu_seconds': round(cpu, 1),
+        'avg_cores': round(cpu / elapsed, 2) if elapsed else None,
+        'rss_peak_mb': round(max(sampler.rss_samples) / 2**20, 1),
+        'rss_mean_mb': round(sum(sampler.rss_samples) / len(sampler.rss_samples) / 2**20, 1)
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load and detection-latency test against a simulated ACE site")
+    parser.add_argument("--targets", type=int, default=30, help="Number of monitored listings")
+    parser.add_argument("--listings-per-page", type=int, default=10, help="Listings on each reserve page")
+    parser.add_argument("--interval", type=float, default=30, help="Check interval per target in seconds")
+    parser.add_argument("--duration", type=float, default=600, help="Length of the run in seconds")
+    parser.add_argument("--warmup", type=float, default=None, help="Seconds before the first flip (default 2 intervals)")
+    parser.add_argument("--mean-sold-out", type=float, default=300, help="Mean seconds a listing stays sold out")
+    parser.add_argument("--mean-available", type=float, default=120, help="Mean seconds a listing stays available")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Fake site response latency")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="Random extra latency, up to this much")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for flips, latency and errors")
+    parser.add_argument("--output", help="Write the JSON report here")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the harness and print the report"""
+    args = parse_args(argv)
+    warmup = args.warmup if args.warmup is not None else args.interval * 2
+    
+    page_count = math.ceil(args.targets / args.listings_per_page)
+    pages = {f"page-{page}": [] for page in range(page_count)}
+    for index in range(args.targets):
+        page = index // args.listings_per_page
+        pages[f"page-{page}"].append(f"Test Lot {page}-{index % args.listings_per_page} Parking")
+    
+    settings = {
+        'pages': pages, 'duration': args.duration, 'warmup': warmup,
+        'mean_sold_out': args.mean_sold_out, 'mean_available': args.mean_available,
+        'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate, 'seed': args.seed
+    }
+    ready, results = multiprocessing.Queue(), multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    server = multiprocessing.Process(target=_serve, args=(settings, ready, stop, results), daemon=True)
+    server.start()
+    endpoints = ready.get(timeout=30)
+    
+    # Monitor state, history and profiles go to a scratch directory
+    workdir = tempfile.mkdtemp(prefix="parking-loadtest-")
+    os.chdir(workdir)
+    config = {
+        'interval': args.interval,
+        'discord_webhook_url': f"http://127.0.0.1:{endpoints['discord_port']}/webhook",
+        'targets': [{
+            'name': name,
+            'url': f"http://127.0.0.1:{endpoints['site_port']}/site/reserve/{page_id}"
+        } for page_id, names in pages.items() for name in names]
+    }
+    with open('config.json', 'w') as f:
+        json.dump(config, f)
+    
+    logger.info(f"🧪 {args.targets} targets on {page_count} pages, every {args.interval}s for {args.duration}s "
+                f"(workdir {workdir})")
+    resources = asyncio.run(drive('config.json', 'state', args.duration, endpoints['pid']))
+    ended = time.time()
+    
+    stop.set()
+    outcome = results.get(timeout=30)
+    server.join(timeout=10)
+    
+    elapsed = resources['elapsed_seconds']
+    stats = outcome['stats']
+    report = {
+        'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+        'detection': detection_report(outcome['schedule'], outcome['received'], endpoints['started'],
+                                      ended, grace=args.interval * 2),
+        'resources': resources,
+        'site': dict(stats, requests_per_second=round((stats['page_requests'] + stats['api_requests']) / elapsed, 2)),
+        'workdir': workdir
+    }
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print_report(report)
+    return report
+
+def print_report(report: Dict):
+    detection = report['detection']
+    latency = detection['latency_seconds']
+    resources = report['resources']
+    site = report['site']
+    settings = report['settings']
+    
+    print("\n" + "="*50)
+    print("LOAD TEST REPORT")
+    print("="*50)
+    print(f"Targets: {settings['targets']} every {settings['interval']}s for {resources['elapsed_seconds']}s")
+    print(f"Flips to available: {detection['flips_to_available']} "
+          f"(detected {detection['detected']}, missed {detection['missed']}, pending {detection['pending']})")
+    print(f"Detection latency: p50 {latency['p50']}s, p90 {latency['p90']}s, p99 {latency['p99']}s, max {latency['max']}s")
+    print(f"Alerts received: {detection['alerts_received']} ({detection['duplicate_alerts']} duplicates)")
+    print(f"Site requests: {site['page_requests']} pages, {site['api_requests']} data, "
+          f"{site['requests_per_second']}/s, {site['errors_injected']} errors injected")
+    print(f"CPU: {resources['cpu_seconds']}s ({resources['avg_cores']} cores avg)")
+    print(f"RSS: peak {resources['rss_peak_mb']} MB, mean {resources['rss_mean_mb']} MB")
+    print("="*50 + "\n")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
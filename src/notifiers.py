@@ -0,0 +1,340 @@
+"""
+Notification Channels
+Fans one alert out to Discord, JSON webhooks, email and local sinks concurrently
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import os
+import smtplib
+import sys
+import time
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from src.deadline import Deadline
+from src.discord_notifier import send_discord_notification
+
+logger = logging.getLogger(__name__)
+
+class NotificationChannel(abc.ABC):
+    """
+    Base class for a notification channel
+    
+    An alert is a dict with the send_discord_notification() arguments:
+    title, description, color, fields, url and timestamp. Each channel has
+    its own timeout and retry budget, so a slow channel only delays itself.
+    A channel whose send can't be cancelled sets retry_after_timeout False:
+    a send that timed out may still go through, and a retry would send the
+    alert twice.
+    """
+    
+    kind = 'channel'
+    retry_after_timeout = True
+    
+    def __init__(self, name: Optional[str] = None, timeout: float = 10.0, retries: int = 2, retry_delay: float = 1.0):
+        self.name = name or self.kind
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+    
+    @abc.abstractmethod
+    async def send(self, alert: Dict) -> bool:
+        """Send the alert once; return False or raise on failure"""
+    
+    async def deliver(self, alert: Dict, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Send with timeout and retries
+        
+        Args:
+            alert: Alert dict
+            deadline: The check's deadline; attempts and retry waits are cut
+                to the time it has left, and no attempt starts once it is spent
+        
+        Returns:
+            Delivery record with channel, ok, attempts, latency_ms and error
+        """
+        started = time.perf_counter()
+        error = None
+        attempts = 0
+        deadline = deadline or Deadline()
+        
+        for attempt in range(self.retries + 1):
+            timeout = min(self.timeout, deadline.remaining())
+            if timeout <= 0:
+                error = error or "check deadline exceeded"
+                break
+            attempts += 1
+            try:
+                if await asyncio.wait_for(self.send(alert), timeout=timeout):
+                    error = None
+                    break
+                error = "send returned failure"
+            except asyncio.TimeoutError:
+                error = f"timed out after {timeout:.1f}s"
+                if not self.retry_after_timeout:
+                    logger.warning(f"Channel {self.name} timed out, not retrying: the send may still complete")
+                    break
+            except Exception as e:
+                error = str(e)
+            
+            logger.warning(f"Channel {self.name} attempt {attempts} failed: {error}")
+            if attempt < self.retries:
+                await deadline.sleep(self.retry_delay * 2 ** attempt)
+        
+        return {
+            'channel': self.name,
+            'ok': error is None,
+            'attempts': attempts,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+            'error': error
+        }
+
+def alert_to_payload(alert: Dict) -> Dict:
+    """Flatten an alert into a plain JSON document"""
+    return {
+        'title': alert.get('title'),
+        'description': alert.get('description'),
+        'url': alert.get('url'),
+        'timestamp': alert.get('timestamp'),
+        'fields': {field['name']: field['value'] for field in alert.get('fields') or []}
+    }
+
+def alert_to_text(alert: Dict) -> str:
+    """Render an alert as plain text"""
+    payload = alert_to_payload(alert)
+    lines = [payload['title'] or '', payload['description'] or '']
+    lines += [f"{name}: {value}" for name, value in payload['fields'].items()]
+    if payload['url']:
+        lines.append(payload['url'])
+    return "\n".join(lines)
+
+class DiscordChannel(NotificationChannel):
+    """Discord webhook embed"""
+    
+    kind = 'discord'
+    
+    def __init__(self, webhook_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.webhook_url = webhook_url
+    
+    async def send(self, alert: Dict) -> bool:
+        return await send_discord_notification(webhook_url=self.webhook_url, timeout=self.timeout, **alert)
+
+class WebhookChannel(NotificationChannel):
+    """Generic JSON webhook (any 2xx response counts as delivered)"""
+    
+    kind = 'webhook'
+    
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.headers = headers or {}
+    
+    async def send(self, alert: Dict) -> bool:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            async with session.post(self.url, json=alert_to_payload(alert), headers=self.headers) as response:
+                if 200 <= response.status < 300:
+                    return True
+                logger.error(f"Webhook {self.url} returned {response.status}")
+                return False
+
+class EmailChannel(NotificationChannel):
+    """
+    SMTP email, sent from a worker thread
+    
+    A timed out send keeps running in its thread, so it isn't retried.
+    """
+    
+    kind = 'email'
+    retry_after_timeout = False
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        recipients: List[str],
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+    
+    def _send_sync(self, alert: Dict) -> bool:
+        message = EmailMessage()
+        message['Subject'] = f"{alert.get('title', 'Parking alert')} - {alert.get('description', '')}"
+        message['From'] = self.sender
+        message['To'] = ", ".join(self.recipients)
+        message.set_content(alert_to_text(alert))
+        
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or '')
+            smtp.send_message(message)
+        return True
+    
+    async def send(self, alert: Dict) -> bool:
+        return await asyncio.to_thread(self._send_sync, alert)
+
+class SocketChannel(NotificationChannel):
+    """One JSON line per alert written to a local Unix socket"""
+    
+    kind = 'socket'
+    
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+    
+    async def send(self, alert: Dict) -> bool:
+        reader, writer = await asyncio.open_unix_connection(self.path)
+        try:
+            writer.write((json.dumps(alert_to_payload(alert)) + "\n").encode())
+            await writer.drain()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        return True
+
+class StdoutChannel(NotificationChannel):
+    """One JSON line per alert on stdout"""
+    
+    kind = 'stdout'
+    
+    async def send(self, alert: Dict) -> bool:
+        sys.stdout.write(json.dumps(alert_to_payload(alert)) + "\n")
+        sys.stdout.flush()
+        return True
+
+def build_channel(destination: Dict, name: Optional[str] = None, **options) -> NotificationChannel:
+    """
+    Create a channel from a destination dict
+    
+    {"type": "discord", "url": ...}, {"type": "webhook", "url": ...},
+    {"type": "email", "to": [...]} (SMTP settings from NOTIFY_SMTP_*),
+    {"type": "socket", "path": ...} or {"type": "stdout"}
+    """
+    kind = destination.get('type')
+    if kind == 'discord':
+        return DiscordChannel(destination['url'], name=name, **options)
+    if kind == 'webhook':
+        return WebhookChannel(destination['url'], headers=destination.get('headers'), name=name, **options)
+    if kind == 'email':
+        recipients = destination['to'] if isinstance(destination['to'], list) else [destination['to']]
+        return EmailChannel(
+            host=destination.get('host', os.environ.get('NOTIFY_SMTP_HOST', 'localhost')),
+            port=int(destination.get('port', os.environ.get('NOTIFY_SMTP_PORT', 25))),
+            sender=os.environ.get('NOTIFY_SMTP_FROM', 'parking-monitor@localhost'),
+            recipients=recipients,
+            username=os.environ.get('NOTIFY_SMTP_USER'),
+            password=os.environ.get('NOTIFY_SMTP_PASSWORD'),
+            use_tls=os.environ.get('NOTIFY_SMTP_TLS') == '1',
+            name=name,
+            **options
+        )
+    if kind == 'socket':
+        return SocketChannel(destination['path'], name=name, **options)
+    if kind == 'stdout':
+        return StdoutChannel(name=name, **options)
+    raise ValueError(f"Unknown destination type: {kind}")
+
+class Notifier:
+    """Dispatch each alert to every channel at once"""
+    
+    def __init__(self, channels: Optional[List[NotificationChannel]] = None):
+        self.channels = channels or []
+    
+    async def dispatch(
+        self,
+        alert: Dict,
+        extra_channels: Optional[List[NotificationChannel]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict]:
+        """
+        Send an alert to all channels concurrently
+        
+        Args:
+            alert: Alert dict
+            extra_channels: Channels for this alert only (e.g. subscribers)
+            deadline: The check's deadline, shared by every channel
+        
+        Returns:
+            One delivery record per channel
+        """
+        channels = self.channels + (extra_channels or [])
+        if not channels:
+            logger.warning("No notification channels configured, skipping notification")
+            return []
+        
+        deliveries = await asyncio.gather(*(channel.deliver(alert, deadline) for channel in channels))
+        for delivery in deliveries:
+            logger.info(
+                f"Notification via {delivery['channel']}: {'ok' if delivery['ok'] else 'FAILED'} "
+                f"in {delivery['latency_ms']}ms ({delivery['attempts']} attempts)"
+            )
+        return list(deliveries)
+    
+    @classmethod
+    def from_env(cls, discord_webhook_url: Optional[str] = None) -> 'Notifier':
+        """
+        Build channels from environment variables
+        
+        DISCORD_WEBHOOK_URL      Discord webhook
+        NOTIFY_WEBHOOK_URLS      Comma separated generic JSON webhooks
+        NOTIFY_SMTP_HOST/PORT    SMTP server (with NOTIFY_SMTP_FROM, NOTIFY_SMTP_TO,
+                                 optional NOTIFY_SMTP_USER/PASSWORD/TLS)
+        NOTIFY_SOCKET            Unix socket path
+        NOTIFY_STDOUT            Set to 1 to print alerts as JSON lines
+        NOTIFY_TIMEOUT           Per-channel timeout in seconds (default 10)
+        NOTIFY_RETRIES           Per-channel retries (default 2)
+        """
+        options = {
+            'timeout': float(os.environ.get('NOTIFY_TIMEOUT', 10)),
+            'retries': int(os.environ.get('NOTIFY_RETRIES', 2))
+        }
+        channels: List[NotificationChannel] = []
+        
+        discord_webhook_url = discord_webhook_url or os.environ.get('DISCORD_WEBHOOK_URL')
+        if discord_webhook_url:
+            channels.append(DiscordChannel(discord_webhook_url, **options))
+        
+        for index, url in enumerate(filter(None, os.environ.get('NOTIFY_WEBHOOK_URLS', '').split(','))):
+            channels.append(WebhookChannel(url.strip(), name=f"webhook-{index + 1}", **options))
+        
+        recipients = [r.strip() for r in os.environ.get('NOTIFY_SMTP_TO', '').split(',') if r.strip()]
+        if os.environ.get('NOTIFY_SMTP_HOST') and not recipients:
+            # Every send would fail at delivery time
+            logger.warning("NOTIFY_SMTP_HOST is set but NOTIFY_SMTP_TO is empty, skipping the email channel")
+        elif os.environ.get('NOTIFY_SMTP_HOST'):
+            channels.append(EmailChannel(
+                host=os.environ['NOTIFY_SMTP_HOST'],
+                port=int(os.environ.get('NOTIFY_SMTP_PORT', 25)),
+                sender=os.environ.get('NOTIFY_SMTP_FROM', 'parking-monitor@localhost'),
+                recipients=recipients,
+                username=os.environ.get('NOTIFY_SMTP_USER'),
+                password=os.environ.get('NOTIFY_SMTP_PASSWORD'),
+                use_tls=os.environ.get('NOTIFY_SMTP_TLS') == '1',
+                **options
+            ))
+        
+        if os.environ.get('NOTIFY_SOCKET'):
+            channels.append(SocketChannel(os.environ['NOTIFY_SOCKET'], **options))
+        
+        if os.environ.get('NOTIFY_STDOUT') == '1':
+            channels.append(StdoutChannel(**options))
+        
+        return cls(channels)
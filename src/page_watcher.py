@@ -0,0 +1,151 @@
+"""
+Page Watcher
+Keeps a reserve page open and refreshes listings from its own data requests
+"""
+
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from src.listings import listings_from_json
+
+logger = logging.getLogger(__name__)
+
+# Re-issue the page's own data request from inside the page, so cookies and
+# headers match; the response is picked up by the page.on('response') handler
+TRIGGER_FETCH_JS = """
+async (request) => {
+    const response = await fetch(request.url, {
+        method: request.method,
+        body: request.body,
+        headers: request.headers,
+        credentials: 'include'
+    });
+    return response.status;
+}
+"""
+
+class PageWatcher:
+    """
+    One long-lived page per reserve URL
+    
+    The first load records which JSON response (XHR/fetch) carries the
+    listings. Each refresh re-triggers that request in the page and reads
+    the listings straight from the response, instead of navigating and
+    re-rendering the whole page. A full reload is only done when that fails.
+    A refresh only takes a response to the request it triggered (same URL
+    and method), not whatever other listing data the page happens to load.
+    """
+    
+    def __init__(
+        self,
+        context,
+        url: str,
+        extract_snapshot: Callable[[object], Awaitable[Dict[str, Dict]]],
+        prepare_page: Optional[Callable[[object], Awaitable[None]]] = None,
+        response_timeout: float = 10.0
+    ):
+        self.context = context
+        self.url = url
+        self.extract_snapshot = extract_snapshot
+        self.prepare_page = prepare_page
+        self.response_timeout = response_timeout
+        self.page = None
+        
+        # The request that returned listing data, learned from the first load
+        self.data_request: Optional[Dict] = None
+        self._waiter: Optional[asyncio.Future] = None
+        # (url, method) of the request the waiter is waiting for
+        self._awaited: Optional[Tuple[str, str]] = None
+        self.latest: Dict[str, Dict] = {}
+        
+        self.stats = {'refreshes': 0, 'reloads': 0, 'json_updates': 0}
+    
+    async def start(self):
+        """Open the page and learn where its listing data comes from"""
+        self.page = await self.context.new_page()
+        self.page.on('response', self._on_response)
+        await self.page.goto(self.url, wait_until='networkidle', timeout=30000)
+        if self.prepare_page:
+            await self.prepare_page(self.page)
+        
+        if self.data_request:
+            logger.info(f"Watching listing data from {self.data_request['method']} {self.data_request['url']}")
+        else:
+            logger.info("No JSON listing data seen, refreshes will reload the page")
+    
+    async def close(self):
+        if self.page:
+            await self.page.close()
+            self.page = None
+    
+    def _on_response(self, response):
+        request = response.request
+        if request.resource_type not in ('xhr', 'fetch'):
+            return
+        if 'json' not in response.headers.get('content-type', ''):
+            return
+        asyncio.ensure_future(self._read_response(response))
+    
+    async def _read_response(self, response):
+        try:
+            snapshot = listings_from_json(json.loads(await response.text()))
+        except Exception as e:
+            logger.debug(f"Ignoring response from {response.url}: {e}")
+            return
+        if not snapshot:
+            return
+        
+        request = response.request
+        if self.data_request is None or self.data_request['url'] != request.url:
+            headers = {key: value for key, value in request.headers.items()
+                       if key.lower() in ('accept', 'content-type', 'x-requested-with')}
+            self.data_request = {
+                'url': request.url,
+                'method': request.method,
+                'body': request.post_data,
+                'headers': headers
+            }
+        
+        self.latest = snapshot
+        self.stats['json_updates'] += 1
+        # Only the response to the request refresh() triggered answers it
+        if self._waiter and not self._waiter.done() and (request.url, request.method) == self._awaited:
+            self._waiter.set_result(snapshot)
+    
+    async def refresh(self) -> Dict[str, Dict]:
+        """
+        Get a fresh listing snapshot, preferring the in-page data request
+        
+        Returns:
+            Snapshot dict keyed by listing id (may be empty)
+        """
+        self.stats['refreshes'] += 1
+        if self.page is None:
+            # The page was just loaded, so its data is already fresh
+            self.latest = {}
+            await self.start()
+            return self.latest or await self.extract_snapshot(self.page)
+        
+        if self.data_request:
+            self._waiter = asyncio.get_running_loop().create_future()
+            self._awaited = (self.data_request['url'], self.data_request['method'])
+            try:
+                await self.page.evaluate(TRIGGER_FETCH_JS, self.data_request)
+                return await asyncio.wait_for(self._waiter, timeout=self.response_timeout)
+            except Exception as e:
+                logger.warning(f"In-page data refresh failed, reloading page: {e}")
+            finally:
+                self._waiter = None
+                self._awaited = None
+        
+        return await self.reload()
+    
+    async def reload(self) -> Dict[str, Dict]:
+        """Fully reload the page and extract listings from the DOM"""
+        self.stats['reloads'] += 1
+        await self.page.reload(wait_until='networkidle', timeout=30000)
+        if self.prepare_page:
+            await self.prepare_page(self.page)
+        return await self.extract_snapshot(self.page)
@@ -0,0 +1,306 @@
+"""
+Profiling
+Sampling / cProfile profiles of checks and an event-loop lag monitor
+"""
+
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A frame in a collapsed stack: (function, file, line of the def)
+Frame = Tuple[str, str, int]
+
+# Leaf functions that mean the loop thread is idle, waiting on I/O
+IDLE_LEAVES = ('select', 'poll', 'epoll', 'kqueue')
+
+def _stack(frame) -> Tuple[Frame, ...]:
+    """Root-first stack of a thread's current frame"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * percentile), len(values) - 1)]
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's stack from a background thread
+    
+    Low overhead compared to cProfile, and it also sees time spent idle in
+    the selector, i.e. waiting on the browser or network rather than
+    running Python code.
+    """
+    
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self.started: Optional[float] = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self.started = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[_stack(frame)] += 1
+    
+    @property
+    def total_samples(self) -> int:
+        return sum(self.samples.values())
+    
+    @property
+    def idle_samples(self) -> int:
+        return sum(count for stack, count in self.samples.items() if stack and stack[-1][0] in IDLE_LEAVES)
+    
+    def write_collapsed(self, path: str):
+        """One 'frame;frame;frame count' line per stack (flamegraph.pl / speedscope)"""
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(";".join(_frame_label(frame) for frame in stack) + f" {count}\n")
+    
+    def write_speedscope(self, path: str, name: str = "parking monitor checks"):
+        """Write a speedscope 'sampled' profile"""
+        frame_index: Dict[Frame, int] = {}
+        frames = []
+        samples = []
+        weights = []
+        for stack, count in self.samples.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+                indices.append(frame_index[frame])
+            samples.append(indices)
+            weights.append(round(count * self.interval, 6))
+        
+        document = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'parking-monitor',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': round(sum(weights), 6),
+                'samples': samples,
+                'weights': weights
+            }]
+        }
+        with open(path, 'w') as f:
+            json.dump(document, f)
+
+class LoopLagMonitor:
+    """
+    Measures how long synchronous code blocks the event loop
+    
+    A heartbeat task wakes every `interval`; any extra delay before it runs
+    is time the loop spent running something else without yielding. A
+    watchdog thread notices heartbeats that are overdue by more than
+    `threshold` and records the loop thread's stack at that moment, so each
+    block is attributed to the code that caused it.
+    """
+    
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: List[float] = []
+        self.blockers: Counter = Counter()
+        self._last_beat = time.perf_counter()
+        self._thread_id = threading.get_ident()
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+    
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+    
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._watchdog:
+            self._watchdog.join()
+    
+    async def _heartbeat(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self.lags.append(max(0.0, now - expected))
+            self._last_beat = now
+    
+    def _watch(self):
+        reported_beat = None
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._last_beat
+            if beat == reported_beat or time.perf_counter() - beat < self.interval + self.threshold:
+                continue
+            # Loop is blocked right now: note where, once per block
+            reported_beat = beat
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                summary = traceback.extract_stack(frame)[-3:]
+                self.blockers["; ".join(f"{os.path.basename(f.filename)}:{f.lineno} {f.name}" for f in summary)] += 1
+    
+    def report(self) -> Dict:
+        return {
+            'beats': len(self.lags),
+            'max_ms': round(max(self.lags, default=0) * 1000, 1),
+            'p50_ms': round(_percentile(self.lags, 0.5) * 1000, 1),
+            'p95_ms': round(_percentile(self.lags, 0.95) * 1000, 1),
+            'p99_ms': round(_percentile(self.lags, 0.99) * 1000, 1),
+            'blocked_over_threshold': sum(1 for lag in self.lags if lag >= self.threshold),
+            'total_blocked_ms': round(sum(self.lags) * 1000, 1),
+            'top_blockers': self.blockers.most_common(10)
+        }
+
+async def profile_checks(
+    run_check: Callable[[], Awaitable[object]],
+    checks: int,
+    profiler: str = 'sampling',
+    output_dir: str = "data/profiles",
+    interval: float = 0.0
+) -> Dict:
+    """
+    Run `checks` checks under a profiler and the loop lag monitor
+    
+    Args:
+        run_check: Coroutine factory running one check
+        checks: Number of checks to profile
+        profiler: 'sampling' (collapsed stacks + speedscope) or 'cprofile' (pstats)
+        output_dir: Where profile files are written
+        interval: Seconds to wait between checks
+    
+    Returns:
+        Summary with check durations, loop lag and the files written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    base = os.path.join(output_dir, f"profile-{stamp}")
+    
+    lag_monitor = LoopLagMonitor()
+    sampler = SamplingProfiler() if profiler == 'sampling' else None
+    cprofiler = cProfile.Profile() if profiler == 'cprofile' else None
+    durations = []
+    files = []
+    
+    lag_monitor.start()
+    if sampler:
+        sampler.start()
+    if cprofiler:
+        cprofiler.enable()
+    try:
+        for number in range(checks):
+            started = time.perf_counter()
+            await run_check()
+            durations.append(time.perf_counter() - started)
+            logger.info(f"Profiled check {number + 1}/{checks} in {durations[-1]:.2f}s")
+            if interval and number < checks - 1:
+                await asyncio.sleep(interval)
+    finally:
+        if cprofiler:
+            cprofiler.disable()
+        if sampler:
+            sampler.stop()
+        await lag_monitor.stop()
+    
+    summary = {
+        'checks': checks,
+        'profiler': profiler,
+        'check_seconds': {
+            'min': round(min(durations, default=0), 3),
+            'p50': round(_percentile(durations, 0.5), 3),
+            'max': round(max(durations, default=0), 3)
+        },
+        'loop_lag': lag_monitor.report()
+    }
+    
+    if sampler:
+        sampler.write_collapsed(base + ".collapsed.txt")
+        sampler.write_speedscope(base + ".speedscope.json")
+        files += [base + ".collapsed.txt", base + ".speedscope.json"]
+        total = sampler.total_samples or 1
+        summary['samples'] = sampler.total_samples
+        # Idle loop time is time spent waiting on the browser / network
+        summary['loop_idle_pct'] = round(100 * sampler.idle_samples / total, 1)
+    
+    if cprofiler:
+        cprofiler.dump_stats(base + ".prof")
+        files.append(base + ".prof")
+        text = io.StringIO()
+        pstats.Stats(cprofiler, stream=text).sort_stats('cumulative').print_stats(25)
+        summary['top_cumulative'] = text.getvalue()
+    
+    summary['files'] = files
+    with open(base + ".summary.json", 'w') as f:
+        json.dump(summary, f, indent=2)
+    files.append(base + ".summary.json")
+    return summary
+
+def print_profile_summary(summary: Dict):
+    """Print a profile_checks() summary"""
+    lag = summary['loop_lag']
+    print("\n" + "="*50)
+    print("PROFILE SUMMARY")
+    print("="*50)
+    print(f"Checks: {summary['checks']} ({summary['profiler']})")
+    seconds = summary['check_seconds']
+    print(f"Check time: min {seconds['min']}s, p50 {seconds['p50']}s, max {seconds['max']}s")
+    if 'loop_idle_pct' in summary:
+        print(f"Loop idle (waiting on browser/network): {summary['loop_idle_pct']}% of {summary['samples']} samples")
+    print(f"Loop lag: p50 {lag['p50_ms']}ms, p95 {lag['p95_ms']}ms, p99 {lag['p99_ms']}ms, max {lag['max_ms']}ms")
+    print(f"Loop blocked: {lag['blocked_over_threshold']} times over threshold, {lag['total_blocked_ms']}ms total")
+    for blocker, count in lag['top_blockers']:
+        print(f"  - {count}x {blocker}")
+    if 'top_cumulative' in summary:
+        print(summary['top_cumulative'])
+    print("Files:")
+    for path in summary['files']:
+        print(f"  - {path}")
+    print("="*50 + "\n")
@@ -0,0 +1,101 @@
+"""
+Availability Report
+Render the availability rollups as a text report
+
+Usage: python -m src.report [--target NAME] [--days N] [--snapshot FILE]
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+from src.rollups import AvailabilityRollups
+
+def _format_duration(seconds: Optional[float]) -> str:
+    """Format a duration in seconds as a short human string"""
+    if seconds is None:
+        return "n/a"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+def _rate(counts: List[int]) -> str:
+    checks, available = counts
+    return f"{available / checks * 100:5.1f}%" if checks else "    -"
+
+def render_target(name: str, rollup: Dict, days: int = 14) -> str:
+    """Render the report for a single target"""
+    windows = rollup["windows"]
+    mean_sellout = AvailabilityRollups.mean_time_to_sellout(rollup)
+    
+    lines = [
+        "=" * 60,
+        name,
+        "=" * 60,
+        f"Checks:               {rollup['checks']} ({rollup['first_check']} -> {rollup['last_check']})",
+        f"Available checks:     {rollup['available']} ({_rate([rollup['checks'], rollup['available']]).strip()})",
+        f"Last status:          {rollup['last_status']}",
+        f"Availability windows: {windows['opened']} opened, {windows['closed']} sold out again",
+        f"Mean time-to-sellout: {_format_duration(mean_sellout)}",
+        f"Longest window:       {_format_duration(windows['longest_open_seconds'] or None)}",
+    ]
+    if windows["open_since"]:
+        lines.append(f"🎉 Currently available since {windows['open_since']}")
+    
+    lines.append("")
+    lines.append("By hour of day   checks  available  rate    opened")
+    for hour in sorted(rollup["hours"]):
+        counts = rollup["hours"][hour]
+        opened = windows["opened_by_hour"].get(hour, 0)
+        lines.append(f"  {hour}:00          {counts[0]:6d}  {counts[1]:9d}  {_rate(counts)}  {opened:6d}")
+    
+    lines.append("")
+    lines.append(f"By day (last {days})  checks  available  rate")
+    for day in sorted(rollup["days"])[-days:]:
+        counts = rollup["days"][day]
+        lines.append(f"  {day}      {counts[0]:6d}  {counts[1]:9d}  {_rate(counts)}")
+    
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Parking availability report")
+    parser.add_argument("--file", default="data/rollups.json", help="Rollup file to read")
+    parser.add_argument(
+        "--snapshot", default=os.environ.get('STATE_SNAPSHOT_FILE'),
+        help="Read the rollups from this state snapshot instead (default $STATE_SNAPSHOT_FILE); "
+             "runs that keep their state in a snapshot no longer update the rollup file"
+    )
+    parser.add_argument("--target", help="Only report on this target")
+    parser.add_argument("--days", type=int, default=14, help="Number of days to show")
+    args = parser.parse_args(argv)
+    
+    if args.snapshot:
+        try:
+            with open(args.snapshot) as f:
+                rollups = AvailabilityRollups(args.file, data=json.load(f)['rollups'])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read rollups from {args.snapshot}: {e}")
+            return 1
+    else:
+        rollups = AvailabilityRollups(args.file)
+    targets = rollups.get_targets()
+    if args.target:
+        targets = {args.target: targets[args.target]} if args.target in targets else {}
+    
+    if not targets:
+        print("No checks recorded yet")
+        return 1
+    
+    for name, rollup in targets.items():
+        print(render_target(name, rollup, days=args.days))
+        print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Availability Rollups
+Incrementally maintained per-target availability statistics
+"""
+
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+UNAVAILABLE_STATUSES = ('sold_out', 'unknown')
+
+def is_available(status: str) -> bool:
+    """Same definition of "available" used by the check history"""
+    return status not in UNAVAILABLE_STATUSES
+
+class AvailabilityRollups:
+    """
+    Per-target rollups (checks, availability, windows, time-to-sellout)
+    updated one check at a time, so reports never rescan the history
+    """
+    
+    def __init__(self, rollup_file: str = "data/rollups.json", data: Optional[Dict] = None):
+        """
+        Args:
+            rollup_file: Rollup file
+            data: Restored rollups (e.g. from a state snapshot); they are then
+                kept in memory and the file is never read or written
+        """
+        self.rollup_file = Path(rollup_file)
+        self.in_memory = data is not None
+        if self.in_memory:
+            self.data = data
+        else:
+            self.rollup_file.parent.mkdir(parents=True, exist_ok=True)
+            self.data = self._load()
+    
+    def _load(self) -> Dict:
+        """Load rollups from disk, starting empty if missing or invalid"""
+        try:
+            if self.rollup_file.exists():
+                with open(self.rollup_file, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading rollup file: {e}")
+        return {"version": 1, "targets": {}}
+    
+    def _save(self):
+        """Write rollups back to disk"""
+        if self.in_memory:
+            return
+        try:
+            with open(self.rollup_file, 'w') as f:
+                json.dump(self.data, f, indent=2)
+        except Exception as e:
+            logger.error(f"Error saving rollups: {e}")
+    
+    @staticmethod
+    def _new_target() -> Dict:
+        return {
+            "checks": 0,
+            "available": 0,
+            "first_check": None,
+            "last_check": None,
+            "last_status": None,
+            "hours": {},
+            "days": {},
+            "windows": {
+                "opened": 0,
+                "closed": 0,
+                "open_since": None,
+                "total_open_seconds": 0.0,
+                "longest_open_seconds": 0.0,
+                "opened_by_hour": {}
+            }
+        }
+    
+    def record_check(self, target: str, status: str, timestamp: Optional[datetime] = None):
+        """
+        Fold a single check into the rollups for a target
+        
+        Args:
+            target: Target (listing) name
+            status: Status observed by the check
+            timestamp: When the check happened (defaults to now)
+        """
+        timestamp = timestamp or datetime.now()
+        available = is_available(status)
+        rollup = self.data["targets"].setdefault(target, self._new_target())
+        
+        rollup["checks"] += 1
+        rollup["available"] += int(available)
+        rollup["first_check"] = rollup["first_check"] or timestamp.isoformat()
+        rollup["last_check"] = timestamp.isoformat()
+        
+        # Buckets are [checks, available] pairs keyed by hour of day and date
+        for bucket, key in (("hours", f"{timestamp.hour:02d}"),
+                            ("days", timestamp.strftime("%Y-%m-%d"))):
+            counts = rollup[bucket].setdefault(key, [0, 0])
+            counts[0] += 1
+            counts[1] += int(available)
+        
+        # An availability window opens on the first available check and
+        # closes when the listing is seen sold out again
+        windows = rollup["windows"]
+        if available and windows["open_since"] is None:
+            windows["open_since"] = timestamp.isoformat()
+            windows["opened"] += 1
+            hour = f"{timestamp.hour:02d}"
+            windows["opened_by_hour"][hour] = windows["opened_by_hour"].get(hour, 0) + 1
+        elif status == 'sold_out' and windows["open_since"] is not None:
+            opened = datetime.fromisoformat(windows["open_since"])
+            duration = max((timestamp - opened).total_seconds(), 0.0)
+            windows["closed"] += 1
+            windows["total_open_seconds"] += duration
+            windows["longest_open_seconds"] = max(windows["longest_open_seconds"], duration)
+            windows["open_since"] = None
+        
+        rollup["last_status"] = status
+        self._save()
+    
+    def get_target(self, target: str) -> Optional[Dict]:
+        """Get the rollup for a single target"""
+        return self.data["targets"].get(target)
+    
+    def get_targets(self) -> Dict[str, Dict]:
+        """Get rollups for all targets"""
+        return self.data["targets"]
+    
+    @staticmethod
+    def mean_time_to_sellout(rollup: Dict) -> Optional[float]:
+        """Mean seconds a listing stayed available before selling out"""
+        windows = rollup["windows"]
+        if not windows["closed"]:
+            return None
+        return windows["total_open_seconds"] / windows["closed"]
@@ -0,0 +1,137 @@
+"""
+Run Lock
+Keeps overlapping scheduled runs from checking and writing state at once
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SKIP = 'skip'
+WAIT = 'wait'
+
+class RunLock:
+    """
+    Exclusive flock around one monitor's state files
+    
+    The lock file also records the holder (pid, start time) and, once the
+    check finishes, its result. A run that finds the lock held either
+    exits straight away (mode 'skip') or waits for it (mode 'wait'); a
+    waiting run whose wait outlasted a complete check reuses that check's
+    result instead of loading the page again.
+    """
+    
+    def __init__(self, path: str, mode: str = WAIT, timeout: float = 600, poll_interval: float = 0.5):
+        self.path = path
+        self.mode = mode
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+        self._acquired_at: Optional[float] = None
+        self.stats = {'waited_seconds': 0.0, 'contended': False, 'outcome': None, 'holder': None}
+    
+    def _try_lock(self) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+    
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.loads(f.read() or '{}')
+        except (OSError, ValueError):
+            return {}
+    
+    def _write(self, record: Dict):
+        data = json.dumps(record).encode()
+        os.ftruncate(self._fd, 0)
+        os.pwrite(self._fd, data, 0)
+        os.fsync(self._fd)
+    
+    async def acquire(self) -> Optional[Dict]:
+        """
+        Take the lock, honouring the skip / wait mode
+        
+        Returns:
+            None if the lock is now held by this run; otherwise a dict with
+            'outcome' 'skipped', 'reused' (with the holder's 'result') or
+            'timed_out'
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.stats = {'waited_seconds': 0.0, 'contended': False, 'outcome': None, 'holder': None}
+        started = time.monotonic()
+        waiting_since = datetime.now().isoformat()
+        
+        if not self._try_lock():
+            holder = self._read()
+            self.stats.update(contended=True, holder=holder)
+            logger.warning(f"🔒 Check already running (pid {holder.get('pid')} since {holder.get('started_at')})")
+            
+            if self.mode == SKIP:
+                self.stats['outcome'] = 'skipped'
+                logger.info("Run lock mode is 'skip', exiting without checking")
+                return dict(self.stats)
+            
+            while not self._try_lock():
+                if time.monotonic() - started > self.timeout:
+                    self.stats.update(outcome='timed_out', waited_seconds=round(time.monotonic() - started, 1))
+                    logger.error(f"Gave up waiting for the run lock after {self.stats['waited_seconds']}s")
+                    return dict(self.stats)
+                await asyncio.sleep(self.poll_interval)
+        
+        self.stats['waited_seconds'] = round(time.monotonic() - started, 3)
+        previous = self._read()
+        if self.stats['contended']:
+            logger.info(f"Run lock acquired after waiting {self.stats['waited_seconds']}s")
+            # The check we waited for finished while we waited: use its result
+            if (previous.get('finished_at') or '') >= waiting_since and previous.get('result'):
+                self.stats.update(outcome='reused', result=previous['result'])
+                self._release_fd()
+                logger.info(f"♻️ Reusing the result of the check that finished at {previous['finished_at']}")
+                return dict(self.stats)
+        
+        self.stats['outcome'] = 'acquired'
+        self._acquired_at = time.monotonic()
+        self._write({
+            'pid': os.getpid(),
+            'started_at': datetime.now().isoformat(),
+            'finished_at': None,
+            'result': None,
+            'runs': previous.get('runs', 0) + 1,
+            'contended_runs': previous.get('contended_runs', 0) + int(self.stats['contended']),
+            'total_wait_seconds': round(previous.get('total_wait_seconds', 0) + self.stats['waited_seconds'], 3)
+        })
+        return None
+    
+    def release(self, result: Optional[Dict] = None):
+        """Record the check's result and release the lock"""
+        if self._fd is None:
+            return
+        try:
+            record = self._read()
+            record.update(finished_at=datetime.now().isoformat(), result=result)
+            self._write(record)
+            held = time.monotonic() - self._acquired_at
+            logger.info(f"🔓 Run lock released after {held:.1f}s (waited {self.stats['waited_seconds']}s, "
+                        f"{record.get('contended_runs', 0)} of {record.get('runs', 0)} runs contended)")
+        except Exception as e:
+            logger.error(f"Error recording run result in lock file: {e}")
+        finally:
+            self._release_fd()
+    
+    def _release_fd(self):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
@@ -3,10 +3,12 @@ Fixed ACE Parking Availability Scraper
 Updated to work with the actual page structure
 """
 
+import argparse
 import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import Dict, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
 import sys
 import os
@@ -20,8 +22,28 @@ load_dotenv()  # ← ADD THIS LINE
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.discord_notifier import send_discord_notification
+from src.notifiers import Notifier
 from src.state_manager import StateManager
+from src.listings import (
+    LISTING_CONTAINERS_JS, SnapshotStore, diff_snapshots, extract_listings,
+    listings_from_containers, make_listing, normalize_listing_id, parse_status
+)
+from src.rollups import is_available
+from src.har import HarOptions
+from src.circuit_breaker import CircuitBreaker
+from src.hedging import HedgePolicy, run_hedged
+from src.alerting import AlertStateMachine
+from src.page_watcher import PageWatcher
+from src.subscriptions import SubscriptionStore
+from src.config import DEFAULT_CONFIG_FILE, DEFAULT_TARGET, load_config
+from src.proxy_pool import Proxy, ProxyPool
+from src.single_flight import PageTargets, SingleFlight, normalize_url
+from src.run_lock import SKIP, WAIT, RunLock
+from src.http_fetch import fetch_listings
+from src.diagnostics import CheckDiagnostics, DiagnosticsRecorder
+from src.browser_profiles import PROFILES, LaunchProfile, load_profile
+from src.state_snapshot import StateSnapshot
+from src.deadline import Deadline, DeadlineExceeded
 
 # Configure logging
 logging.basicConfig(
@@ -30,80 +52,581 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Notification title per alert kind
+ALERT_TITLES = {
+    'available': "🚗 PARKING ALERT!",
+    'still_available': "🔁 PARKING STILL AVAILABLE!",
+    'new_listing': "🆕 NEW PARKING LISTING!"
+}
+
+# History and rollups shared by every target
+HISTORY_FILE = "data/check_history.json"
+ROLLUP_FILE = "data/rollups.json"
+
+# Shortest deadline a check gets, however short its polling interval
+MIN_CHECK_BUDGET = 30
+
 class ParkingMonitor:
     """Monitor parking availability on ACE Parking website"""
     
-    def __init__(self, url: str, target_name: str = "Samuel Merritt University Fall 2025 Parking"):
+    def __init__(
+        self,
+        url: str,
+        target_name: str = DEFAULT_TARGET['name'],
+        har: Optional[HarOptions] = None,
+        state_file: str = "data/last_state.json",
+        snapshot_file: str = "data/last_snapshot.json",
+        check_logger: Optional[CheckLogger] = None,
+        discord_webhook_url: Optional[str] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        page_flight: Optional[SingleFlight] = None,
+        page_targets: Optional[PageTargets] = None,
+        lock_mode: Optional[str] = None,
+        http_fast_path: Optional[bool] = None,
+        diagnostics: Optional[DiagnosticsRecorder] = None,
+        browser_profile: Optional[LaunchProfile] = None,
+        restored: Optional[Dict] = None,
+        state_snapshot: Optional[StateSnapshot] = None,
+        snapshot_key: Optional[str] = None,
+        interval: Optional[float] = None,
+        subscriptions: Optional[SubscriptionStore] = None
+    ):
+        """
+        Args:
+            restored: This target's entry of a state snapshot kept by the
+                caller (daemon); its state then lives in memory only
+            state_snapshot: A snapshot file this monitor alone reads and
+                writes (single-target runs), under the run lock
+            snapshot_key: The target's key in state_snapshot (config id)
+            interval: The target's configured check interval, used by
+                watch() when it isn't given one
+            subscriptions: Subscriber index shared by the monitors of a
+                process (default: one of our own, from SUBSCRIPTIONS_FILE)
+        """
         self.url = url
         self.target_name = target_name
-        self.state_manager = StateManager()
-        self.discord_webhook_url = os.environ.get('DISCORD_WEBHOOK_URL')
-        self.check_logger = CheckLogger()
+        self.interval = interval
+        self.target_id = normalize_listing_id(target_name)
+        self.state_file = state_file
+        self.snapshot_file = snapshot_file
+        self.state_snapshot = state_snapshot
+        self.snapshot_key = snapshot_key or self.target_id
+        if state_snapshot:
+            restored = self._restore_snapshot()
+        else:
+            # Shared between monitors in daemon mode, so one history file has one writer
+            self.check_logger = check_logger or CheckLogger(HISTORY_FILE, ROLLUP_FILE)
+        # Only a logger of our own can have been written by another run since we read it
+        self.owns_check_logger = check_logger is None
+        
+        # Egress proxies (PROXY_URLS); an empty pool connects directly.
+        # A pool of our own keeps its health in our state file
+        self.owns_proxy_pool = proxy_pool is None
+        self.proxy_pool = proxy_pool if proxy_pool is not None else ProxyPool.from_env()
+        self._load_state(restored)
+        
+        self.discord_webhook_url = discord_webhook_url or os.environ.get('DISCORD_WEBHOOK_URL')
+        self.notifier = Notifier.from_env(self.discord_webhook_url)
+        # Shared in daemon mode, so the subscriptions file is loaded and indexed once
+        self.subscriptions = subscriptions or SubscriptionStore.from_env()
+        # Every listing found on the page by the last scrape, keyed by listing id
+        self.last_snapshot: Dict[str, Dict] = {}
+        self.snapshot_partial = False
+        
+        # HAR recording / offline replay of the page traffic
+        self.har = har
+        replaying = har is not None and har.replaying
+        # A replayed page is served from the HAR, so there is nothing to wait for
+        self.cookie_timeout_ms = 500 if replaying else 3000
+        self.settle_seconds = 0 if replaying else 3
+        
+        # Proxy behind the long-lived watch mode context
+        self.context_proxy: Optional[Proxy] = None
+        
+        # Overlapping runs (e.g. a slow scheduled run) wait for or skip the current check
+        self.run_lock = RunLock(
+            f"{state_file}.lock",
+            mode=lock_mode or os.environ.get('RUN_LOCK_MODE', WAIT),
+            timeout=float(os.environ.get('RUN_LOCK_TIMEOUT', 600))
+        )
+        
+        # Try a streamed plain HTTP fetch before launching a browser (HTTP_FAST_PATH=1)
+        if http_fast_path is None:
+            http_fast_path = os.environ.get('HTTP_FAST_PATH') == '1'
+        self.http_fast_path = http_fast_path
+        
+        # Coalesces loads of the same page; shared between monitors in daemon mode
+        self.page_flight = page_flight or SingleFlight()
+        self.page_key = normalize_url(url)
+        # Which monitor alerts on and logs each listing of a shared page
+        self.page_targets = page_targets or PageTargets()
+        self.page_targets.register(self.page_key, self)
         
+        # Browser engine, viewport and launch flags (see --calibrate)
+        self.browser_profile = browser_profile or load_profile()
+        
+        # Recent checks' timings and network summary, saved only when a check fails
+        self.diagnostics = diagnostics or DiagnosticsRecorder.from_env()
+        self.check_diagnostics: Optional[CheckDiagnostics] = None
+        
+        # Time budget per check (CHECK_DEADLINE), with CHECK_DEADLINE_RESERVE seconds
+        # of it kept back from the scrape for persisting and notifying
+        self.max_check_budget = float(os.environ.get('CHECK_DEADLINE', 120))
+        self.check_budget = self.max_check_budget
+        self.deadline_reserve = float(os.environ.get('CHECK_DEADLINE_RESERVE', 15))
+        # The running check's deadline; outside a check nothing is bounded by it
+        self.deadline = Deadline()
+        
+        # Long-lived page used by watch mode instead of a browser per check
+        self.page_watcher: Optional[PageWatcher] = None
+        # The daemon's SharedPage when that page is shared with other targets
+        self.shared_page = None
+        # Snapshot of the last completed check, the baseline for checks that don't persist
+        self.checked_snapshot: Optional[Dict[str, Dict]] = None
+    
+    def _load_state(self, restored: Optional[Dict] = None):
+        """
+        (Re)build everything that is persisted between runs, from the state
+        files or from a restored snapshot entry
+        """
+        # A target restored from a state snapshot keeps its state in memory, not in the files
+        self.state_manager = StateManager(self.state_file, initial=(restored['state'] or {}) if restored else None)
+        self.circuit_breaker = CircuitBreaker(state=self.state_manager.get_section('circuit'))
+        self.hedge_policy = HedgePolicy(state=self.state_manager.get_section('hedging'))
+        self.alert_machine = AlertStateMachine(
+            state=self.state_manager.get_section('alerts'),
+            sold_out_confirmations=int(os.environ.get('SOLD_OUT_CONFIRMATIONS', 2)),
+            realert_interval=float(os.environ.get('REALERT_MINUTES', 30)) * 60
+        )
+        self.snapshot_store = SnapshotStore(self.snapshot_file, initial=restored['listings'] if restored else None)
+        if self.owns_proxy_pool:
+            self.proxy_pool.load_state(self.state_manager.get_section('proxies'))
+    
+    def _restore_snapshot(self) -> Dict:
+        """Read our state snapshot (migrating the state files into it the first time)"""
+        self.state_snapshot.restore({self.snapshot_key: (self.state_file, self.snapshot_file)}, HISTORY_FILE, ROLLUP_FILE)
+        self.check_logger = self.state_snapshot.check_logger(HISTORY_FILE, ROLLUP_FILE)
+        return self.state_snapshot.target(self.snapshot_key)
+    
+    def reload_state(self):
+        """
+        Re-read all persisted state once the run lock is held
+        
+        The monitor read its state when it was built, before the lock was
+        taken, and another run may have written it since; writing the old
+        copy back would lose that run's updates. State restored from a
+        snapshot the caller keeps (daemon) only lives in memory and stays,
+        and so does a check logger shared by the caller's monitors: that
+        process is the history's only writer, and its checks already take
+        turns at it.
+        """
+        if self.state_snapshot:
+            self._load_state(self._restore_snapshot())
+        elif not self.state_manager.in_memory:
+            self._load_state()
+            if self.owns_check_logger and not self.check_logger.in_memory:
+                self.check_logger.reload()
+    
+    def save_snapshot(self):
+        """Write our state snapshot (single-target runs, before the run lock is released)"""
+        try:
+            self.state_snapshot.save({self.snapshot_key: self}, self.check_logger)
+        except OSError as e:
+            logger.error(f"Error writing state snapshot: {e}")
+    
+    @classmethod
+    def for_target(cls, target: Dict, state_dir: str = "data/state", **options) -> 'ParkingMonitor':
+        """
+        Monitor for one target from the config file, with its own state files
+        in state_dir; options are passed on (shared logger, proxy pool, ...)
+        """
+        return cls(
+            url=target['url'],
+            target_name=target['name'],
+            state_file=os.path.join(state_dir, f"{target['id']}.json"),
+            snapshot_file=os.path.join(state_dir, f"{target['id']}.snapshot.json"),
+            discord_webhook_url=target.get('discord_webhook_url'),
+            interval=target.get('interval'),
+            **options
+        )
+    
+    def watch(self, interval: Optional[float] = None, **options):
+        """
+        Check this target every `interval` seconds (default: its configured
+        interval, or 60), yielding events
+        
+        See src.watch.watch for the options.
+        """
+        from src.watch import watch
+        return watch([self], interval=interval, **options)
+    
+    def set_webhook(self, discord_webhook_url: Optional[str]):
+        """
+        Swap the Discord webhook; alerts already being sent keep the old channels
+        """
+        self.discord_webhook_url = discord_webhook_url or os.environ.get('DISCORD_WEBHOOK_URL')
+        self.notifier = Notifier.from_env(self.discord_webhook_url)
+    
+    def fit_deadline(self, interval: float):
+        """Keep a check from outliving its polling interval (within MIN_CHECK_BUDGET..CHECK_DEADLINE)"""
+        self.check_budget = min(self.max_check_budget, max(interval, MIN_CHECK_BUDGET))
+    
+    @staticmethod
+    async def launch_browser(playwright, per_context_proxy: bool = False, profile: Optional[LaunchProfile] = None):
+        """
+        Launch browser with realistic settings
+        
+        Args:
+            per_context_proxy: Contexts set their own proxy; Chromium needs a
+                placeholder browser-wide proxy for that on some platforms
+            profile: Launch profile (default: the standard Chromium one)
+        """
+        profile = profile or PROFILES['chromium']
+        return await profile.launch(playwright, per_context_proxy=per_context_proxy)
+    
+    async def _new_context(self, browser, proxy: Optional[Proxy] = None, profile: Optional[LaunchProfile] = None):
+        """
+        Create a browser context, with HAR recording/replay if enabled
+        """
+        options = (profile or self.browser_profile).context_options()
+        if self.har:
+            options.update(self.har.context_options())
+        if proxy:
+            options['proxy'] = proxy.playwright_proxy()
+        context = await browser.new_context(**options)
+        if self.har:
+            await self.har.attach(context)
+        return context
+    
     async def scrape_parking_status(self) -> Tuple[bool, Optional[Dict]]:
         """
         Scrape the parking page and extract availability status
+        
+        The check's diagnostics go into the recorder's ring buffer, and are
+        saved to disk if it failed or the status is unknown.
         Returns: (success, parking_data)
         """
+        diagnostics = self.check_diagnostics = self.diagnostics.begin(self.target_name, self.url)
+        if self.page_watcher:
+            success, parking_data = await self._scrape_with_watcher()
+        else:
+            success, parking_data = await self._scrape_page()
+        
+        if not success:
+            self.diagnostics.finish(diagnostics, 'failed', failure=True)
+        elif parking_data['status'] == 'unknown':
+            self.diagnostics.finish(diagnostics, 'unknown_status', failure=True)
+        else:
+            self.diagnostics.finish(diagnostics, parking_data['status'])
+        return success, parking_data
+    
+    def _needs_diagnostics(self, result: Optional[Tuple[Dict[str, Dict], bool]]) -> bool:
+        """Whether a page load is about to be reported as a failed or unknown check"""
+        listing = result[0].get(self.target_id) if result else None
+        return listing is None or listing['status'] == 'unknown'
+    
+    async def _scrape_page(self) -> Tuple[bool, Optional[Dict]]:
+        """
+        Load the page (or share another monitor's load) and pick out the target
+        """
+        # Monitors sharing the reserve page share one load of it
+        result, shared = await self.page_flight.do(self.page_key, self._load_snapshot)
+        if shared and result and self.target_id not in result[0]:
+            # Someone else's load didn't find us; our own load also runs the fallbacks
+            logger.info("Shared snapshot has no listing for this target, loading the page again")
+            self.check_diagnostics.mark('shared_load_missing_target')
+            result = await self._load_snapshot()
+        elif shared:
+            self.check_diagnostics.mark('shared_load')
+        
+        if result is None:
+            return False, None
+        
+        snapshot, partial = result
+        listing = snapshot.get(self.target_id)
+        if not listing:
+            logger.warning("Could not find target parking listing")
+            return False, None
+        
+        parking_data = self._listing_to_parking_data(listing)
+        # The snapshot may be shared with other monitors, so keep our own copy
+        self.last_snapshot = dict(snapshot)
+        self.snapshot_partial = partial
+        logger.info(f"Successfully scraped data: {parking_data}")
+        return True, parking_data
+    
+    async def _load_snapshot(self) -> Optional[Tuple[Dict[str, Dict], bool]]:
+        """
+        Load the page over plain HTTP if enabled, otherwise (or if that
+        doesn't find the target) in a browser
+        
+        Returns: (snapshot, snapshot_partial), or None if the load failed
+        """
+        if self.http_fast_path and not (self.har and self.har.replaying):
+            result = await self._load_snapshot_http()
+            if result:
+                return result
+            logger.info("HTTP fast path didn't find the target, falling back to the browser")
+        return await self._load_snapshot_browser()
+    
+    async def _load_snapshot_http(self) -> Optional[Tuple[Dict[str, Dict], bool]]:
+        """
+        Stream the page over HTTP, stopping once every target on the page is found
+        
+        The load may be shared with the other monitors of the page, so it
+        reads on until all of their listings have been seen, not just ours.
+        
+        Returns: (snapshot, snapshot_partial), or None if the target isn't in the HTML
+        """
+        watched = self.page_targets.target_ids(self.page_key) | {self.target_id}
+        lease = await self.proxy_pool.lease()
+        try:
+            with self.deadline.step('http'):
+                snapshot, complete, stats = await fetch_listings(
+                    self.url, watched,
+                    proxy=lease.proxy.url if lease.proxy else None,
+                    timeout=min(15, self.deadline.remaining())
+                )
+            # A block or error page through this proxy parses to nothing
+            if not snapshot:
+                lease.failure("no listings in response")
+        except Exception as e:
+            logger.warning(f"HTTP fetch failed: {e}")
+            self.check_diagnostics.note('http_error', str(e))
+            lease.failure(str(e))
+            return None
+        finally:
+            lease.release()
+        
+        self.check_diagnostics.mark('http_fetched', **stats)
+        if self.target_id not in snapshot:
+            return None
+        # Stopping early means listings after the target were never seen
+        return snapshot, not complete
+    
+    async def _load_snapshot_browser(self) -> Optional[Tuple[Dict[str, Dict], bool]]:
+        """
+        Launch a browser and load the page, hedging if it's slow
+        
+        Returns: (snapshot, snapshot_partial), or None if the load failed
+        """
+        diagnostics = self.check_diagnostics
         async with async_playwright() as p:
             browser = None
+            context = None
+            result = None
+            # Replays never leave the machine, so they don't need a proxy
+            lease = await (ProxyPool() if self.har and self.har.replaying else self.proxy_pool).lease()
             try:
-                # Launch browser with realistic settings
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--disable-blink-features=AutomationControlled']
-                )
-                
-                context = await browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                )
-                
-                page = await context.new_page()
-                
-                # Navigate to page
-                logger.info(f"Navigating to {self.url}")
-                await page.goto(self.url, wait_until='networkidle', timeout=30000)
-                
-                # Handle cookie consent if present
-                try:
-                    # Try to click "Use necessary cookies only" or "Allow all cookies"
-                    cookie_button = await page.wait_for_selector(
-                        'button:has-text("Use necessary cookies only"), button:has-text("Allow all cookies")', 
-                        timeout=3000
+                with self.deadline.step('launch'):
+                    browser = await self.launch_browser(
+                        p, per_context_proxy=lease.proxy is not None, profile=self.browser_profile
                     )
-                    if cookie_button:
-                        await cookie_button.click()
-                        logger.info("Handled cookie consent")
-                        await asyncio.sleep(1)
-                except:
-                    # Cookie banner might not appear or already accepted
-                    pass
-                
-                # Wait for content to load
-                await page.wait_for_load_state('domcontentloaded')
-                await asyncio.sleep(3)  # Additional wait for dynamic content
+                    context = await self._new_context(browser, proxy=lease.proxy)
+                diagnostics.watch_network(context)
+                await self.diagnostics.start_trace(context, diagnostics)
+                diagnostics.mark('browser_ready')
                 
-                # Extract parking data using the simple structure we found
-                parking_data = await self._extract_parking_data(page)
+                # Load the page, hedging with a second page if it's slow
+                result = await run_hedged(lambda attempt: self._fetch_page(context, attempt), self.hedge_policy)
                 
-                if parking_data:
-                    logger.info(f"Successfully scraped data: {parking_data}")
-                    return True, parking_data
-                else:
-                    logger.warning("Could not find target parking listing")
-                    return False, None
+                if result is None:
+                    logger.warning("Could not find any listings on page")
+                    lease.failure("no listings on page")
+                return result
                     
             except PlaywrightTimeout as e:
                 logger.error(f"Timeout error while scraping: {e}")
-                return False, None
+                lease.failure(f"timeout: {e}")
+                diagnostics.note('error', f"timeout: {e}")
+                return None
             except Exception as e:
                 logger.error(f"Unexpected error while scraping: {e}")
-                return False, None
+                lease.failure(str(e))
+                diagnostics.note('error', str(e))
+                return None
             finally:
+                lease.release()
+                # The HAR is only written out when its context closes
+                if context:
+                    await self.diagnostics.stop_trace(context, diagnostics, keep=self._needs_diagnostics(result))
+                    await context.close()
                 if browser:
                     await browser.close()
     
+    async def _scrape_with_watcher(self) -> Tuple[bool, Optional[Dict]]:
+        """
+        Refresh the listings on the already open page (watch mode)
+        """
+        watcher = self.page_watcher
+        # A target that moved to a page of its own after a failure doesn't share its loads
+        key = self.page_key
+        if self.shared_page is not None and watcher is not self.shared_page.watcher:
+            key = f"{self.page_key}#{self.target_id}"
+        try:
+            # Targets on the same page share the watcher and each refresh
+            with self.deadline.step('refresh'):
+                snapshot, shared = await self.page_flight.do(
+                    key, lambda: self._through_context_proxy(watcher.refresh)
+                )
+            listing = snapshot.get(self.target_id)
+            
+            if not listing and watcher.data_request:
+                # The data response didn't include our target, check the DOM
+                snapshot, shared = await self.page_flight.do(
+                    f"reload:{key}", lambda: self._through_context_proxy(watcher.reload)
+                )
+                listing = snapshot.get(self.target_id)
+            
+            snapshot = dict(snapshot)
+            partial = not snapshot
+            self.check_diagnostics.mark('refreshed', shared=shared, listings=len(snapshot))
+            if not listing:
+                with self.deadline.step('extract'):
+                    parking_data = await self._extract_parking_data(watcher.page)
+                if not parking_data:
+                    logger.warning("Could not find target parking listing")
+                    await self.check_diagnostics.capture_page(watcher.page)
+                    return False, None
+                snapshot[self.target_id] = make_listing(
+                    self.target_name, parking_data['status'], parking_data['price']
+                )
+            else:
+                parking_data = self._listing_to_parking_data(listing)
+            if parking_data['status'] == 'unknown':
+                await self.check_diagnostics.capture_page(watcher.page)
+            
+            self.last_snapshot = snapshot
+            self.snapshot_partial = partial
+            logger.info(f"Successfully refreshed data: {parking_data}")
+            return True, parking_data
+        
+        except Exception as e:
+            logger.error(f"Error refreshing watched page: {e}")
+            self.check_diagnostics.note('error', str(e))
+            if watcher.page:
+                await self.check_diagnostics.capture_page(watcher.page)
+            if self.shared_page is not None and self.shared_page.shared_by_others(self):
+                # Other targets are still on the page; start over on a page of our own
+                self.page_watcher = self.shared_page.own_watcher(self)
+            else:
+                # Start over with a fresh page on the next check
+                await watcher.close()
+            return False, None
+    
+    async def _through_context_proxy(self, load: Callable[[], Awaitable[Dict[str, Dict]]]) -> Dict[str, Dict]:
+        """
+        Run a load of the watched page under a lease on its context's proxy
+        
+        The lease holds one of the proxy's concurrency slots and records the
+        outcome; a page with no listings on it (a block page) is a failure.
+        """
+        if self.context_proxy is None:
+            return await load()
+        async with await self.proxy_pool.lease(self.context_proxy) as lease:
+            snapshot = await load()
+            if not snapshot:
+                lease.failure("no listings on page")
+            return snapshot
+    
+    async def _prepare_page(self, page):
+        """
+        Dismiss the cookie banner and let dynamic content render
+        """
+        # Handle cookie consent if present
+        try:
+            # Try to click "Use necessary cookies only" or "Allow all cookies"
+            cookie_button = await page.wait_for_selector(
+                'button:has-text("Use necessary cookies only"), button:has-text("Allow all cookies")', 
+                timeout=self.deadline.timeout_ms(self.cookie_timeout_ms)
+            )
+            if cookie_button:
+                await cookie_button.click()
+                logger.info("Handled cookie consent")
+                await self.deadline.sleep(1)
+        except Exception:
+            # Cookie banner might not appear or already accepted (a cancelled check must still stop here)
+            pass
+        
+        # Wait for content to load
+        await page.wait_for_load_state('domcontentloaded', timeout=self.deadline.timeout_ms(30000))
+        await self.deadline.sleep(self.settle_seconds)  # Additional wait for dynamic content
+    
+    async def _fetch_page(self, context, attempt: int = 0) -> Optional[Tuple[Dict[str, Dict], bool]]:
+        """
+        Load the page in a new tab and extract the listings
+        
+        The hedged attempt (attempt 1) only waits for DOMContentLoaded, since
+        a slow primary is usually stuck waiting for the network to go idle.
+        
+        Returns: (snapshot, snapshot_partial), or None if nothing was found
+        """
+        diagnostics = self.check_diagnostics
+        page = await context.new_page()
+        try:
+            # Navigate to page
+            wait_until = 'networkidle' if attempt == 0 else 'domcontentloaded'
+            logger.info(f"Navigating to {self.url} (attempt {attempt}, waiting for {wait_until})")
+            with self.deadline.step('navigate'):
+                await page.goto(self.url, wait_until=wait_until, timeout=self.deadline.timeout_ms(30000))
+            diagnostics.mark('loaded', attempt=attempt)
+            with self.deadline.step('prepare'):
+                await self._prepare_page(page)
+            diagnostics.mark('prepared', attempt=attempt)
+            
+            # Snapshot every listing on the page, then pick out our target
+            with self.deadline.step('extract'):
+                snapshot = await self._extract_snapshot(page)
+            partial = not snapshot
+            diagnostics.mark('extracted', attempt=attempt, listings=len(snapshot))
+            
+            if self.target_id not in snapshot:
+                # Fall back to the targeted extraction methods
+                with self.deadline.step('extract'):
+                    parking_data = await self._extract_parking_data(page)
+                if parking_data:
+                    snapshot[self.target_id] = make_listing(
+                        self.target_name, parking_data['status'], parking_data['price']
+                    )
+                diagnostics.mark('fallback_extraction', attempt=attempt, found=bool(parking_data))
+            
+            result = (snapshot, partial) if snapshot else None
+            if self._needs_diagnostics(result):
+                # Grab the evidence while the page is still open
+                await diagnostics.capture_page(page)
+            return result
+        finally:
+            await page.close()
+    
+    async def _extract_snapshot(self, page) -> Dict[str, Dict]:
+        """
+        Extract every listing on the page into a snapshot keyed by listing id
+        """
+        try:
+            container_texts = await page.evaluate(LISTING_CONTAINERS_JS)
+            snapshot = listings_from_containers(container_texts)
+            if not snapshot:
+                # Fall back to parsing the page text line by line
+                snapshot = extract_listings(await page.inner_text('body'))
+            logger.info(f"Found {len(snapshot)} listings on page")
+            return snapshot
+        except Exception as e:
+            logger.error(f"Error extracting listing snapshot: {e}")
+            return {}
+    
+    def _listing_to_parking_data(self, listing: Dict) -> Dict:
+        """
+        Convert a snapshot entry to the parking data dict used for state
+        """
+        return {
+            'name': listing['name'],
+            'status': listing['status'],
+            'price': listing['price'],
+            'url': self.url,
+            'timestamp': datetime.now().isoformat(),
+            'has_button': listing['status'] == "available"
+        }
+    
     async def _extract_parking_data(self, page) -> Optional[Dict]:
         """
         Extract parking data from the page using the actual structure
@@ -113,7 +636,7 @@ class ParkingMonitor:
             page_content = await page.content()
             
             # Check if our target parking is on the page
-            if "Samuel Merritt University Fall 2025 Parking" not in page_content:
+            if self.target_name not in page_content:
                 logger.warning("Target parking not found on page")
                 return None
             
@@ -123,7 +646,7 @@ class ParkingMonitor:
             # Try to find the element containing our parking name
             try:
                 # Look for element with the exact text
-                parking_element = await page.locator('text="Samuel Merritt University Fall 2025 Parking"').first
+                parking_element = await page.locator(f'text="{self.target_name}"').first
                 
                 if parking_element:
                     # Get the parent container that likely has all info
@@ -132,16 +655,16 @@ class ParkingMonitor:
                     # Try to go up to find the container with price and status
                     for _ in range(5):  # Go up max 5 levels
                         parent_element = await parent.locator('..').first
-                        parent_text = await parent_element.inner_text()
+                        parent_text = await parent_element.inner_text(timeout=self.deadline.timeout_ms(5000))
                         
                         # Check if this parent has both price and status info
-                        if "$67.45" in parent_text or "Sold Out" in parent_text or "sold out" in parent_text.lower():
+                        if "$" in parent_text or "sold out" in parent_text.lower():
                             parent = parent_element
                             break
                         parent = parent_element
                     
                     # Get the full text of the container
-                    container_text = await parent.inner_text()
+                    container_text = await parent.inner_text(timeout=self.deadline.timeout_ms(5000))
                     logger.info(f"Found container text: {container_text[:200]}")
                     
                     # Extract information
@@ -159,7 +682,7 @@ class ParkingMonitor:
             clean_text = re.sub(r'\s+', ' ', clean_text)
             
             # Look for our parking in the text
-            pattern = r'Samuel Merritt University Fall 2025 Parking.*?\$67\.45.*?(Sold Out|Available|Add to Cart)'
+            pattern = re.escape(self.target_name) + r'.*?(\$[\d,]+\.?\d*).*?(Sold Out|Available|Add to Cart)'
             match = re.search(pattern, clean_text, re.IGNORECASE | re.DOTALL)
             
             if match:
@@ -167,26 +690,21 @@ class ParkingMonitor:
                 logger.info(f"Found via regex: {matched_text}")
                 
                 # Determine status
-                if "sold out" in matched_text.lower():
-                    status = "sold_out"
-                elif "available" in matched_text.lower() or "add to cart" in matched_text.lower():
-                    status = "available"
-                else:
-                    status = "unknown"
+                status = parse_status(matched_text)
                 
                 return {
                     'name': self.target_name,
                     'status': status,
-                    'price': '$67.45',
+                    'price': match.group(1),
                     'url': self.url,
                     'timestamp': datetime.now().isoformat(),
                     'has_button': status == "available"
                 }
             
             # Method 3: Just check if "Sold Out" appears near our text
-            if "Samuel Merritt University Fall 2025 Parking" in page_content:
+            if self.target_name in page_content:
                 # Find the position of our text
-                pos = page_content.find("Samuel Merritt University Fall 2025 Parking")
+                pos = page_content.find(self.target_name)
                 # Check nearby text (within 500 characters)
                 nearby_text = page_content[pos:pos+500].lower()
                 
@@ -200,10 +718,12 @@ class ParkingMonitor:
                 
                 logger.info(f"Found parking with status: {status}")
                 
+                price_match = re.search(r'\$[\d,]+\.?\d*', page_content[pos:pos+500])
+                
                 return {
                     'name': self.target_name,
                     'status': status,
-                    'price': '$67.45',
+                    'price': price_match.group(0) if price_match else 'N/A',
                     'url': self.url,
                     'timestamp': datetime.now().isoformat(),
                     'has_button': status == "available"
@@ -221,16 +741,11 @@ class ParkingMonitor:
         """
         try:
             # Check status
-            if "sold out" in text.lower():
-                status = "sold_out"
-            elif "available" in text.lower() or "add to cart" in text.lower():
-                status = "available"
-            else:
-                status = "unknown"
+            status = parse_status(text)
             
             # Extract price
             price_match = re.search(r'\$[\d,]+\.?\d*', text)
-            price = price_match.group(0) if price_match else "$67.45"
+            price = price_match.group(0) if price_match else "N/A"
             
             return {
                 'name': self.target_name,
@@ -244,128 +759,554 @@ class ParkingMonitor:
             logger.error(f"Error parsing parking info: {e}")
             return None
     
-    async def check_and_notify(self):
+    async def check_and_notify(self) -> Optional[Dict]:
         """
         Main function to check parking status and send notifications if changed
+        
+        Returns: result summary of this check, or of the concurrent check
+        that was reused (None if skipped)
+        """
+        return await self.run_check()
+    
+    async def run_check(self, persist: bool = True, notify: bool = True, summary: bool = True) -> Optional[Dict]:
+        """
+        One check, with the side effects chosen by the caller
+        
+        A persisting check runs under the run lock and re-reads the state
+        once it holds it, so overlapping runs never read and write the state
+        files at the same time. Without persist the
+        previous snapshot and alert state are kept in memory between checks.
+        
+        Args:
+            persist: Save state, snapshot, alert state and check history
+            notify: Send alerts to the notification channels and subscribers
+            summary: Print the check summary
+        
+        The check runs against one Deadline (check_budget seconds): every
+        phase gets what the earlier ones left, and a scrape that overruns is
+        cancelled and counted as a failed check. The result's 'deadline'
+        has the time spent per phase and the phase that ran out of time.
+        
+        Returns: result summary of this check (with its 'transitions'), or of
+        the concurrent check that was reused (None if skipped)
         """
+        if not persist:
+            return await self._run_check(persist, notify, summary)
+        
+        blocked = await self.run_lock.acquire()
+        if blocked:
+            return blocked.get('result')
+        
+        result = None
+        try:
+            self.reload_state()
+            result = await self._run_check(persist, notify, summary)
+            return result
+        finally:
+            if self.state_snapshot:
+                self.save_snapshot()
+            self.run_lock.release(result)
+    
+    async def _run_check(self, persist: bool, notify: bool, summary: bool) -> Dict:
+        deadline = self.deadline = Deadline(self.check_budget)
+        try:
+            result = await self._check(persist, notify, summary)
+        finally:
+            self.deadline = Deadline()
+        if not result.get('skipped'):
+            result['deadline'] = deadline.to_dict()
+            if deadline.exceeded_in:
+                logger.warning(f"⏱️ Check overran its {deadline.budget:.0f}s deadline in {deadline.exceeded_in}")
+        return result
+    
+    async def _check(self, persist: bool, notify: bool, summary: bool) -> Dict:
         logger.info(f"Starting parking monitor check at {datetime.now()}")
         
-        # Get current status
-        success, current_data = await self.scrape_parking_status()
+        # Don't launch a browser while the site keeps failing for this target
+        if not self.circuit_breaker.allow_request():
+            logger.warning(f"Circuit open, skipping check until {self.circuit_breaker.retry_at}")
+            return {'success': False, 'target': self.target_name, 'skipped': 'circuit_open', 'retry_at': self.circuit_breaker.retry_at}
+        
+        # Get current status, leaving the reserve for persisting and notifying
+        try:
+            success, current_data = await self.deadline.run(
+                'scrape', self.scrape_parking_status(), reserve=self.deadline_reserve
+            )
+        except DeadlineExceeded as e:
+            logger.error(f"⏱️ Scrape cancelled: {e}")
+            self.check_diagnostics.note('deadline', self.deadline.to_dict())
+            self.diagnostics.finish(self.check_diagnostics, 'deadline_exceeded', failure=True)
+            success, current_data = False, None
+        
+        # The page load's hedging window and proxy health are state too; a
+        # HAR replay never gets here, so its latencies never replace live ones
+        if persist:
+            self.state_manager.save_section('hedging', self.hedge_policy.to_dict())
+            if self.proxy_pool:
+                self.state_manager.save_section('proxies', self.proxy_pool.to_dict())
         
         if not success or not current_data:
             logger.error("Failed to scrape parking status")
-            # Send error notification if this persists
-            error_count = self.state_manager.increment_error_count()
-            if error_count >= 3:  # Alert after 3 consecutive failures
-                await send_discord_notification(
-                    webhook_url=self.discord_webhook_url,
-                    title="⚠️ Monitoring Error",
-                    description="Failed to check parking status",
-                    color=0xFF0000,
-                    fields=[
-                        {"name": "Error Count", "value": str(error_count), "inline": True},
-                        {"name": "Target", "value": self.target_name, "inline": False}
-                    ]
-                )
-            return
+            if persist:
+                error_count = self.state_manager.increment_error_count()
+            else:
+                error_count = self.circuit_breaker.state['failures'] + 1
+            incident_started = self.circuit_breaker.state['incident_started'] or datetime.now().isoformat()
+            
+            # Alert once per incident, when the circuit first opens
+            if self.circuit_breaker.record_failure() == 'degraded' and notify:
+                with self.deadline.step('notify'):
+                    await self.notifier.dispatch({
+                        "title": "⚠️ Monitoring Degraded",
+                        "description": "Failed to check parking status, backing off",
+                        "color": 0xFF0000,
+                        "fields": [
+                            {"name": "Error Count", "value": str(error_count), "inline": True},
+                            {"name": "Failing Since", "value": incident_started[:19], "inline": True},
+                            {"name": "Next Attempt", "value": self.circuit_breaker.retry_at[:19], "inline": True},
+                            {"name": "Target", "value": self.target_name, "inline": False}
+                        ]
+                    }, deadline=self.deadline)
+            if persist:
+                self.state_manager.save_section('circuit', self.circuit_breaker.to_dict())
+            return {'success': False, 'target': self.target_name, 'error_count': error_count}
         
         # Reset error count on successful scrape
-        self.state_manager.reset_error_count()
+        if persist:
+            self.state_manager.reset_error_count()
+        incident_started = self.circuit_breaker.state['incident_started']
+        if self.circuit_breaker.record_success() == 'recovered' and notify:
+            with self.deadline.step('notify'):
+                await self.notifier.dispatch({
+                    "title": "✅ Monitoring Recovered",
+                    "description": "Parking status checks are succeeding again",
+                    "color": 0x0099FF,
+                    "fields": [
+                        {"name": "Failing Since", "value": incident_started[:19], "inline": True},
+                        {"name": "Target", "value": self.target_name, "inline": False}
+                    ]
+                }, deadline=self.deadline)
+        if persist:
+            self.state_manager.save_section('circuit', self.circuit_breaker.to_dict())
         
         # Get previous state
         previous_state = self.state_manager.get_state()
         
-        # Check if status changed from sold_out to available
-        status_changed = False
+        # Diff the whole page against the previous snapshot
+        current_snapshot = self.last_snapshot or {self.target_id: make_listing(
+            current_data['name'], current_data['status'], current_data.get('price')
+        )}
+        if persist or self.checked_snapshot is None:
+            previous_snapshot = self.snapshot_store.load()
+        else:
+            previous_snapshot = self.checked_snapshot
+        
+        if previous_snapshot and self.snapshot_partial:
+            # Page parse failed and only the target was found by the fallbacks;
+            # keep the other listings so they aren't reported removed/added
+            current_snapshot = dict(previous_snapshot, **current_snapshot)
         
-        status_changed = False
-        if previous_state:
-            prev_status = previous_state.get('status')
-            curr_status = current_data['status']
-            
-            logger.info(f"Previous status: {prev_status}, Current status: {curr_status}")
-            
-            # Notify if: was sold_out AND now is anything except sold_out
-            if prev_status == 'sold_out' and curr_status != 'sold_out':
-                status_changed = True
-                logger.info(f"🎉 PARKING STATUS CHANGED! Now: {curr_status}")
-            
-            # Also notify if status is anything except sold_out (catches edge cases)
-            elif curr_status != 'sold_out' and curr_status != 'unknown':
-                status_changed = True
-                logger.info(f"🎉 PARKING MAY BE AVAILABLE! Status: {curr_status}")
-    
+        if previous_snapshot is None:
+            # First run with snapshots: only the single-target state is known,
+            # so don't report every listing on the page as new
+            logger.info("First run - initializing listing snapshot")
+            previous_snapshot = dict(current_snapshot)
+            if previous_state and self.target_id in current_snapshot:
+                previous_snapshot[self.target_id] = dict(
+                    current_snapshot[self.target_id],
+                    status=previous_state.get('status', 'unknown'),
+                    price=previous_state.get('price', 'N/A')
+                )
         
-        else:
-            # First run
-            logger.info("First run - initializing state")
+        diff = diff_snapshots(previous_snapshot, current_snapshot)
+        logger.info(f"Snapshot diff: {diff.summary()}")
         
         # Update state
-        self.state_manager.save_state(current_data)
-        
-        # Send notification if status changed to available
-        if status_changed:
-            # Determine the message based on status
-            if current_data['status'] == 'available':
-                status_text = "✅ AVAILABLE"
-            elif current_data['status'] == 'unknown':
-                status_text = "❓ UNKNOWN (Check manually!)"
+        self.checked_snapshot = current_snapshot
+        if persist:
+            with self.deadline.step('persist'):
+                self.state_manager.save_state(current_data)
+                self.snapshot_store.save(current_snapshot, url=self.url)
+        
+        # Run every listing through the alert state machine
+        notified = set()
+        transitions: List[Dict] = []
+        alerts: List[Tuple[Dict, str, Optional[str]]] = []
+        deliveries: Dict[str, List[Dict]] = {}
+        added_ids = {listing['id'] for listing in diff.added}
+        now = datetime.now()
+        
+        # Other listings on the page are left to the monitors (or page owner) that handle them
+        handled = [
+            listing for listing in current_snapshot.values()
+            if self.page_targets.handles(self.page_key, self, listing['id'])
+        ]
+        for listing in handled:
+            previous = previous_snapshot.get(listing['id'])
+            decision = self.alert_machine.observe(
+                listing['id'], listing['status'], now,
+                previous_status=previous['status'] if previous else None
+            )
+            
+            if decision is None:
+                if listing['id'] not in added_ids:
+                    continue
+                # New listing that isn't available (yet)
+                logger.info(f"🆕 New listing: {listing['name']} ({listing['status']}, {listing['price']})")
+                kind, previous_status = 'new_listing', None
             else:
-                status_text = f"✅ {current_data['status'].upper()}"
+                logger.info(f"Alert decision for {listing['name']}: {decision['kind']} "
+                            f"({decision['previous_status']} -> {decision['status']})")
+                kind, previous_status = decision['kind'], decision['previous_status']
+                if kind == 'available':
+                    logger.info(f"🎉 PARKING STATUS CHANGED! {listing['name']} now: {listing['status']}")
+                elif kind == 'sold_out':
+                    logger.info(f"{listing['name']} confirmed sold out again")
             
-            await send_discord_notification(
-                webhook_url=self.discord_webhook_url,
-                title="🚗 PARKING ALERT!",
-                description=current_data['name'],
-                color=0x00FF00,
-                fields=[
-                    {"name": "Price", "value": current_data.get('price', 'N/A'), "inline": True},
-                    {"name": "Status", "value": status_text, "inline": True},
-                    {"name": "Previous Status", "value": "❌ Sold Out", "inline": True},
-                    {"name": "Action", "value": "⚡ CHECK NOW!", "inline": False},
-                ],
-                url=self.url,
-                timestamp=current_data['timestamp']
-            )
-            logger.info("Discord notification sent successfully!")
-        else:
+            transitions.append({
+                'kind': kind,
+                'listing_id': listing['id'],
+                'name': listing['name'],
+                'previous_status': previous_status,
+                'status': listing['status'],
+                'price': listing['price']
+            })
+            if kind in ALERT_TITLES and notify:
+                alerts.append((listing, kind, previous_status))
+        
+        # All alerts of the check go out at once, sharing what is left of the deadline
+        if alerts:
+            with self.deadline.step('notify'):
+                sent = await asyncio.gather(*(
+                    self._send_listing_alert(listing, ALERT_TITLES[kind], previous_status=previous_status, kind=kind)
+                    for listing, kind, previous_status in alerts
+                ))
+            for (listing, kind, previous_status), listing_deliveries in zip(alerts, sent):
+                deliveries[listing['id']] = listing_deliveries
+                if listing_deliveries and not any(delivery['ok'] for delivery in listing_deliveries):
+                    # Keep the alert state as it was, so the next check alerts again
+                    logger.warning(f"Alert for {listing['name']} not delivered, retrying next check")
+                    self.alert_machine.undelivered(listing['id'], kind)
+                    continue
+                notified.add(listing['id'])
+        
+        for old, new in diff.price_changed:
+            logger.info(f"Price change for {new['name']}: {old['price']} -> {new['price']}")
+        
+        for listing in diff.removed:
+            logger.info(f"Listing removed: {listing['name']}")
+            if self.page_targets.handles(self.page_key, self, listing['id']):
+                self.alert_machine.forget(listing['id'])
+        
+        if persist:
+            self.state_manager.save_section('alerts', self.alert_machine.to_dict())
+        
+        status_changed = self.target_id in notified
+        if not notified:
             logger.info(f"No status change. Current status: {current_data['status']}")
-
+        
+        # Record the check of every listing in the history and availability rollups
+        if persist:
+            with self.deadline.step('persist'):
+                for listing in handled:
+                    self.check_logger.log_check(
+                        status=listing['status'],
+                        price=listing['price'],
+                        notification_sent=listing['id'] in notified,
+                        target=listing['name'],
+                        deliveries=deliveries.get(listing['id'])
+                    )
+        
+        if summary:
+            self._print_summary(current_data, current_snapshot, diff, status_changed)
+        
+        return {
+            'success': True,
+            'target': self.target_name,
+            'status': current_data['status'],
+            'price': current_data.get('price'),
+            'listings': len(current_snapshot),
+            'transitions': transitions,
+            'notified': sorted(notified),
+            'checked_at': datetime.now().isoformat()
+        }
+    
+    def _print_summary(self, current_data: Dict, current_snapshot: Dict[str, Dict], diff, status_changed: bool):
         print("\n" + "="*50)
         print("PARKING CHECK SUMMARY")
         print("="*50)
         print(f"Time: {datetime.now()}")
         print(f"Status: {current_data['status']}")
         print(f"Price: {current_data.get('price', 'N/A')}")
+        print(f"Listings on page: {len(current_snapshot)} ({diff.summary()})")
         print(f"Notification Sent: {status_changed}")
         print(f"Webhook URL Set: {self.discord_webhook_url is not None}")
+        print(f"Notification channels: {', '.join(c.name for c in self.notifier.channels) or 'none'}")
+        print(f"Subscriptions: {self.subscriptions.count}")
+        hedging = self.hedge_policy.state
+        print(f"Hedging: fired {hedging['hedges_fired']}, won {hedging['hedges_won']} of {hedging['fetches']} fetches")
+        print(f"Check time: {time.monotonic() - self.deadline.started:.1f}s of {self.check_budget:.0f}s")
         
         # Show recent history (if you added the check_logger)
         if hasattr(self, 'check_logger'):
-            recent = self.check_logger.get_recent_checks(5)
+            recent = self.check_logger.get_recent_intervals(5, target=self.target_name)
             if recent:
-                print("\nLast 5 checks:")
-                for check in recent:
-                    print(f"  - {check['human_time']}: {check['status']} {'📨' if check['notification_sent'] else ''}")
+                print("\nLast 5 status intervals:")
+                for interval in recent:
+                    print(f"  - {interval['first_seen'][:16]} -> {interval['last_seen'][:16]}: "
+                          f"{interval['status']} x{interval['check_count']} {'📨' if interval['notified'] else ''}")
         
         print("="*50 + "\n")
+    
+    async def run_watch_mode(self, interval: float = 5):
+        """
+        Keep one page open and check every `interval` seconds
+        
+        Listings are refreshed through the page's own data request instead
+        of a full navigation per check, so short intervals stay cheap.
+        """
+        loop = asyncio.get_running_loop()
+        async with async_playwright() as p:
+            browser = await self.launch_browser(
+                p, per_context_proxy=bool(self.proxy_pool), profile=self.browser_profile
+            )
+            context = await self._open_watch_context(browser)
+            logger.info(f"Watching {self.url} every {interval}s")
+            self.fit_deadline(interval)
+            
+            try:
+                while True:
+                    started = loop.time()
+                    await self.check_and_notify()
+                    logger.info(f"Watch stats: {self.page_watcher.stats}")
+                    if self.context_proxy and self.context_proxy.is_quarantined():
+                        # Move the page to another proxy, if there is a better one
+                        proxy = self.proxy_pool.pick()
+                        if proxy is not self.context_proxy:
+                            logger.info(f"Proxy {self.context_proxy.server} quarantined, reopening the page through {proxy.server}")
+                            await self._close_watch_context(context)
+                            context = await self._open_watch_context(browser)
+                    await asyncio.sleep(max(0, interval - (loop.time() - started)))
+            finally:
+                await self._close_watch_context(context)
+                await browser.close()
+    
+    async def _open_watch_context(self, browser):
+        """Open the watch mode context and page, through the best proxy"""
+        self.context_proxy = self.proxy_pool.pick()
+        self.proxy_pool.attach(self.context_proxy)
+        context = await self._new_context(browser, proxy=self.context_proxy)
+        self.page_watcher = PageWatcher(
+            context, self.url,
+            extract_snapshot=self._extract_snapshot,
+            prepare_page=self._prepare_page
+        )
+        return context
+    
+    async def _close_watch_context(self, context):
+        await self.page_watcher.close()
+        self.page_watcher = None
+        await context.close()
+        self.proxy_pool.detach(self.context_proxy)
+        self.context_proxy = None
+    
+    def _status_text(self, status: Optional[str]) -> str:
+        """
+        Human readable status for notifications
+        """
+        if status is None:
+            return "🆕 New listing"
+        if status == 'available':
+            return "✅ AVAILABLE"
+        if status == 'sold_out':
+            return "❌ Sold Out"
+        if status == 'unknown':
+            return "❓ UNKNOWN (Check manually!)"
+        return f"✅ {status.upper()}"
+    
+    async def _send_listing_alert(
+        self,
+        listing: Dict,
+        title: str,
+        previous_status: Optional[str],
+        kind: str = 'available'
+    ) -> List[Dict]:
+        """
+        Send an alert for a single listing to every notification channel
+        and to the subscribers whose filters match it
+        
+        Returns: per-channel delivery records
+        """
+        available = is_available(listing['status'])
+        subscriber_channels = self.subscriptions.channels_for(listing, kind)
+        if subscriber_channels:
+            logger.info(f"Routing {kind} alert for {listing['name']} to {len(subscriber_channels)} subscriber destinations")
+        deliveries = await self.notifier.dispatch({
+            "title": title,
+            "description": listing['name'],
+            "color": 0x00FF00 if available else 0x0099FF,
+            "fields": [
+                {"name": "Price", "value": listing.get('price', 'N/A'), "inline": True},
+                {"name": "Status", "value": self._status_text(listing['status']), "inline": True},
+                {"name": "Previous Status", "value": self._status_text(previous_status), "inline": True},
+                {"name": "Action", "value": "⚡ CHECK NOW!" if available else "👀 Keep an eye on it", "inline": False},
+            ],
+            "url": self.url,
+            "timestamp": datetime.now().isoformat()
+        }, extra_channels=subscriber_channels, deadline=self.deadline)
+        if any(delivery['ok'] for delivery in deliveries):
+            logger.info("Notification sent successfully!")
+        return deliveries
 
-async def main():
+async def replay(monitor: ParkingMonitor, repeat: int = 1):
+    """
+    Run only the scrape against a HAR recording and report timings
+    """
+    durations = []
+    for run in range(repeat):
+        start = time.perf_counter()
+        success, parking_data = await monitor.scrape_parking_status()
+        durations.append(time.perf_counter() - start)
+        logger.info(f"Replay {run + 1}/{repeat}: success={success} in {durations[-1]:.2f}s")
+    
+    print("\n" + "="*50)
+    print("REPLAY SUMMARY")
+    print("="*50)
+    print(f"Target: {monitor.target_name}")
+    print(f"Result: {parking_data}")
+    print(f"Listings on page: {len(monitor.last_snapshot)}")
+    for listing in monitor.last_snapshot.values():
+        print(f"  - {listing['name']}: {listing['status']} {listing['price']}")
+    print(f"Scrape time: min {min(durations):.2f}s, max {max(durations):.2f}s over {repeat} runs")
+    print("="*50 + "\n")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ACE Parking availability monitor")
+    parser.add_argument("--record", metavar="HAR", help="Record this run's network traffic to a HAR file")
+    parser.add_argument("--replay", metavar="HAR", help="Scrape a recorded HAR offline instead of the live site")
+    parser.add_argument("--replay-latency", type=int, default=0, metavar="MS",
+                        help="Artificial latency added to every replayed request")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of scrapes to run in replay mode")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep the page open and poll it until interrupted")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between checks in watch mode")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Monitor every target in the config file, reloading it when it changes")
+    parser.add_argument("--config", default=os.environ.get('MONITOR_CONFIG', DEFAULT_CONFIG_FILE),
+                        help="Config file with targets, intervals and webhooks")
+    parser.add_argument("--status-port", type=int, default=int(os.environ.get('STATUS_PORT', 0)) or None,
+                        help="Serve current status over HTTP on this port (daemon mode)")
+    parser.add_argument("--status-host", default=os.environ.get('STATUS_HOST', '127.0.0.1'),
+                        help="Address the status API listens on")
+    parser.add_argument("--state-snapshot", metavar="FILE", default=None,
+                        help="Keep all state in one compact snapshot file (default: STATE_SNAPSHOT_FILE if set)")
+    parser.add_argument("--lock-mode", choices=(SKIP, WAIT), default=None,
+                        help="When another check of the same target is running: skip, or wait and reuse its result")
+    parser.add_argument("--http", action="store_true",
+                        help="Try a streamed plain HTTP fetch before launching the browser")
+    parser.add_argument("--browser-profile", choices=list(PROFILES), default=None,
+                        help="Browser engine and launch flags (default: the calibrated profile)")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Time every browser profile against the page (or --replay fixture) and save the fastest")
+    parser.add_argument("--calibrate-runs", type=int, default=3, help="Cold runs per profile when calibrating")
+    parser.add_argument("--profile", type=int, default=0, metavar="N",
+                        help="Profile N checks and report event-loop lag (not a browser profile)")
+    parser.add_argument("--profiler", choices=("sampling", "cprofile"), default="sampling",
+                        help="Sampling profiler (collapsed stacks, speedscope) or cProfile (pstats)")
+    parser.add_argument("--profile-dir", default="data/profiles", help="Where profile output is written")
+    args = parser.parse_args(argv)
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return args
+
+async def main(argv=None):
     """Main entry point"""
+    args = parse_args(argv)
+    
+    if args.daemon:
+        # Imported here, the daemon module builds on ParkingMonitor
+        from src.daemon import MonitorDaemon
+        await MonitorDaemon(
+            args.config,
+            browser_profile=load_profile(args.browser_profile),
+            state_snapshot=StateSnapshot.from_env(args.state_snapshot),
+            status_port=args.status_port,
+            status_host=args.status_host
+        ).run()
+        return
+    
+    # Single-target modes use the first target in the config
+    config = load_config(args.config)
+    if not config['targets']:
+        logger.error(f"No valid targets in {args.config}: every target needs a name and a url")
+        sys.exit(1)
+    target = next(iter(config['targets'].values()))
+    if len(config['targets']) > 1:
+        logger.warning(f"Config has {len(config['targets'])} targets, checking only {target['name']} (use --daemon for all)")
+    url = target['url']
+    target_name = target['name']
+    
+    har = None
+    if args.record:
+        har = HarOptions('record', args.record)
+    elif args.replay:
+        har = HarOptions('replay', args.replay, latency_ms=args.replay_latency)
+        metadata = har.load_metadata()
+        url = metadata.get('url', url)
+        target_name = metadata.get('target_name', target_name)
+    
     # Check for Discord webhook URL
-    if not os.environ.get('DISCORD_WEBHOOK_URL'):
+    if not target['discord_webhook_url']:
         logger.warning("DISCORD_WEBHOOK_URL not set. Running in test mode.")
     
+    # Keep everything in one snapshot file instead of the per-target files;
+    # it is re-read and written under the run lock with every check
+    state_snapshot = None if har and har.replaying else StateSnapshot.from_env(args.state_snapshot)
+    
     # Initialize monitor
     monitor = ParkingMonitor(
-        url="https://space.aceparking.com/site/reserve/4fac9ba115140ac4f1c22da82aa0bc7f",
-        target_name="Samuel Merritt University Fall 2025 Parking"
+        url=url,
+        target_name=target_name,
+        har=har,
+        discord_webhook_url=target['discord_webhook_url'],
+        lock_mode=args.lock_mode,
+        http_fast_path=args.http or None,
+        browser_profile=load_profile(args.browser_profile),
+        state_snapshot=state_snapshot,
+        snapshot_key=target['id']
     )
     
+    if args.calibrate:
+        from src.browser_profiles import calibrate
+        await calibrate(monitor, runs=args.calibrate_runs)
+        return
+    
+    if har and har.replaying:
+        # Replay never touches state, history or notifications
+        await replay(monitor, repeat=args.repeat)
+        return
+    
+    if args.profile:
+        from src.profiling import print_profile_summary, profile_checks
+        summary = await profile_checks(
+            monitor.check_and_notify, args.profile,
+            profiler=args.profiler, output_dir=args.profile_dir
+        )
+        print_profile_summary(summary)
+        return
+    
+    if args.watch:
+        await monitor.run_watch_mode(interval=args.interval)
+        return
+    
     # Run check
     await monitor.check_and_notify()
     
+    if har:
+        har.write_metadata(url, target_name)
+    
     logger.info("Check completed successfully")
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+"""
+Single-Flight Fetches
+Concurrent loads of the same page share one in-flight request
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a page URL for coalescing
+    
+    Lowercases scheme and host, drops the fragment and a trailing slash,
+    and sorts the query parameters.
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls by key, with a short TTL cache in front
+    
+    The first caller for a key runs the load; callers arriving while it is
+    in flight await the same result instead of starting their own. A
+    successful (non-None) result is then served from the cache for `ttl`
+    seconds. Failures are shared with the waiters but never cached.
+    """
+    
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self.stats = {'loads': 0, 'coalesced': 0, 'cache_hits': 0}
+    
+    async def do(self, key: str, load: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run load() for key unless a load is in flight or cached
+        
+        Returns:
+            (result, shared) where shared is True if the result came from
+            another caller's load or the cache
+        """
+        cached = self._cache.get(key)
+        if cached and time.monotonic() < cached[0]:
+            self.stats['cache_hits'] += 1
+            return cached[1], True
+        
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            # shield: a cancelled waiter must not cancel the shared load
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    # The owner was cancelled (e.g. its deadline ran out), not us
+                    raise RuntimeError(f"Shared load of {key} was cancelled") from None
+                raise
+        
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self.stats['loads'] += 1
+        try:
+            result = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an error nobody waited on isn't logged
+            future.exception()
+            raise
+        else:
+            if result is not None and self.ttl > 0:
+                self._cache[key] = (time.monotonic() + self.ttl, result)
+            future.set_result(result)
+            return result, False
+        finally:
+            self._in_flight.pop(key, None)
+    
+    def invalidate(self, key: Optional[str] = None):
+        """Drop a cached result (or all of them)"""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+class PageTargets:
+    """
+    Which monitors check which page, so page-wide work happens once
+    
+    Every listing on a page is handled (alerted on, logged) by exactly one
+    monitor: a configured target by the monitor watching it, every other
+    listing by the page's owner, the earliest registered monitor still on
+    the page. Shared between monitors like the SingleFlight.
+    """
+    
+    def __init__(self):
+        # page key -> listing id -> monitors watching that listing, in registration order
+        self._pages: Dict[str, Dict[str, list]] = {}
+    
+    def register(self, key: str, monitor: Any):
+        targets = self._pages.setdefault(key, {})
+        targets.setdefault(monitor.target_id, []).append(monitor)
+    
+    def unregister(self, key: str, monitor: Any):
+        targets = self._pages.get(key, {})
+        monitors = targets.get(monitor.target_id, [])
+        if monitor in monitors:
+            monitors.remove(monitor)
+        if not monitors:
+            targets.pop(monitor.target_id, None)
+        if not targets:
+            self._pages.pop(key, None)
+    
+    def target_ids(self, key: str) -> Set[str]:
+        """Listing ids watched by the monitors on page `key`"""
+        return set(self._pages.get(key, ()))
+    
+    def owner(self, key: str) -> Any:
+        targets = self._pages.get(key)
+        if not targets:
+            return None
+        return next(iter(targets.values()))[0]
+    
+    def handles(self, key: str, monitor: Any, listing_id: str) -> bool:
+        """Whether `monitor` is the one to handle `listing_id` on page `key`"""
+        targets = self._pages.get(key)
+        if not targets:
+            return True
+        if listing_id in targets:
+            return targets[listing_id][0] is monitor
+        return self.owner(key) is monitor
@@ -15,10 +15,32 @@ logger = logging.getLogger(__name__)
 class StateManager:
     """Manage state persistence for parking monitor"""
     
-    def __init__(self, state_file: str = "data/last_state.json"):
+    # Bookkeeping that survives save_state() overwriting the scraped data
+    PRESERVED_KEYS = ('error_count', 'circuit', 'hedging', 'alerts', 'proxies')
+    
+    def __init__(self, state_file: str = "data/last_state.json", initial: Optional[Dict] = None):
+        """
+        Args:
+            state_file: JSON state file
+            initial: Restored state (e.g. from a state snapshot); the state is
+                then kept in memory and the file is never read or written
+        """
         self.state_file = Path(state_file)
-        self.state_file.parent.mkdir(parents=True, exist_ok=True)
-        self._ensure_state_file()
+        self._memory = dict(initial) if initial is not None else None
+        if self._memory is None:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            self._ensure_state_file()
+    
+    @property
+    def in_memory(self) -> bool:
+        return self._memory is not None
+    
+    def _write(self, state: Dict):
+        if self._memory is not None:
+            self._memory = state
+            return
+        with open(self.state_file, 'w') as f:
+            json.dump(state, f, indent=2)
     
     def _ensure_state_file(self):
         """Ensure state file exists"""
@@ -35,6 +57,8 @@ class StateManager:
         Read the last known state from file
         Returns None if file doesn't exist or is invalid
         """
+        if self._memory is not None:
+            return json.loads(json.dumps(self._memory))
         try:
             if self.state_file.exists():
                 with open(self.state_file, 'r') as f:
@@ -57,16 +81,15 @@ class StateManager:
             # Add metadata
             data['last_check'] = datetime.now().isoformat()
             
-            # Preserve error count if it exists
-            current_state = self.get_state()
-            if current_state and 'error_count' in current_state:
-                data['error_count'] = current_state['error_count']
-            else:
-                data['error_count'] = 0
+            # Preserve error count and other bookkeeping if they exist
+            current_state = self.get_state() or {}
+            for key in self.PRESERVED_KEYS:
+                if key in current_state:
+                    data[key] = current_state[key]
+            data.setdefault('error_count', 0)
             
             # Write to file
-            with open(self.state_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            self._write(data)
             
             logger.info(f"State saved successfully: {data}")
             
@@ -95,8 +118,7 @@ class StateManager:
         state['error_count'] = error_count
         state['last_error'] = datetime.now().isoformat()
         
-        with open(self.state_file, 'w') as f:
-            json.dump(state, f, indent=2)
+        self._write(state)
         
         return error_count
     
@@ -105,10 +127,21 @@ class StateManager:
         state = self.get_state() or {}
         if state.get('error_count', 0) > 0:
             state['error_count'] = 0
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f, indent=2)
+            self._write(state)
             logger.info("Error count reset")
     
+    def get_section(self, key: str) -> Dict:
+        """Get a persisted bookkeeping section (circuit breaker, hedging, ...)"""
+        state = self.get_state() or {}
+        return state.get(key, {})
+    
+    def save_section(self, key: str, value: Dict):
+        """Persist a bookkeeping section without touching the scraped data"""
+        state = self.get_state() or {}
+        state[key] = value
+        
+        self._write(state)
+    
     def get_last_check_time(self) -> Optional[datetime]:
         """Get the last check timestamp"""
         state = self.get_state()
@@ -0,0 +1,246 @@
+"""
+State Snapshot
+All per-target state, the recent history and the rollups in one compact, versioned file
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.check_logger import CheckLogger
+from src.listings import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_FILE = "data/state_snapshot.json"
+
+# Schema upgrades: UPGRADES[n] turns a version n snapshot into version n + 1.
+# A schema change bumps SNAPSHOT_VERSION and adds the step from the old version.
+UPGRADES: Dict[int, Callable[[Dict], Dict]] = {}
+
+def upgrade(data: Dict) -> Optional[Dict]:
+    """Bring a snapshot up to SNAPSHOT_VERSION, or None if there is no upgrade path"""
+    version = data.get('version')
+    if isinstance(version, int) and version > SNAPSHOT_VERSION:
+        return None
+    while version != SNAPSHOT_VERSION:
+        step = UPGRADES.get(version)
+        if step is None:
+            return None
+        logger.info(f"Upgrading state snapshot from version {version} to {version + 1}")
+        data = step(data)
+        data['version'] = version = version + 1
+    return data
+
+def fingerprint(rows: List[List]) -> Optional[str]:
+    """Content fingerprint of a listing snapshot, independent of listing order"""
+    if not rows:
+        return None
+    encoded = json.dumps(sorted(rows, key=lambda row: row[0]), separators=(',', ':'))
+    return hashlib.sha1(encoded.encode()).hexdigest()[:16]
+
+class StateSnapshot:
+    """
+    One file instead of a state, snapshot, history and rollup file per target
+    
+    Layout (version 1):
+        
+        {"version": 1, "written_at": ..., "fields": ["id", "name", "status", "price"],
+         "targets": {<target id>: {"state": {...}, "listings": [[...], ...], "fingerprint": ...}},
+         "history": {"version": 2, "intervals": [...], "samples": [...]},
+         "rollups": {...}}
+    
+    Only a bounded tail of the history is kept (the last history_tail
+    intervals per target and sample_tail samples; the rollups carry the
+    long-run statistics), so the file and the time to restore from it stay
+    the same size however long the monitor has been running. It is read
+    once at startup and written once per run, atomically (temp file, fsync,
+    rename), so a crashed run never leaves a torn file behind.
+    
+    An older snapshot is upgraded through UPGRADES. One with a newer or
+    unknown version (written by a newer release) is never overwritten:
+    the run falls back to the per-target files and save() refuses to
+    write. An unreadable one is moved aside before falling back.
+    """
+    
+    def __init__(
+        self,
+        path: str = DEFAULT_SNAPSHOT_FILE,
+        history_tail: int = 50,
+        sample_tail: int = 100,
+        days_kept: int = 90
+    ):
+        self.path = Path(path)
+        self.history_tail = history_tail
+        self.sample_tail = sample_tail
+        self.days_kept = days_kept
+        self.data: Optional[Dict] = None
+        # Why save() must not replace the file on disk (a snapshot this version can't read)
+        self.write_refused: Optional[str] = None
+    
+    def load(self) -> Optional[Dict]:
+        """Read the snapshot (upgrading an older one), or None if there is none or it can't be used"""
+        started = time.perf_counter()
+        self.write_refused = None
+        try:
+            with open(self.path, 'rb') as f:
+                data = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            aside = self.path.with_name(f"{self.path.name}.unreadable")
+            os.replace(self.path, aside)
+            logger.error(f"State snapshot {self.path} is unreadable ({e}), moved it to {aside}")
+            return None
+        
+        version = data.get('version') if isinstance(data, dict) else None
+        upgraded = upgrade(data) if isinstance(data, dict) else None
+        if upgraded is None:
+            self.write_refused = f"it has version {version!r}, this release reads version {SNAPSHOT_VERSION}"
+            logger.error(f"Cannot use state snapshot {self.path}: {self.write_refused}; it will not be overwritten")
+            return None
+        data = upgraded
+        logger.info(f"Restored {len(data['targets'])} targets from {self.path} in "
+                    f"{(time.perf_counter() - started) * 1000:.1f}ms")
+        return data
+    
+    def migrate(self, targets: Dict[str, Tuple[str, str]], history_file: str, rollup_file: str) -> Dict:
+        """
+        Build a snapshot from the per-target files (first run with snapshots)
+        
+        Args:
+            targets: target id -> (state_file, snapshot_file)
+            history_file, rollup_file: The check history and rollup files
+        """
+        data = self._empty()
+        for target_id, (state_file, snapshot_file) in targets.items():
+            entry = {'state': None, 'listings': [], 'fingerprint': None}
+            try:
+                with open(state_file, 'r') as f:
+                    entry['state'] = json.load(f)
+            except (OSError, ValueError):
+                pass
+            listings = SnapshotStore(snapshot_file).load()
+            if listings:
+                entry['listings'] = SnapshotStore.to_rows(listings)
+                entry['fingerprint'] = fingerprint(entry['listings'])
+            data['targets'][target_id] = entry
+        
+        check_logger = CheckLogger(history_file, rollup_file)
+        data['history'] = self._history_tail(check_logger.history)
+        data['rollups'] = check_logger.rollups.data
+        logger.info(f"Migrated {len(targets)} targets and {len(check_logger.history['intervals'])} "
+                    f"history intervals into a state snapshot")
+        return data
+    
+    def _empty(self) -> Dict:
+        return {
+            'version': SNAPSHOT_VERSION,
+            'written_at': None,
+            'fields': list(SnapshotStore.FIELDS),
+            'targets': {},
+            'history': {'version': CheckLogger.HISTORY_VERSION, 'intervals': [], 'samples': []},
+            'rollups': {'version': 1, 'targets': {}}
+        }
+    
+    def restore(self, targets: Dict[str, Tuple[str, str]], history_file: str, rollup_file: str) -> Dict:
+        """Load the snapshot, migrating from the per-target files if there isn't one"""
+        existed = self.path.exists()
+        self.data = self.load()
+        if self.data is None:
+            if existed:
+                logger.error(f"Rebuilding state from the per-target files instead of {self.path}")
+            self.data = self.migrate(targets, history_file, rollup_file)
+        for target_id in targets:
+            self.data['targets'].setdefault(target_id, {'state': None, 'listings': [], 'fingerprint': None})
+        return self.data
+    
+    def target(self, target_id: str) -> Dict:
+        return self.data['targets'].setdefault(target_id, {'state': None, 'listings': [], 'fingerprint': None})
+    
+    def check_logger(self, history_file: str, rollup_file: str) -> CheckLogger:
+        """CheckLogger working on the restored history tail and rollups"""
+        return CheckLogger(history_file, rollup_file, history=self.data['history'], rollups=self.data['rollups'])
+    
+    def _history_tail(self, history: Dict) -> Dict:
+        kept = []
+        per_target: Dict[str, int] = {}
+        # Walk back from the newest interval so each target keeps its latest ones
+        for interval in reversed(history['intervals']):
+            count = per_target.get(interval['target'], 0)
+            if count < self.history_tail:
+                per_target[interval['target']] = count + 1
+                kept.append(interval)
+        return {
+            'version': history.get('version', CheckLogger.HISTORY_VERSION),
+            'intervals': kept[::-1],
+            'samples': history['samples'][-self.sample_tail:]
+        }
+    
+    def _trim_rollups(self, rollups: Dict) -> Dict:
+        for rollup in rollups.get('targets', {}).values():
+            days = rollup.get('days', {})
+            for day in sorted(days)[:-self.days_kept]:
+                del days[day]
+        return rollups
+    
+    def capture(self, target_id: str, monitor):
+        """Copy a monitor's current state into the snapshot (not yet written)"""
+        if self.data is None:
+            self.data = self._empty()
+        rows = SnapshotStore.to_rows(monitor.snapshot_store.load() or {})
+        self.data['targets'][target_id] = {
+            'state': monitor.state_manager.get_state(),
+            'listings': rows,
+            'fingerprint': fingerprint(rows)
+        }
+    
+    def save(self, monitors: Dict[str, object], check_logger: Optional[CheckLogger] = None):
+        """
+        Capture the monitors' state and write the snapshot atomically
+        
+        Args:
+            monitors: target id -> ParkingMonitor
+            check_logger: The shared check logger (history tail and rollups)
+        """
+        if self.write_refused:
+            logger.error(f"Not writing state snapshot {self.path}: {self.write_refused}")
+            return
+        for target_id, monitor in monitors.items():
+            self.capture(target_id, monitor)
+        data = self.data
+        if check_logger:
+            data['history'] = self._history_tail(check_logger.history)
+            data['rollups'] = self._trim_rollups(check_logger.rollups.data)
+        data['written_at'] = datetime.now().isoformat()
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.info(f"💾 State snapshot written to {self.path} ({self.path.stat().st_size} bytes)")
+    
+    @classmethod
+    def from_env(cls, path: Optional[str] = None) -> Optional['StateSnapshot']:
+        """
+        STATE_SNAPSHOT_FILE    Use a single state snapshot file instead of the per-target files
+        STATE_HISTORY_TAIL     History intervals kept per target (default 50)
+        """
+        path = path or os.environ.get('STATE_SNAPSHOT_FILE')
+        if not path:
+            return None
+        return cls(path, history_tail=int(os.environ.get('STATE_HISTORY_TAIL', 50)))
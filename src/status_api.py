@@ -0,0 +1,288 @@
+"""
+Status API
+Serves the daemon's in-memory status to dashboards over HTTP, with ETags, long-polling and SSE
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Longest long-poll wait a client may ask for
+MAX_WAIT_SECONDS = 60
+SSE_HEARTBEAT_SECONDS = 15
+
+class StatusBoard:
+    """
+    Latest result per target and recent transitions, kept in memory
+    
+    `revision` moves on every update (a check also refreshes its
+    timestamps); `version` only moves when something a dashboard cares
+    about changed: a status, a price, a check starting or stopping to
+    fail, a transition. Long-polls and SSE streams wake on `version`.
+    Rendered responses are cached per revision, so any number of clients
+    polling between checks cost one JSON encoding.
+    """
+    
+    def __init__(self, max_transitions: int = 200, stale_after: float = 3):
+        self.targets: Dict[str, Dict] = {}
+        self.transitions: Deque[Dict] = deque(maxlen=max_transitions)
+        # A target is stale after missing this many intervals
+        self.stale_after = stale_after
+        self.started_at = datetime.now()
+        self.version = 0
+        self.revision = 0
+        # Sequence number of the last transition, so streams can tell what they haven't sent
+        self.transition_seq = 0
+        self._changed = asyncio.Event()
+        self._rendered: Dict[str, Tuple[int, bytes, str]] = {}
+    
+    def _bump(self, changed: bool):
+        self.revision += 1
+        if changed:
+            self.version += 1
+            # Wake every waiter, then give later waiters a fresh event
+            self._changed.set()
+            self._changed = asyncio.Event()
+    
+    def add_target(self, target: Dict):
+        """Add a configured target, or update its settings if already known"""
+        entry = self.targets.setdefault(target['id'], {
+            'id': target['id'],
+            'status': None,
+            'price': None,
+            'success': None,
+            'listings': None,
+            'checked_at': None,
+            'checks': 0,
+            'failures': 0,
+            'circuit': None
+        })
+        entry.update(name=target['name'], url=target['url'], interval=target['interval'])
+        self._bump(True)
+    
+    def remove_target(self, target_id: str):
+        if self.targets.pop(target_id, None):
+            self._bump(True)
+    
+    def update(self, target_id: str, result: Optional[Dict], circuit: Optional[str] = None):
+        """Record a check's result (as returned by check_and_notify)"""
+        entry = self.targets.get(target_id)
+        if entry is None or not result:
+            return
+        before = (entry['status'], entry['price'], entry['success'], entry['circuit'])
+        entry['checks'] += 1
+        entry['circuit'] = circuit
+        entry['success'] = result.get('success', False)
+        if entry['success']:
+            entry.update(
+                status=result['status'],
+                price=result.get('price'),
+                listings=result.get('listings'),
+                checked_at=result.get('checked_at')
+            )
+        else:
+            entry['failures'] += 1
+            entry['last_failure'] = {
+                'at': datetime.now().isoformat(),
+                'skipped': result.get('skipped'),
+                'error_count': result.get('error_count')
+            }
+        
+        for transition in result.get('transitions', []):
+            self.transition_seq += 1
+            self.transitions.append(dict(
+                transition, seq=self.transition_seq, target=target_id, at=result.get('checked_at')
+            ))
+        changed = before != (entry['status'], entry['price'], entry['success'], entry['circuit'])
+        self._bump(changed or bool(result.get('transitions')))
+    
+    def status(self) -> Dict:
+        return {'version': self.version, 'targets': self.targets}
+    
+    def recent_transitions(self, limit: int = 50) -> List[Dict]:
+        return list(self.transitions)[-limit:]
+    
+    def health(self) -> Dict:
+        now = datetime.now()
+        targets = {}
+        for target_id, entry in self.targets.items():
+            # Not checked yet counts from startup
+            last = datetime.fromisoformat(entry['checked_at']) if entry['checked_at'] else self.started_at
+            age = (now - last).total_seconds()
+            targets[target_id] = {
+                'last_success_age_seconds': round(age, 1),
+                'stale': age > entry['interval'] * self.stale_after,
+                'circuit': entry['circuit'],
+                'checks': entry['checks'],
+                'failures': entry['failures']
+            }
+        return {
+            'ok': not any(target['stale'] for target in targets.values()),
+            'uptime_seconds': round((now - self.started_at).total_seconds(), 1),
+            'version': self.version,
+            'targets': targets
+        }
+    
+    def render(self, name: str, build) -> Tuple[bytes, str]:
+        """JSON body and ETag of a resource, encoded once per revision"""
+        cached = self._rendered.get(name)
+        if cached and cached[0] == self.revision:
+            return cached[1], cached[2]
+        body = json.dumps(build(), default=str).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        self._rendered[name] = (self.revision, body, etag)
+        return body, etag
+    
+    async def wait_for_change(self, since: int, timeout: float) -> bool:
+        """Wait until version is past `since`; False if the wait timed out"""
+        deadline = time.monotonic() + timeout
+        while self.version <= since:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+class StatusServer:
+    """
+    Local HTTP API over a StatusBoard
+        
+        GET /status                 every target (?since=<version>&wait=<s> to long-poll)
+        GET /status/<target_id>     one target
+        GET /transitions?limit=N    recent transitions, newest last
+        GET /health                 staleness per target; 503 if any is stale
+        GET /events                 Server-Sent Events: 'status' and 'transition';
+                                    resumes after Last-Event-ID
+    
+    JSON responses carry an ETag and answer If-None-Match with 304.
+    Event streams never end on their own, so stop() ends them before
+    shutting the server down.
+    """
+    
+    def __init__(self, board: StatusBoard, host: str = '127.0.0.1', port: int = 8080):
+        self.board = board
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+        # Handler tasks of the open event streams
+        self._streams: Set[asyncio.Task] = set()
+    
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/status', self.get_status)
+        app.router.add_get('/status/{target_id}', self.get_target)
+        app.router.add_get('/transitions', self.get_transitions)
+        app.router.add_get('/health', self.get_health)
+        app.router.add_get('/events', self.get_events)
+        return app
+    
+    def _respond(self, request: web.Request, body: bytes, etag: str, status: int = 200) -> web.Response:
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in request.headers.get('If-None-Match', ''):
+            return web.Response(status=304, headers=headers)
+        return web.Response(status=status, body=body, content_type='application/json', headers=headers)
+    
+    async def get_status(self, request: web.Request) -> web.Response:
+        if 'wait' in request.query:
+            try:
+                since = int(request.query.get('since', self.board.version))
+                wait = min(float(request.query['wait']), MAX_WAIT_SECONDS)
+            except ValueError:
+                raise web.HTTPBadRequest(text="since and wait must be numbers")
+            await self.board.wait_for_change(since, wait)
+        body, etag = self.board.render('status', self.board.status)
+        return self._respond(request, body, etag)
+    
+    async def get_target(self, request: web.Request) -> web.Response:
+        target_id = request.match_info['target_id']
+        if target_id not in self.board.targets:
+            raise web.HTTPNotFound(text=f"Unknown target: {target_id}")
+        body, etag = self.board.render(f"status/{target_id}", lambda: self.board.targets[target_id])
+        return self._respond(request, body, etag)
+    
+    async def get_transitions(self, request: web.Request) -> web.Response:
+        try:
+            limit = max(1, min(int(request.query.get('limit', 50)), self.board.transitions.maxlen))
+        except ValueError:
+            raise web.HTTPBadRequest(text="limit must be a number")
+        body, etag = self.board.render(f"transitions/{limit}", lambda: self.board.recent_transitions(limit))
+        return self._respond(request, body, etag)
+    
+    async def get_health(self, request: web.Request) -> web.Response:
+        # Ages change by the second, so health isn't cached
+        health = self.board.health()
+        body = json.dumps(health).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        return self._respond(request, body, etag, status=200 if health['ok'] else 503)
+    
+    async def get_events(self, request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        await response.prepare(request)
+        
+        board = self.board
+        # Event ids are transition seqs: a reconnecting client gets the
+        # buffered transitions it missed, a new stream only the current status
+        try:
+            sent_seq = int(request.headers.get('Last-Event-ID', board.transition_seq))
+        except ValueError:
+            sent_seq = board.transition_seq
+        if sent_seq > board.transition_seq:
+            # Seqs from before a restart
+            sent_seq = board.transition_seq
+        version = -1
+        task = asyncio.current_task()
+        self._streams.add(task)
+        try:
+            while True:
+                if board.version > version:
+                    for transition in board.transitions:
+                        if transition['seq'] > sent_seq:
+                            data = json.dumps(transition, default=str)
+                            await response.write(
+                                f"id: {transition['seq']}\nevent: transition\ndata: {data}\n\n".encode()
+                            )
+                    sent_seq = board.transition_seq
+                    body, _ = board.render('status', board.status)
+                    await response.write(f"id: {sent_seq}\nevent: status\ndata: ".encode() + body + b"\n\n")
+                    version = board.version
+                elif not await board.wait_for_change(version, SSE_HEARTBEAT_SECONDS):
+                    await response.write(b": ping\n\n")
+        except ConnectionResetError:
+            pass
+        finally:
+            self._streams.discard(task)
+        return response
+    
+    async def start(self):
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(f"📡 Status API listening on http://{self.host}:{self.port}")
+    
+    async def stop(self):
+        if self._runner:
+            # Otherwise cleanup waits out aiohttp's shutdown timeout on every open stream
+            streams = list(self._streams)
+            for task in streams:
+                task.cancel()
+            if streams:
+                await asyncio.wait(streams, timeout=5)
+            await self._runner.cleanup()
+            self._runner = None
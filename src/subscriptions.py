@@ -0,0 +1,207 @@
+"""
+Subscriptions
+Routes listing alerts to many subscribers with per-target filters
+"""
+
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.listings import normalize_listing_id
+from src.notifiers import NotificationChannel, build_channel
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = '*'
+
+# Alert kinds a subscriber can filter on
+EVENT_KINDS = ('available', 'still_available', 'new_listing')
+
+def parse_price(price: Optional[str]) -> Optional[float]:
+    """'$1,234.50' -> 1234.5, None if there is no price"""
+    match = re.search(r'[\d,]+\.?\d*', price or '')
+    if not match:
+        return None
+    try:
+        return float(match.group(0).replace(',', ''))
+    except ValueError:
+        return None
+
+def destination_key(destination: Dict) -> Tuple:
+    """
+    Key that groups subscribers sharing a delivery
+    
+    Subscribers pointing at the same webhook share one request. Email
+    subscribers on the same SMTP server share one message, so their
+    addresses are merged into a single recipient list.
+    """
+    kind = destination.get('type')
+    if kind == 'email':
+        return (kind, destination.get('host'), destination.get('port'))
+    if kind == 'socket':
+        return (kind, destination.get('path'))
+    return (kind, destination.get('url'))
+
+class Subscription:
+    """One subscriber's destination and filters"""
+    
+    def __init__(self, entry: Dict):
+        self.id = str(entry.get('id') or entry['destination'].get('url') or entry['destination'].get('to'))
+        self.destination = entry['destination']
+        self.key = destination_key(self.destination)
+        
+        targets = entry.get('targets') or [WILDCARD]
+        self.targets = [target if target == WILDCARD else normalize_listing_id(target) for target in targets]
+        self.max_price = entry.get('max_price')
+        # [start_hour, end_hour) in local time; wraps past midnight if start > end
+        self.hours = entry.get('hours')
+        self.events = set(entry.get('events') or EVENT_KINDS)
+    
+    def accepts(self, kind: str, price: Optional[float], now: datetime) -> bool:
+        """Whether the non-target filters match this alert"""
+        if kind not in self.events:
+            return False
+        if self.max_price is not None and price is not None and price > self.max_price:
+            return False
+        if self.hours:
+            start, end = self.hours
+            if start <= end:
+                return start <= now.hour < end
+            return now.hour >= start or now.hour < end
+        return True
+
+class SubscriptionStore:
+    """
+    Subscriptions indexed by target listing id
+    
+    The index maps each listing id to the subscriptions naming it, plus one
+    list of wildcard subscriptions. Resolving an alert only looks at those
+    two lists, so the cost grows with the number of matching subscribers,
+    not with the total number of subscriptions.
+    
+    File format (data/subscriptions.json):
+    {"subscribers": [{"id": "alice",
+                      "destination": {"type": "discord", "url": "..."},
+                      "targets": ["Samuel Merritt University Fall 2025 Parking"],
+                      "max_price": 100, "hours": [7, 23],
+                      "events": ["available", "new_listing"]}]}
+    """
+    
+    def __init__(self, subscriptions_file: str = "data/subscriptions.json", channel_options: Optional[Dict] = None):
+        self.subscriptions_file = subscriptions_file
+        self.channel_options = channel_options or {}
+        self.by_target: Dict[str, List[Subscription]] = {}
+        self.wildcard: List[Subscription] = []
+        self.count = 0
+        # Channels are reused across alerts, one per destination group
+        self._channels: Dict[Tuple, NotificationChannel] = {}
+        self.load()
+    
+    def load(self):
+        """(Re)build the index from the subscriptions file"""
+        self.by_target = {}
+        self.wildcard = []
+        self.count = 0
+        self._channels = {}
+        
+        if not os.path.exists(self.subscriptions_file):
+            return
+        try:
+            with open(self.subscriptions_file, 'r') as f:
+                entries = json.load(f).get('subscribers', [])
+        except Exception as e:
+            logger.error(f"Error loading subscriptions: {e}")
+            return
+        
+        for entry in entries:
+            try:
+                self.add(Subscription(entry))
+            except Exception as e:
+                logger.error(f"Skipping invalid subscription {entry!r}: {e}")
+        logger.info(f"Loaded {self.count} subscriptions for {len(self.by_target)} targets "
+                    f"({len(self.wildcard)} wildcard)")
+    
+    def add(self, subscription: Subscription):
+        """Index a subscription under each of its targets"""
+        for target in subscription.targets:
+            if target == WILDCARD:
+                self.wildcard.append(subscription)
+            else:
+                self.by_target.setdefault(target, []).append(subscription)
+        self.count += 1
+    
+    def resolve(self, listing: Dict, kind: str, now: Optional[datetime] = None) -> Dict[Tuple, List[Subscription]]:
+        """
+        Find the subscribers for one listing alert
+        
+        Args:
+            listing: Snapshot entry (id, name, status, price)
+            kind: 'available', 'still_available' or 'new_listing'
+            now: Time of the alert (defaults to now)
+        
+        Returns:
+            Matching subscriptions grouped by destination key
+        """
+        now = now or datetime.now()
+        price = parse_price(listing.get('price'))
+        groups: Dict[Tuple, List[Subscription]] = {}
+        seen = set()
+        
+        for subscription in self.by_target.get(listing['id'], []) + self.wildcard:
+            if id(subscription) in seen or not subscription.accepts(kind, price, now):
+                continue
+            seen.add(id(subscription))
+            groups.setdefault(subscription.key, []).append(subscription)
+        return groups
+    
+    def channels_for(self, listing: Dict, kind: str, now: Optional[datetime] = None) -> List[NotificationChannel]:
+        """
+        One channel per destination group matching this alert
+        """
+        channels = []
+        for key, subscriptions in self.resolve(listing, kind, now).items():
+            channel = self._channel(key, subscriptions)
+            if channel:
+                channels.append(channel)
+        return channels
+    
+    def _channel(self, key: Tuple, subscriptions: List[Subscription]) -> Optional[NotificationChannel]:
+        destination = subscriptions[0].destination
+        if destination.get('type') == 'email':
+            # Only the subscribers matching this alert get the message
+            recipients = []
+            for subscription in subscriptions:
+                to = subscription.destination['to']
+                recipients.extend(to if isinstance(to, list) else [to])
+            destination = dict(destination, to=sorted(set(recipients)))
+            cache_key = key + tuple(destination['to'])
+        else:
+            cache_key = key
+        
+        channel = self._channels.get(cache_key)
+        if channel is None:
+            try:
+                channel = build_channel(destination, name=f"subscribers:{subscriptions[0].id}", **self.channel_options)
+            except Exception as e:
+                logger.error(f"Cannot build channel for {key}: {e}")
+                return None
+            self._channels[cache_key] = channel
+        return channel
+    
+    @classmethod
+    def from_env(cls) -> 'SubscriptionStore':
+        """
+        SUBSCRIPTIONS_FILE    Subscribers and their filters (default data/subscriptions.json)
+        NOTIFY_TIMEOUT        Per-channel timeout in seconds (default 10)
+        NOTIFY_RETRIES        Per-channel retries (default 2)
+        """
+        return cls(
+            os.environ.get('SUBSCRIPTIONS_FILE', 'data/subscriptions.json'),
+            channel_options={
+                'timeout': float(os.environ.get('NOTIFY_TIMEOUT', 10)),
+                'retries': int(os.environ.get('NOTIFY_RETRIES', 2))
+            }
+        )
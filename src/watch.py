@@ -0,0 +1,242 @@
+"""
+Watch API
+Stream check results and status transitions from monitors as they happen
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+from src.check_logger import CheckLogger
+from src.proxy_pool import ProxyPool
+from src.scraper import ParkingMonitor
+from src.single_flight import PageTargets, SingleFlight
+from src.subscriptions import SubscriptionStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 60
+
+class WatchEvent:
+    """Base class of the events yielded by watch()"""
+    
+    kind = 'event'
+    
+    def __init__(self, target: str, at: Optional[str] = None):
+        self.target = target
+        self.at = at or datetime.now().isoformat()
+    
+    def to_dict(self) -> Dict:
+        return {'kind': self.kind, **vars(self)}
+    
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{key}={value!r}" for key, value in vars(self).items())
+        return f"{type(self).__name__}({fields})"
+
+class CheckResult(WatchEvent):
+    """
+    One completed check of a target
+    
+    skipped is set when no check ran: 'circuit_open' while the site keeps
+    failing, 'run_lock' if another run holds the target's lock.
+    """
+    
+    kind = 'check'
+    
+    def __init__(self, target: str, result: Dict):
+        super().__init__(target, result.get('checked_at'))
+        self.success = result.get('success', False)
+        self.status = result.get('status')
+        self.price = result.get('price')
+        self.listings = result.get('listings', 0)
+        self.notified = result.get('notified', [])
+        self.skipped = result.get('skipped')
+        self.error_count = result.get('error_count')
+
+class Transition(WatchEvent):
+    """
+    A listing's alert state changed
+    
+    transition is 'available', 'still_available' (re-alert), 'sold_out'
+    (confirmed) or 'new_listing'.
+    """
+    
+    kind = 'transition'
+    
+    def __init__(self, target: str, transition: Dict, at: Optional[str] = None):
+        super().__init__(target, at)
+        self.transition = transition['kind']
+        self.listing_id = transition['listing_id']
+        self.name = transition['name']
+        self.previous_status = transition['previous_status']
+        self.status = transition['status']
+        self.price = transition['price']
+
+class CheckError(WatchEvent):
+    """A check raised instead of returning a result"""
+    
+    kind = 'error'
+    
+    def __init__(self, target: str, error: Exception):
+        super().__init__(target)
+        self.error = f"{type(error).__name__}: {error}"
+
+def events_from_result(target: str, result: Optional[Dict]) -> List[WatchEvent]:
+    """The events for one run_check() result: the check, then its transitions"""
+    if result is None:
+        return [CheckResult(target, {'success': False, 'skipped': 'run_lock'})]
+    events = [CheckResult(target, result)]
+    for transition in result.get('transitions', []):
+        events.append(Transition(target, transition, at=result.get('checked_at')))
+    return events
+
+class Watcher:
+    """
+    Async iterator over the events of periodic checks of several monitors
+    
+    Each monitor is checked in its own task. Events go through a bounded
+    queue: when the consumer falls max_pending events behind, the checks
+    wait to enqueue and the next check is delayed, so a slow consumer
+    slows the checks down instead of buffering without limit. Closing the
+    watcher (leaving `async with`, or aclose()) cancels the checks and ends
+    the iteration, also for a consumer already waiting for an event. A
+    check task that dies re-raises its error in the consumer.
+    """
+    
+    def __init__(
+        self,
+        monitors: List[ParkingMonitor],
+        intervals: List[float],
+        persist: bool = False,
+        notify: bool = False,
+        summary: bool = False,
+        max_pending: int = 100
+    ):
+        self.monitors = monitors
+        self.intervals = intervals
+        self.check_options = {'persist': persist, 'notify': notify, 'summary': summary}
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.tasks: List[asyncio.Task] = []
+        self.closed = False
+        self._closing = asyncio.Event()
+    
+    def _start(self):
+        for monitor, interval in zip(self.monitors, self.intervals):
+            monitor.fit_deadline(interval)
+            self.tasks.append(asyncio.create_task(
+                self._check_loop(monitor, interval), name=f"watch:{monitor.target_id}"
+            ))
+        logger.info(f"Watching {len(self.monitors)} targets")
+    
+    async def _check_loop(self, monitor: ParkingMonitor, interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                events = events_from_result(monitor.target_name, await monitor.run_check(**self.check_options))
+            except Exception as e:
+                logger.error(f"Check failed for {monitor.target_name}: {e}")
+                events = [CheckError(monitor.target_name, e)]
+            for event in events:
+                await self.queue.put(event)
+            await asyncio.sleep(max(0, interval - (loop.time() - started)))
+    
+    def __aiter__(self) -> 'Watcher':
+        return self
+    
+    async def __anext__(self) -> WatchEvent:
+        if not self.tasks and not self.closed:
+            self._start()
+        while True:
+            if self.closed:
+                raise StopAsyncIteration
+            if not self.queue.empty():
+                return self.queue.get_nowait()
+            
+            # _check_loop handles check errors itself, so a task only ends on something worse
+            for task in self.tasks:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    error = task.exception()
+                    await self.aclose()
+                    raise error
+            running = [task for task in self.tasks if not task.done()]
+            if not running:
+                raise StopAsyncIteration
+            
+            # Wait for an event, a check task ending or the watcher closing, whichever comes first
+            getter = asyncio.ensure_future(self.queue.get())
+            closing = asyncio.ensure_future(self._closing.wait())
+            try:
+                await asyncio.wait([getter, closing, *running], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                getter.cancel()
+                closing.cancel()
+            if getter.done() and not getter.cancelled():
+                return getter.result()
+    
+    async def aclose(self):
+        """Cancel the checks and wait for them to unwind"""
+        self.closed = True
+        self._closing.set()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+    
+    async def __aenter__(self) -> 'Watcher':
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+def watch(
+    targets: Iterable[Union[ParkingMonitor, Dict]],
+    interval: Optional[float] = None,
+    persist: bool = False,
+    notify: bool = False,
+    summary: bool = False,
+    max_pending: int = 100,
+    state_dir: str = "data/state"
+) -> Watcher:
+    """
+    Check targets periodically and yield CheckResult, Transition and
+    CheckError events as they happen
+        
+        async with watch(config['targets'].values(), interval=30) as events:
+            async for event in events:
+                if event.kind == 'transition' and event.transition == 'available':
+                    ...
+    
+    Args:
+        targets: ParkingMonitor instances, or target dicts from load_config
+            (monitors are built for those, sharing one page load per URL)
+        interval: Seconds between checks of each target (default: the
+            target's configured interval, or 60; a monitor built with
+            for_target() knows its target's)
+        persist: Save state, snapshots and check history like check_and_notify
+        notify: Send alerts to the notification channels and subscribers
+        summary: Print the check summary after every check
+        max_pending: Events queued before the checks pause
+        state_dir: Where monitors built from target dicts keep their state
+    """
+    shared = None
+    monitors = []
+    intervals = []
+    for target in targets:
+        if isinstance(target, ParkingMonitor):
+            monitors.append(target)
+            intervals.append(interval or target.interval or DEFAULT_INTERVAL)
+            continue
+        if shared is None:
+            shared = {
+                'check_logger': CheckLogger(),
+                'proxy_pool': ProxyPool.from_env(),
+                'subscriptions': SubscriptionStore.from_env(),
+                'page_flight': SingleFlight(ttl=float(os.environ.get('PAGE_CACHE_TTL', 2))),
+                'page_targets': PageTargets()
+            }
+        monitors.append(ParkingMonitor.for_target(target, state_dir, **shared))
+        intervals.append(interval or target.get('interval') or DEFAULT_INTERVAL)
+    return Watcher(monitors, intervals, persist=persist, notify=notify, summary=summary, max_pending=max_pending)
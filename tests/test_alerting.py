@@ -0,0 +1,83 @@
+"""
+Tests for the alert state machine's hysteresis
+"""
+
+from datetime import datetime, timedelta
+
+from src.alerting import AVAILABLE, LEAVING, SOLD_OUT, AlertStateMachine
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+def _at(minutes: float) -> datetime:
+    return NOW + timedelta(minutes=minutes)
+
+def test_first_availability_alerts_straight_away():
+    machine = AlertStateMachine()
+    assert machine.observe('lot-a', 'sold_out', NOW) is None
+    decision = machine.observe('lot-a', 'available', _at(1))
+    assert decision == {'kind': 'available', 'listing_id': 'lot-a', 'status': 'available', 'previous_status': 'sold_out'}
+    assert machine.state['lot-a']['state'] == AVAILABLE
+
+def test_flap_is_suppressed():
+    machine = AlertStateMachine(sold_out_confirmations=2)
+    machine.observe('lot-a', 'sold_out', NOW)
+    machine.observe('lot-a', 'available', _at(1))
+    assert machine.observe('lot-a', 'sold_out', _at(2)) is None
+    assert machine.state['lot-a']['state'] == LEAVING
+    # Back before being confirmed sold out: no second alert
+    assert machine.observe('lot-a', 'available', _at(3)) is None
+    assert machine.state['lot-a']['state'] == AVAILABLE
+
+def test_sold_out_is_confirmed():
+    machine = AlertStateMachine(sold_out_confirmations=2)
+    machine.observe('lot-a', 'sold_out', NOW)
+    machine.observe('lot-a', 'available', _at(1))
+    machine.observe('lot-a', 'sold_out', _at(2))
+    decision = machine.observe('lot-a', 'sold_out', _at(3))
+    assert (decision['kind'], decision['previous_status']) == ('sold_out', 'available')
+    assert machine.state['lot-a']['state'] == SOLD_OUT
+
+def test_unknown_never_moves_a_listing():
+    machine = AlertStateMachine(sold_out_confirmations=1)
+    machine.observe('lot-a', 'sold_out', NOW)
+    machine.observe('lot-a', 'available', _at(1))
+    assert machine.observe('lot-a', 'unknown', _at(2)) is None
+    assert machine.state['lot-a']['state'] == AVAILABLE
+
+def test_realert_after_the_interval():
+    machine = AlertStateMachine(realert_interval=1800)
+    machine.observe('lot-a', 'sold_out', NOW)
+    machine.observe('lot-a', 'available', _at(1))
+    assert machine.observe('lot-a', 'available', _at(20)) is None
+    assert machine.observe('lot-a', 'available', _at(31))['kind'] == 'still_available'
+    assert machine.observe('lot-a', 'available', _at(40)) is None
+
+def test_known_available_listing_does_not_alert_on_first_sight():
+    machine = AlertStateMachine()
+    assert machine.observe('lot-a', 'available', NOW, previous_status='available') is None
+    # A brand new listing starts sold out, so it alerts
+    assert machine.observe('lot-b', 'available', NOW)['previous_status'] is None
+
+def test_undelivered_decision_is_made_again():
+    machine = AlertStateMachine()
+    machine.observe('lot-a', 'sold_out', NOW)
+    machine.observe('lot-a', 'available', _at(1))
+    machine.undelivered('lot-a', 'available')
+    assert machine.state['lot-a']['state'] == SOLD_OUT
+    assert machine.observe('lot-a', 'available', _at(2))['kind'] == 'available'
+
+def test_undelivered_new_listing_is_retried_once():
+    machine = AlertStateMachine()
+    machine.observe('lot-a', 'sold_out', NOW)
+    machine.undelivered('lot-a', 'new_listing')
+    assert machine.observe('lot-a', 'sold_out', _at(1))['kind'] == 'new_listing'
+    assert machine.observe('lot-a', 'sold_out', _at(2)) is None
+
+def test_state_round_trips():
+    machine = AlertStateMachine()
+    machine.observe('lot-a', 'sold_out', NOW)
+    machine.observe('lot-a', 'available', _at(1))
+    restored = AlertStateMachine(state=machine.to_dict())
+    assert restored.observe('lot-a', 'available', _at(2)) is None
+    restored.forget('lot-a')
+    assert 'lot-a' not in restored.state
@@ -0,0 +1,84 @@
+"""
+Tests for the run-length encoded check history
+"""
+
+import json
+
+from src.check_logger import CheckLogger
+
+def _logger(tmp_path, **options) -> CheckLogger:
+    return CheckLogger(str(tmp_path / 'history.json'), str(tmp_path / 'rollups.json'), **options)
+
+def test_repeated_checks_collapse_into_one_interval(tmp_path):
+    check_logger = _logger(tmp_path)
+    for _ in range(3):
+        check_logger.log_check('sold_out', "$10.00", target="Lot A")
+    check_logger.log_check('available', "$10.00", target="Lot A")
+    
+    intervals = check_logger.get_recent_intervals(target="Lot A")
+    assert [(interval['status'], interval['check_count']) for interval in intervals] == [('sold_out', 3), ('available', 1)]
+    # Only the transitions were sampled
+    assert [sample['status'] for sample in check_logger.get_recent_checks()] == ['sold_out', 'available']
+    assert check_logger.rollups.get_target("Lot A")['checks'] == 4
+
+def test_targets_keep_separate_intervals(tmp_path):
+    check_logger = _logger(tmp_path)
+    check_logger.log_check('sold_out', "$10.00", target="Lot A")
+    check_logger.log_check('available', "$12.00", target="Lot B")
+    check_logger.log_check('sold_out', "$10.00", target="Lot A")
+    
+    assert check_logger.get_recent_intervals(target="Lot A")[0]['check_count'] == 2
+    assert check_logger.get_last_available_time("Lot A") is None
+    assert check_logger.get_last_became_available_time("Lot B") is not None
+
+def test_every_nth_check_and_notifications_are_sampled(tmp_path):
+    check_logger = _logger(tmp_path, sample_every=3, max_samples=3)
+    for _ in range(6):
+        check_logger.log_check('sold_out', "$10.00", target="Lot A")
+    check_logger.log_check('sold_out', "$10.00", target="Lot A", notification_sent=True)
+    
+    samples = check_logger.get_recent_checks()
+    # The first check, checks 3 and 6, then the notification, capped at max_samples
+    assert len(samples) == 3
+    assert samples[-1]['notification_sent']
+    assert check_logger.get_recent_intervals()[0]['notified']
+
+def test_text_log_only_gets_transitions(tmp_path):
+    check_logger = _logger(tmp_path)
+    check_logger.log_check('sold_out', "$10.00", target="Lot A")
+    check_logger.log_check('sold_out', "$10.00", target="Lot A")
+    check_logger.log_check('available', "$10.00", target="Lot A")
+    
+    text = (tmp_path / 'history.txt').read_text()
+    assert text.count("Lot A") == 2
+    assert "PARKING AVAILABLE" in text
+    assert "(was sold_out x2" in text
+
+def test_old_check_list_is_migrated(tmp_path):
+    checks = [
+        {'timestamp': "2026-01-01T09:00:00", 'target': "Lot A", 'status': 'sold_out', 'price': "$10.00"},
+        {'timestamp': "2026-01-01T09:05:00", 'target': "Lot A", 'status': 'sold_out', 'price': "$10.00"},
+        {'timestamp': "2026-01-01T09:10:00", 'status': 'available', 'price': "$10.00", 'notification_sent': True}
+    ]
+    (tmp_path / 'history.json').write_text(json.dumps(checks))
+    check_logger = _logger(tmp_path)
+    
+    intervals = check_logger.get_recent_intervals()
+    assert [(interval['target'], interval['check_count']) for interval in intervals] == [("Lot A", 2), ("default", 1)]
+    assert intervals[-1]['notified']
+    assert intervals[0]['last_seen'] == "2026-01-01T09:05:00"
+
+def test_history_survives_a_reload(tmp_path):
+    _logger(tmp_path).log_check('sold_out', "$10.00", target="Lot A")
+    check_logger = _logger(tmp_path)
+    check_logger.log_check('sold_out', "$10.00", target="Lot A")
+    assert check_logger.get_recent_intervals()[0]['check_count'] == 2
+
+def test_restored_history_is_not_written(tmp_path):
+    history = {'version': CheckLogger.HISTORY_VERSION, 'intervals': [], 'samples': []}
+    check_logger = _logger(tmp_path, history=history, rollups={'version': 1, 'targets': {}})
+    check_logger.log_check('available', "$10.00", target="Lot A")
+    
+    assert history['intervals'][0]['status'] == 'available'
+    assert not (tmp_path / 'history.json').exists()
+    assert not (tmp_path / 'rollups.json').exists()
@@ -0,0 +1,64 @@
+"""
+Tests for the per-target circuit breaker
+"""
+
+from datetime import datetime, timedelta
+
+from src.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+def _tripped(**options) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=2, base_delay=60, jitter=0, **options)
+    assert breaker.record_failure(NOW) is None
+    assert breaker.record_failure(NOW) == 'degraded'
+    return breaker
+
+def test_opens_after_the_threshold():
+    breaker = _tripped()
+    assert breaker.is_open
+    assert breaker.retry_at == (NOW + timedelta(seconds=60)).isoformat()
+    assert not breaker.allow_request(NOW + timedelta(seconds=59))
+
+def test_half_open_allows_a_single_probe():
+    breaker = _tripped()
+    later = NOW + timedelta(seconds=60)
+    assert breaker.allow_request(later)
+    assert breaker.state['state'] == HALF_OPEN
+    assert not breaker.allow_request(later)
+
+def test_failed_probe_reopens_with_a_doubled_delay():
+    breaker = _tripped()
+    later = NOW + timedelta(seconds=60)
+    breaker.allow_request(later)
+    # Still the same incident: no second 'degraded' alert
+    assert breaker.record_failure(later) is None
+    assert breaker.state['trips'] == 2
+    assert breaker.retry_at == (later + timedelta(seconds=120)).isoformat()
+
+def test_backoff_is_capped():
+    breaker = CircuitBreaker(state={'trips': 10}, base_delay=60, max_delay=300, jitter=0)
+    assert breaker._backoff_delay() == 300
+
+def test_success_closes_and_reports_recovery():
+    breaker = _tripped()
+    breaker.allow_request(NOW + timedelta(seconds=60))
+    assert breaker.record_success() == 'recovered'
+    assert breaker.state['state'] == CLOSED
+    assert (breaker.state['failures'], breaker.state['trips'], breaker.retry_at) == (0, 0, None)
+    # Nothing was alerted this time
+    assert CircuitBreaker().record_success() is None
+
+def test_state_round_trips_without_a_stale_probe():
+    breaker = _tripped()
+    breaker.allow_request(NOW + timedelta(seconds=60))
+    restored = CircuitBreaker(state=breaker.to_dict())
+    assert restored.state['state'] == HALF_OPEN
+    # The probe in flight when the last run ended never finished
+    assert restored.allow_request(NOW + timedelta(seconds=60))
+
+def test_jitter_stays_within_bounds():
+    breaker = CircuitBreaker(base_delay=100, jitter=0.2)
+    breaker.state['trips'] = 1
+    delays = [breaker._backoff_delay() for _ in range(50)]
+    assert all(80 <= delay <= 120 for delay in delays)
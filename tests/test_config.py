@@ -0,0 +1,78 @@
+"""
+Tests for config normalization and diffing
+"""
+
+import json
+
+import pytest
+
+from src.config import DEFAULT_INTERVAL, DEFAULT_TARGET, diff_configs, load_config, normalize_config
+
+def _config(*targets, **options):
+    return normalize_config({'targets': list(targets), **options})
+
+def test_defaults_fill_in(monkeypatch):
+    monkeypatch.setenv('DISCORD_WEBHOOK_URL', "https://discord.example/env")
+    config = _config(
+        {'name': "Lot A Parking", 'url': "https://example.com/a"},
+        {'name': "Lot B", 'url': "https://example.com/b", 'interval': 15, 'discord_webhook_url': "https://discord.example/b"},
+        interval=30
+    )
+    lot_a = config['targets']['lot-a-parking']
+    assert lot_a == {
+        'id': 'lot-a-parking', 'name': "Lot A Parking", 'url': "https://example.com/a",
+        'interval': 30.0, 'discord_webhook_url': "https://discord.example/env"
+    }
+    assert config['targets']['lot-b']['interval'] == 15.0
+    assert config['targets']['lot-b']['discord_webhook_url'] == "https://discord.example/b"
+
+def test_invalid_targets_are_skipped():
+    config = _config({'name': "No URL"}, {'url': "https://example.com/no-name"})
+    assert config['targets'] == {}
+
+def test_missing_file_gives_the_default_target(tmp_path):
+    config = load_config(str(tmp_path / "missing.json"))
+    [target] = config['targets'].values()
+    assert target['url'] == DEFAULT_TARGET['url']
+    assert target['interval'] == DEFAULT_INTERVAL
+
+def test_unparseable_file_raises(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text("{broken")
+    with pytest.raises(ValueError):
+        load_config(str(path))
+    path.write_text(json.dumps({'targets': [{'name': "Lot A", 'url': "https://example.com/a"}]}))
+    assert list(load_config(str(path))['targets']) == ['lot-a']
+
+def test_diff_from_nothing_adds_everything():
+    new = _config({'name': "Lot A", 'url': "https://example.com/a"})
+    diff = diff_configs(None, new)
+    assert [target['id'] for target in diff.added] == ['lot-a']
+    assert diff.has_changes
+
+def test_diff_sorts_changes_by_kind():
+    old = _config(
+        {'name': "Kept", 'url': "https://example.com/kept"},
+        {'name': "Moved", 'url': "https://example.com/old"},
+        {'name': "Faster", 'url': "https://example.com/f", 'interval': 60, 'discord_webhook_url': "https://d/1"},
+        {'name': "Gone", 'url': "https://example.com/gone"}
+    )
+    new = _config(
+        {'name': "Kept", 'url': "https://example.com/kept"},
+        {'name': "Moved", 'url': "https://example.com/new", 'interval': 5},
+        {'name': "Faster", 'url': "https://example.com/f", 'interval': 10, 'discord_webhook_url': "https://d/2"},
+        {'name': "New", 'url': "https://example.com/new-lot"}
+    )
+    diff = diff_configs(old, new)
+    ids = lambda targets: [target['id'] for target in targets]
+    assert ids(diff.added) == ['new']
+    assert ids(diff.removed) == ['gone']
+    # A URL change restarts the target; its other changes come with the restart
+    assert ids(diff.restarted) == ['moved']
+    assert ids(diff.interval_changed) == ['faster']
+    assert ids(diff.webhook_changed) == ['faster']
+    assert diff.summary() == "1 added, 1 removed, 1 restarted, 1 interval changes, 1 webhook changes"
+
+def test_identical_configs_have_no_changes():
+    config = _config({'name': "Lot A", 'url': "https://example.com/a"})
+    assert not diff_configs(config, _config({'name': "Lot A", 'url': "https://example.com/a"})).has_changes
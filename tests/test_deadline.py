@@ -0,0 +1,84 @@
+"""
+Tests for the per-check deadline
+"""
+
+import asyncio
+import math
+
+import pytest
+
+from src.deadline import Deadline, DeadlineExceeded
+
+def test_no_budget_never_expires():
+    deadline = Deadline()
+    assert deadline.remaining() == math.inf
+    assert not deadline.expired
+    assert deadline.timeout_ms(30000) == 30000
+    
+    async def run():
+        return await deadline.run('scrape', asyncio.sleep(0, result='done'), reserve=10)
+    
+    assert asyncio.run(run()) == 'done'
+    assert 'scrape' in deadline.phases
+
+def test_timeout_ms_is_capped_and_never_zero():
+    deadline = Deadline(0.5)
+    assert deadline.timeout_ms(100) == 100
+    assert deadline.timeout_ms(30000) <= 500
+    deadline.expires_at -= 10
+    assert deadline.timeout_ms(30000) == 1
+
+def test_run_names_the_innermost_step_that_overran():
+    deadline = Deadline(0.05)
+    
+    async def scrape():
+        with deadline.step('navigate'):
+            await asyncio.sleep(1)
+    
+    async def run():
+        await deadline.run('scrape', scrape())
+    
+    with pytest.raises(DeadlineExceeded) as raised:
+        asyncio.run(run())
+    assert raised.value.phase == 'navigate'
+    assert deadline.to_dict()['exceeded_in'] == 'navigate'
+
+def test_reserve_is_kept_for_later_phases():
+    deadline = Deadline(0.4)
+    
+    async def run():
+        with pytest.raises(DeadlineExceeded):
+            # A quarter of the budget at most is held back
+            await deadline.run('scrape', asyncio.sleep(1), reserve=10)
+        assert 0 < deadline.remaining() <= 0.1
+        # The cutoff is back at the full budget for the next phase
+        assert not deadline.expired
+        return await deadline.run('notify', asyncio.sleep(0, result='sent'))
+    
+    assert asyncio.run(run()) == 'sent'
+    assert deadline.exceeded_in == 'scrape'
+
+def test_steps_of_the_same_name_add_up():
+    deadline = Deadline(5)
+    
+    async def step(name):
+        with deadline.step(name):
+            await asyncio.sleep(0.02)
+    
+    async def run():
+        await asyncio.gather(step('extract'), step('extract'))
+    
+    asyncio.run(run())
+    assert deadline.phases['extract'] >= 40
+    assert deadline.exceeded_in is None
+
+def test_sleep_stops_at_the_deadline():
+    deadline = Deadline(0.05)
+    
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await deadline.sleep(5)
+        return loop.time() - started
+    
+    assert asyncio.run(run()) < 1
@@ -0,0 +1,47 @@
+"""
+Tests for the diagnostics ring buffer and failure directories
+"""
+
+import json
+import time
+
+from src.diagnostics import DiagnosticsRecorder
+
+def _fail(recorder, name="Lot A"):
+    diagnostics = recorder.begin(name, "https://example.com/reserve")
+    diagnostics.mark('browser_ready')
+    diagnostics.note('error', "timeout")
+    directory = recorder.finish(diagnostics, 'failed', failure=True)
+    # Directory names are timestamped to the microsecond
+    time.sleep(0.001)
+    return directory
+
+def test_successful_checks_are_only_kept_in_memory(tmp_path):
+    recorder = DiagnosticsRecorder(str(tmp_path), max_checks=2)
+    for _ in range(3):
+        assert recorder.finish(recorder.begin("Lot A", "https://example.com"), 'ok') is None
+    assert len(recorder.recent) == 2
+    assert not any(tmp_path.iterdir())
+
+def test_failure_is_saved_with_recent_checks(tmp_path):
+    recorder = DiagnosticsRecorder(str(tmp_path))
+    recorder.finish(recorder.begin("Lot A", "https://example.com"), 'ok')
+    directory = _fail(recorder)
+    
+    saved = json.loads((directory / 'diagnostics.json').read_text())
+    assert saved['check']['outcome'] == 'failed'
+    assert saved['check']['notes'] == {'error': "timeout"}
+    assert [event['event'] for event in saved['check']['events']] == ['browser_ready', 'finished']
+    assert [check['outcome'] for check in saved['recent_checks']] == ['ok']
+
+def test_only_the_newest_failures_are_kept(tmp_path):
+    recorder = DiagnosticsRecorder(str(tmp_path), keep_failures=2)
+    directories = [_fail(recorder) for _ in range(4)]
+    assert sorted(tmp_path.iterdir()) == directories[-2:]
+
+def test_keeping_no_failures_still_keeps_the_latest(tmp_path):
+    recorder = DiagnosticsRecorder(str(tmp_path), keep_failures=0)
+    _fail(recorder)
+    latest = _fail(recorder)
+    assert list(tmp_path.iterdir()) == [latest]
+    assert (latest / 'diagnostics.json').exists()
@@ -0,0 +1,84 @@
+"""
+Tests for the hedge delay, the hedge budget and hedged fetches
+"""
+
+import asyncio
+
+import pytest
+
+from src.hedging import HedgePolicy, run_hedged
+
+def _attempts(*steps):
+    """Attempt factory: each step is (delay, result or exception)"""
+    async def attempt(number):
+        delay, outcome = steps[number]
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return attempt
+
+def test_hedge_delay_is_a_clamped_percentile():
+    policy = HedgePolicy(default_delay=15, min_delay=5, max_delay=20)
+    assert policy.hedge_delay() == 15
+    for seconds in (1, 2, 3, 4, 6):
+        policy.record_latency(seconds)
+    assert policy.hedge_delay() == 6
+    policy.record_latency(60)
+    assert policy.hedge_delay() == 20
+    policy = HedgePolicy(state={'latencies': [0.1] * 10})
+    assert policy.hedge_delay() == 5
+
+def test_latency_window_is_bounded():
+    policy = HedgePolicy(window=3)
+    for seconds in range(5):
+        policy.record_latency(seconds)
+    assert policy.state['latencies'] == [2, 3, 4]
+
+def test_hedge_budget():
+    policy = HedgePolicy(max_hedge_ratio=0.1)
+    policy.state['fetches'] = 10
+    assert policy.try_acquire_hedge()
+    assert policy.try_acquire_hedge()
+    assert not policy.try_acquire_hedge()
+    assert policy.state['hedges_fired'] == 2
+
+def test_fast_primary_doesnt_hedge():
+    policy = HedgePolicy(default_delay=1)
+    assert asyncio.run(run_hedged(_attempts((0.01, 'primary')), policy)) == 'primary'
+    assert policy.state['hedges_fired'] == 0
+    assert len(policy.state['latencies']) == 1
+
+def test_hedge_wins_and_every_attempt_is_recorded():
+    policy = HedgePolicy(default_delay=0.05)
+    result = asyncio.run(run_hedged(_attempts((1.0, 'primary'), (0.05, 'hedge')), policy))
+    assert result == 'hedge'
+    assert policy.state['hedges_won'] == 1
+    # Only the hedge finished, timed from its own start; the cancelled primary isn't recorded
+    [hedge] = policy.state['latencies']
+    assert 0.05 <= hedge < 0.1
+
+def test_losing_attempts_are_recorded_when_they_finish():
+    policy = HedgePolicy(default_delay=0.02)
+    result = asyncio.run(run_hedged(_attempts((0.05, None), (0.1, 'hedge')), policy))
+    assert result == 'hedge'
+    assert len(policy.state['latencies']) == 2
+
+def test_all_attempts_failing_reraises_the_first_error():
+    policy = HedgePolicy(default_delay=0.01)
+    attempts = _attempts((0.03, RuntimeError("primary")), (0.05, RuntimeError("hedge")))
+    with pytest.raises(RuntimeError, match="primary"):
+        asyncio.run(run_hedged(attempts, policy))
+    assert len(policy.state['latencies']) == 2
+
+def test_nothing_found_returns_none():
+    policy = HedgePolicy(default_delay=1)
+    assert asyncio.run(run_hedged(_attempts((0, None)), policy)) is None
+
+def test_hedging_doesnt_push_the_delay_up():
+    policy = HedgePolicy(default_delay=0.05, min_delay=0.05, max_delay=1, max_hedge_ratio=1)
+    for _ in range(6):
+        asyncio.run(run_hedged(_attempts((1.0, 'primary'), (0.02, 'hedge')), policy))
+    assert policy.state['hedges_won'] == 6
+    assert all(latency < 0.05 for latency in policy.state['latencies'])
+    assert policy.hedge_delay() == 0.05
@@ -0,0 +1,61 @@
+"""
+Tests for the streaming HTTP fast path
+"""
+
+import asyncio
+import socket
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from src.http_fetch import fetch_listings
+
+LISTINGS_HTML = (
+    "<html><body>"
+    "<div><h3>Lot A Parking</h3><p>$67.45</p><button>Sold Out</button></div>"
+    "<div><h3>Lot B Garage</h3><p>$12.00</p><button>Add to Cart</button></div>"
+)
+PAGE = (LISTINGS_HTML + "<p>Terms and conditions</p>" * 5000 + "</body></html>").encode()
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _fetch(path: str, watched, **options):
+    async def page(request):
+        return web.Response(body=PAGE, content_type='text/html', charset='utf-8')
+    
+    async def run():
+        app = web.Application()
+        app.router.add_get('/reserve', page)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        port = _free_port()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        try:
+            return await fetch_listings(f"http://127.0.0.1:{port}{path}", watched, **options)
+        finally:
+            await runner.cleanup()
+    
+    return asyncio.run(run())
+
+def test_stops_once_the_watched_listings_are_found():
+    snapshot, complete, stats = _fetch('/reserve', ['lot-a-parking'], chunk_size=1024)
+    assert snapshot['lot-a-parking']['status'] == 'sold_out'
+    assert snapshot['lot-a-parking']['price'] == '$67.45'
+    assert not complete
+    assert stats['early_exit']
+    assert stats['bytes_read'] < stats['content_length'] == len(PAGE)
+
+def test_reads_the_whole_page_when_a_listing_is_missing():
+    snapshot, complete, stats = _fetch('/reserve', ['lot-z'], chunk_size=1024)
+    assert complete and not stats['early_exit']
+    assert stats['bytes_read'] == len(PAGE)
+    # The last listing is only complete once the page ends
+    assert snapshot['lot-b-garage']['status'] == 'available'
+
+def test_error_status_raises():
+    with pytest.raises(aiohttp.ClientResponseError):
+        _fetch('/missing', ['lot-a-parking'])
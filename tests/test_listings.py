@@ -0,0 +1,135 @@
+"""
+Tests for listing extraction, streaming and snapshot diffs
+"""
+
+from src.listings import (
+    ListingStreamParser, SnapshotStore, diff_snapshots, extract_listings,
+    listings_from_containers, listings_from_json, make_listing, parse_status
+)
+
+PAGE_TEXT = """
+Reserve Parking
+Lot A Parking
+$67.45
+Sold Out
+Lot B Garage
+$12.00
+Add to Cart
+"""
+
+# A listing with a date range line that starts like a status button
+DATE_RANGE_TEXT = """
+Lot A Parking
+$67.45
+Available 8/15 - 12/20
+Sold Out
+Lot B Garage
+$12.00
+Available 8/15 - 12/20
+Add to Cart
+"""
+
+DATE_RANGE_HTML = (
+    "<div><h3>Lot A Parking</h3><p>$67.45</p><p>Available 8/15 - 12/20</p><button>Sold Out</button></div>"
+    "<div><h3>Lot B Garage</h3><p>$12.00</p><p>Available 8/15 - 12/20</p><button>Add to Cart</button></div>"
+)
+
+def test_parse_status_sold_out_wins():
+    assert parse_status("Available 8/15 - 12/20 Sold Out") == 'sold_out'
+    assert parse_status("Add to Cart") == 'available'
+    assert parse_status("Coming soon") == 'unknown'
+
+def test_extract_listings():
+    snapshot = extract_listings(PAGE_TEXT)
+    assert snapshot == {
+        'lot-a-parking': make_listing('Lot A Parking', 'sold_out', '$67.45'),
+        'lot-b-garage': make_listing('Lot B Garage', 'available', '$12.00')
+    }
+
+def test_extract_listings_name_and_price_on_one_line():
+    snapshot = extract_listings("Lot A Parking $67.45\nAdd to Cart\n")
+    assert snapshot['lot-a-parking']['price'] == '$67.45'
+    assert snapshot['lot-a-parking']['status'] == 'available'
+
+def test_extract_listings_later_sold_out_line_wins():
+    snapshot = extract_listings(DATE_RANGE_TEXT)
+    assert snapshot['lot-a-parking']['status'] == 'sold_out'
+    assert snapshot['lot-b-garage']['status'] == 'available'
+
+def test_extract_listings_status_lines_between_other_lines():
+    snapshot = extract_listings("Lot A Parking\n$67.45\nAvailable 8/15 - 12/20\nMon-Fri only\nSold Out\n")
+    assert snapshot['lot-a-parking']['status'] == 'sold_out'
+
+def test_stream_parser_matches_text_parser():
+    parser = ListingStreamParser()
+    parser.feed(DATE_RANGE_HTML)
+    parser.close()
+    assert parser.snapshot == extract_listings(DATE_RANGE_TEXT)
+
+def test_stream_parser_chunked_and_done():
+    parser = ListingStreamParser(watched={'lot-a-parking'})
+    for start in range(0, len(DATE_RANGE_HTML), 7):
+        parser.feed(DATE_RANGE_HTML[start:start + 7])
+        if parser.done:
+            break
+    assert parser.done
+    # Not done before the listing's last status line has been seen
+    assert parser.snapshot['lot-a-parking']['status'] == 'sold_out'
+
+def test_stream_parser_skips_hidden_text():
+    parser = ListingStreamParser()
+    parser.feed("<script>var x = 'Lot Z $1.00 Sold Out';</script><p>Lot A</p><p>$5</p><button>Sold Out</button>")
+    parser.close()
+    assert list(parser.snapshot) == ['lot-a']
+
+def test_listings_from_containers():
+    snapshot = listings_from_containers([
+        "Lot A Parking\n$67.45\nAvailable 8/15 - 12/20\nSold Out",
+        "Lot B Garage\n$12.00\nAdd to Cart"
+    ])
+    assert snapshot['lot-a-parking']['status'] == 'sold_out'
+    assert snapshot['lot-b-garage'] == make_listing('Lot B Garage', 'available', '$12.00')
+
+def test_listings_from_json():
+    snapshot = listings_from_json({'data': {'products': [
+        {'name': 'Lot A Parking', 'price': 67.45, 'soldOut': True},
+        {'title': 'Lot B Garage', 'amount': '$12', 'quantityAvailable': 3},
+        {'name': 'Head office', 'state': 'CA'}
+    ]}})
+    assert snapshot == {
+        'lot-a-parking': make_listing('Lot A Parking', 'sold_out', '$67.45'),
+        'lot-b-garage': make_listing('Lot B Garage', 'available', '$12')
+    }
+
+def test_diff_snapshots():
+    previous = {
+        'a': make_listing('A', 'sold_out', '$10'),
+        'b': make_listing('B', 'available', '$5'),
+        'c': make_listing('C', 'available', '$7')
+    }
+    current = {
+        'a': make_listing('A', 'available', '$12'),
+        'b': make_listing('B', 'available', '$5'),
+        'd': make_listing('D', 'sold_out', '$9')
+    }
+    diff = diff_snapshots(previous, current)
+    assert [listing['id'] for listing in diff.added] == ['d']
+    assert [listing['id'] for listing in diff.removed] == ['c']
+    assert diff.status_changed == [(previous['a'], current['a'])]
+    assert diff.price_changed == [(previous['a'], current['a'])]
+    assert diff.has_changes
+    assert not diff_snapshots(current, current).has_changes
+
+def test_snapshot_store_round_trip(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshot.json"))
+    assert store.load() is None
+    snapshot = extract_listings(PAGE_TEXT)
+    store.save(snapshot, url="https://example.com")
+    assert SnapshotStore(str(tmp_path / "snapshot.json")).load() == snapshot
+
+def test_snapshot_store_in_memory(tmp_path):
+    rows = SnapshotStore.to_rows(extract_listings(PAGE_TEXT))
+    store = SnapshotStore(str(tmp_path / "snapshot.json"), initial=rows)
+    assert store.load() == SnapshotStore.from_rows(rows)
+    store.save({})
+    assert not (tmp_path / "snapshot.json").exists()
@@ -0,0 +1,71 @@
+"""
+Tests for the load test's flip schedule and detection report
+"""
+
+from src.loadtest import FlipSchedule, _percentile, detection_report
+
+def _alert(name, t, title="🚗 PARKING ALERT"):
+    return {'title': title, 'description': name, 'time': t}
+
+def test_schedule_alternates_after_the_warmup():
+    schedule = FlipSchedule(["Lot A", "Lot B"], duration=3600, warmup=60, mean_sold_out=60, mean_available=30)
+    for name, changes in schedule.changes.items():
+        assert changes and changes[0][0] >= 60
+        assert [status for _, status in changes[:4]] == ['available', 'sold_out', 'available', 'sold_out']
+        times = [t for t, _ in changes]
+        assert times == sorted(times) and times[-1] < 3600
+        assert all(later - earlier >= 1 for earlier, later in zip(times, times[1:]))
+    # Seeded, so every process of a run sees the same flips
+    assert FlipSchedule(["Lot A", "Lot B"], 3600, 60, 60, 30).to_dict() == schedule.to_dict()
+
+def test_status_at_follows_the_changes():
+    schedule = FlipSchedule([], duration=0, warmup=0)
+    schedule.changes = {'Lot A': [(10.0, 'available'), (20.0, 'sold_out')]}
+    assert schedule.status_at('Lot A', 9.9) == 'sold_out'
+    assert schedule.status_at('Lot A', 10.0) == 'available'
+    assert schedule.status_at('Lot A', 25) == 'sold_out'
+    assert schedule.status_at('Lot Z', 15) == 'sold_out'
+
+def test_percentile_edges():
+    assert _percentile([], 0.5) is None
+    assert _percentile([4.0], 0.99) == 4.0
+    assert _percentile([3, 1, 2, 4], 0) == 1
+    assert _percentile([3, 1, 2, 4], 0.5) == 3
+    # Never past the largest value
+    assert _percentile([3, 1, 2, 4], 0.99) == _percentile([3, 1, 2, 4], 1) == 4
+    assert _percentile([0.12345], 0.5) == 0.123
+
+def test_detection_report_matches_alerts_to_flips():
+    started = 1000.0
+    schedule = {
+        # Detected, then a duplicate alert, then a flip with no alert
+        'Lot A': [(10, 'available'), (20, 'sold_out'), (30, 'available'), (40, 'sold_out'), (50, 'available')],
+        # Flips too close to the end to be called missed
+        'Lot B': [(95, 'available')]
+    }
+    received = [
+        _alert('Lot A', 1012.5),
+        _alert('Lot A', 1013.0),
+        # A re-alert or another listing's alert detects nothing
+        _alert('Lot A', 1031.0, title="🔁 Still available"),
+        _alert('Lot A', 1034.0),
+        _alert('Lot C', 1040.0)
+    ]
+    report = detection_report(schedule, received, started, ended=1100.0, grace=10)
+    
+    assert (report['flips_to_available'], report['detected'], report['missed'], report['pending']) == (4, 2, 1, 1)
+    assert report['duplicate_alerts'] == 1
+    assert report['alerts_received'] == 5
+    assert report['latency_seconds'] == {'p50': 4.0, 'p90': 4.0, 'p99': 4.0, 'max': 4.0}
+
+def test_alert_window_ends_at_the_next_flip():
+    schedule = {'Lot A': [(10, 'available'), (20, 'sold_out'), (30, 'available')]}
+    # Late for the first flip, so it counts for the second one
+    report = detection_report(schedule, [_alert('Lot A', 130.0)], started=100.0, ended=200.0, grace=10)
+    assert (report['detected'], report['missed'], report['duplicate_alerts']) == (1, 1, 0)
+    assert report['latency_seconds']['max'] == 0.0
+
+def test_detection_report_without_alerts():
+    report = detection_report({'Lot A': []}, [], started=0, ended=60, grace=10)
+    assert report['flips_to_available'] == 0
+    assert report['latency_seconds'] == {'p50': None, 'p90': None, 'p99': None, 'max': None}
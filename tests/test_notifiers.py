@@ -0,0 +1,208 @@
+"""
+Tests for notification channels: retries, timeouts and concurrent dispatch
+"""
+
+import asyncio
+import email
+import email.policy
+import json
+import socketserver
+import threading
+import time
+
+import pytest
+
+from src.deadline import Deadline
+from src.notifiers import (
+    EmailChannel, NotificationChannel, Notifier, StdoutChannel, WebhookChannel,
+    alert_to_payload, alert_to_text, build_channel
+)
+
+ALERT = {
+    'title': "Lot A Parking",
+    'description': "✅ AVAILABLE",
+    'color': 0x00ff00,
+    'fields': [{'name': "Price", 'value': "$10.00"}],
+    'url': "https://example.com/reserve",
+    'timestamp': None
+}
+
+class ScriptedChannel(NotificationChannel):
+    """Channel whose attempts follow a script: True, False, an exception or a delay"""
+    
+    kind = 'scripted'
+    
+    def __init__(self, script, **kwargs):
+        super().__init__(retry_delay=0, **kwargs)
+        self.script = list(script)
+        self.sent = 0
+    
+    async def send(self, alert):
+        self.sent += 1
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        if isinstance(step, float):
+            await asyncio.sleep(step)
+            return True
+        return step
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: every message is kept on the server"""
+    
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+    
+    def handle(self):
+        self.reply("220 localhost ready")
+        envelope = {'from': None, 'to': []}
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb == 'EHLO':
+                self.reply("250 localhost")
+            elif verb == 'MAIL':
+                envelope['from'] = command.split(':', 1)[1].strip('<> ')
+                self.reply("250 OK")
+            elif verb == 'RCPT':
+                envelope['to'].append(command.split(':', 1)[1].strip('<> '))
+                self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for line in self.rfile:
+                    if line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(line)
+                self.server.messages.append((envelope, email.message_from_bytes(b"".join(lines), policy=email.policy.default)))
+                envelope = {'from': None, 'to': []}
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPHandler)
+    server.daemon_threads = True
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_channel_base_is_abstract():
+    with pytest.raises(TypeError):
+        NotificationChannel()
+
+def test_alert_rendering():
+    payload = alert_to_payload(ALERT)
+    assert payload['fields'] == {"Price": "$10.00"}
+    assert "Price: $10.00" in alert_to_text(ALERT)
+    assert alert_to_text(ALERT).endswith("https://example.com/reserve")
+
+def test_deliver_retries_failures():
+    channel = ScriptedChannel([False, ConnectionError("reset"), True], retries=2)
+    delivery = asyncio.run(channel.deliver(ALERT))
+    assert delivery['ok']
+    assert delivery['attempts'] == 3
+    assert delivery['error'] is None
+
+def test_deliver_gives_up_after_retries():
+    channel = ScriptedChannel([False, False], retries=1)
+    delivery = asyncio.run(channel.deliver(ALERT))
+    assert not delivery['ok']
+    assert delivery['attempts'] == 2
+    assert delivery['error'] == "send returned failure"
+
+def test_timed_out_send_is_retried_only_if_cancellable():
+    channel = ScriptedChannel([1.0, True], timeout=0.05, retries=1)
+    assert asyncio.run(channel.deliver(ALERT))['ok']
+    
+    channel = ScriptedChannel([1.0, True], timeout=0.05, retries=1)
+    channel.retry_after_timeout = False
+    delivery = asyncio.run(channel.deliver(ALERT))
+    assert not delivery['ok']
+    assert channel.sent == 1
+    assert delivery['error'].startswith("timed out")
+
+def test_email_send_is_not_retried_after_timeout(monkeypatch):
+    channel = EmailChannel("localhost", 25, "from@example.com", ["to@example.com"], timeout=0.05, retries=2)
+    calls = []
+    
+    def slow_send(alert):
+        calls.append(alert)
+        time.sleep(0.2)
+        return True
+    
+    monkeypatch.setattr(channel, '_send_sync', slow_send)
+    delivery = asyncio.run(channel.deliver(ALERT))
+    assert not delivery['ok']
+    assert len(calls) == 1
+
+def test_email_is_sent_over_smtp(smtp_server):
+    host, port = smtp_server.server_address
+    channel = EmailChannel(host, port, "monitor@example.com", ["a@example.com", "b@example.com"], timeout=5)
+    delivery = asyncio.run(channel.deliver(ALERT))
+    assert delivery['ok'], delivery['error']
+    
+    [(envelope, message)] = smtp_server.messages
+    assert envelope == {'from': "monitor@example.com", 'to': ["a@example.com", "b@example.com"]}
+    assert message['Subject'] == "Lot A Parking - ✅ AVAILABLE"
+    assert "Price: $10.00" in message.get_content()
+
+def test_email_without_recipients_is_skipped(monkeypatch):
+    for name in ('DISCORD_WEBHOOK_URL', 'NOTIFY_WEBHOOK_URLS', 'NOTIFY_SOCKET', 'NOTIFY_STDOUT', 'NOTIFY_SMTP_TO'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('NOTIFY_SMTP_HOST', "smtp.example.com")
+    assert Notifier.from_env().channels == []
+    
+    monkeypatch.setenv('NOTIFY_SMTP_TO', "a@example.com, b@example.com")
+    [channel] = Notifier.from_env().channels
+    assert channel.recipients == ["a@example.com", "b@example.com"]
+
+def test_deliver_stops_at_the_deadline():
+    channel = ScriptedChannel([False, False, False], retries=2)
+    deadline = Deadline(0.001)
+    time.sleep(0.01)
+    delivery = asyncio.run(channel.deliver(ALERT, deadline))
+    assert delivery['attempts'] == 0
+    assert delivery['error'] == "check deadline exceeded"
+
+def test_dispatch_sends_to_channels_concurrently():
+    slow = [ScriptedChannel([0.1], name=f"slow-{index}") for index in range(3)]
+    failing = ScriptedChannel([False], name="failing", retries=0)
+    notifier = Notifier(slow[:2])
+    
+    async def run():
+        started = time.perf_counter()
+        deliveries = await notifier.dispatch(ALERT, extra_channels=[slow[2], failing])
+        return deliveries, time.perf_counter() - started
+    
+    deliveries, elapsed = asyncio.run(run())
+    assert [delivery['channel'] for delivery in deliveries] == ["slow-0", "slow-1", "slow-2", "failing"]
+    assert [delivery['ok'] for delivery in deliveries] == [True, True, True, False]
+    assert elapsed < 0.25
+
+def test_dispatch_without_channels():
+    assert asyncio.run(Notifier().dispatch(ALERT)) == []
+
+def test_stdout_channel_writes_json_line(capsys):
+    assert asyncio.run(StdoutChannel().send(ALERT))
+    assert json.loads(capsys.readouterr().out)['title'] == "Lot A Parking"
+
+def test_build_channel(monkeypatch):
+    monkeypatch.setenv('NOTIFY_SMTP_HOST', "smtp.example.com")
+    webhook = build_channel({'type': 'webhook', 'url': "https://hooks.example.com"}, name="ops", timeout=3)
+    assert isinstance(webhook, WebhookChannel)
+    assert (webhook.name, webhook.timeout) == ("ops", 3)
+    
+    email = build_channel({'type': 'email', 'to': "me@example.com"})
+    assert isinstance(email, EmailChannel)
+    assert (email.host, email.recipients) == ("smtp.example.com", ["me@example.com"])
+    
+    with pytest.raises(ValueError):
+        build_channel({'type': 'pager'})
@@ -0,0 +1,152 @@
+"""
+Tests for the page watcher's in-page data refreshes, with a fake page
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from src.listings import make_listing
+from src.page_watcher import PageWatcher
+
+DATA_URL = "https://example.com/api/products"
+
+def _products(status):
+    return {'products': [{'name': "Lot A Parking", 'price': 10, 'soldOut': status == 'sold_out'}]}
+
+class FakeResponse:
+    def __init__(self, url, data, method='GET', resource_type='fetch'):
+        self.url = url
+        self.headers = {'content-type': 'application/json'}
+        self.request = SimpleNamespace(
+            url=url, method=method, resource_type=resource_type,
+            headers={'accept': 'application/json', 'cookie': "secret"}, post_data=None
+        )
+        self._body = json.dumps(data)
+    
+    async def text(self):
+        return self._body
+
+class FakePage:
+    """
+    Emits scripted responses: `on_load` on goto/reload, and each call of
+    evaluate() emits the next list of `on_evaluate`
+    """
+    
+    def __init__(self, on_load=(), on_evaluate=()):
+        self.handlers = []
+        self.on_load = list(on_load)
+        self.on_evaluate = list(on_evaluate)
+        self.evaluated = []
+        self.reloads = 0
+    
+    def on(self, event, handler):
+        self.handlers.append(handler)
+    
+    async def _emit(self, responses):
+        for response in responses:
+            for handler in self.handlers:
+                handler(response)
+        # Let the watcher read the responses
+        for _ in range(3):
+            await asyncio.sleep(0)
+    
+    async def goto(self, url, **options):
+        await self._emit(self.on_load)
+    
+    async def reload(self, **options):
+        self.reloads += 1
+        await self._emit(self.on_load)
+    
+    async def evaluate(self, script, request):
+        self.evaluated.append(request)
+        await self._emit(self.on_evaluate.pop(0) if self.on_evaluate else [])
+        return 200
+    
+    async def close(self):
+        pass
+
+def _watcher(page, dom_status='available'):
+    async def new_page():
+        return page
+    
+    async def extract_snapshot(page):
+        return {'lot-a-parking': make_listing("Lot A Parking", dom_status, "$10")}
+    
+    context = SimpleNamespace(new_page=new_page)
+    return PageWatcher(context, "https://example.com/reserve", extract_snapshot=extract_snapshot, response_timeout=0.05)
+
+def test_first_load_learns_the_data_request():
+    page = FakePage(on_load=[FakeResponse(DATA_URL, _products('sold_out'), method='POST')])
+    watcher = _watcher(page)
+    snapshot = asyncio.run(watcher.refresh())
+    
+    assert snapshot['lot-a-parking']['status'] == 'sold_out'
+    assert watcher.data_request['url'] == DATA_URL
+    assert watcher.data_request['method'] == 'POST'
+    # Only the headers the request needs are replayed
+    assert watcher.data_request['headers'] == {'accept': 'application/json'}
+
+def test_refresh_reads_the_triggered_response():
+    page = FakePage(
+        on_load=[FakeResponse(DATA_URL, _products('sold_out'))],
+        on_evaluate=[[FakeResponse(DATA_URL, _products('available'))]]
+    )
+    watcher = _watcher(page)
+    
+    async def run():
+        await watcher.refresh()
+        return await watcher.refresh()
+    
+    snapshot = asyncio.run(run())
+    assert snapshot['lot-a-parking']['status'] == 'available'
+    assert page.evaluated == [watcher.data_request]
+    assert (watcher.stats['reloads'], page.reloads) == (0, 0)
+
+def test_refresh_ignores_other_listing_responses():
+    page = FakePage(
+        on_load=[FakeResponse(DATA_URL, _products('sold_out'))],
+        on_evaluate=[[
+            # Unrelated or stale in-flight requests with listing data
+            FakeResponse("https://example.com/api/recommended", _products('available')),
+            FakeResponse(DATA_URL, _products('available'), method='POST'),
+            FakeResponse(DATA_URL, _products('sold_out'))
+        ]]
+    )
+    watcher = _watcher(page)
+    
+    async def run():
+        await watcher.refresh()
+        return await watcher.refresh()
+    
+    assert asyncio.run(run())['lot-a-parking']['status'] == 'sold_out'
+
+def test_refresh_falls_back_to_a_reload():
+    page = FakePage(
+        on_load=[FakeResponse(DATA_URL, _products('sold_out'))],
+        on_evaluate=[[FakeResponse("https://example.com/api/recommended", _products('sold_out'))]]
+    )
+    watcher = _watcher(page, dom_status='available')
+    
+    async def run():
+        await watcher.refresh()
+        return await watcher.refresh()
+    
+    snapshot = asyncio.run(run())
+    # No matching response within the timeout: the page is reloaded and read from the DOM
+    assert snapshot['lot-a-parking']['status'] == 'available'
+    assert (watcher.stats['reloads'], page.reloads) == (1, 1)
+
+def test_page_without_data_responses_reloads():
+    page = FakePage(on_load=[FakeResponse(DATA_URL, {'ok': True})])
+    watcher = _watcher(page, dom_status='sold_out')
+    
+    async def run():
+        first = await watcher.refresh()
+        return first, await watcher.refresh()
+    
+    first, second = asyncio.run(run())
+    assert watcher.data_request is None
+    assert first['lot-a-parking']['status'] == second['lot-a-parking']['status'] == 'sold_out'
+    assert page.evaluated == []
+    assert page.reloads == 1
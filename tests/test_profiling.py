@@ -0,0 +1,81 @@
+"""
+Tests for the sampling profiler's output and the loop lag monitor
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from src.profiling import LoopLagMonitor, SamplingProfiler, profile_checks
+
+def _busy_work(seconds):
+    until = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < until:
+        total += 1
+    return total
+
+def _block_the_loop(seconds):
+    time.sleep(seconds)
+
+def test_sampled_stacks_in_both_formats(tmp_path):
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    _busy_work(0.2)
+    profiler.stop()
+    assert profiler.total_samples > 10
+    assert profiler.duration >= 0.2
+    
+    collapsed = tmp_path / 'profile.collapsed.txt'
+    profiler.write_collapsed(str(collapsed))
+    lines = collapsed.read_text().splitlines()
+    stacks = dict(line.rsplit(' ', 1) for line in lines)
+    assert sum(int(count) for count in stacks.values()) == profiler.total_samples
+    busy = [stack for stack in stacks if stack.split(';')[-1].startswith('_busy_work (test_profiling.py:')]
+    # Root first, the test calling the workload just above it
+    assert busy and all(stack.split(';')[-2].startswith('test_sampled_stacks_in_both_formats ') for stack in busy)
+    
+    speedscope = tmp_path / 'profile.speedscope.json'
+    profiler.write_speedscope(str(speedscope), name="test")
+    document = json.loads(speedscope.read_text())
+    frames = document['shared']['frames']
+    [profile] = document['profiles']
+    assert (profile['type'], profile['unit']) == ('sampled', 'seconds')
+    assert len(profile['samples']) == len(profile['weights']) == len(profiler.samples)
+    assert all(0 <= index < len(frames) for sample in profile['samples'] for index in sample)
+    assert profile['endValue'] == round(sum(profile['weights']), 6)
+    assert profile['endValue'] == round(profiler.total_samples * 0.001, 6)
+    assert any(frames[sample[-1]]['name'] == '_busy_work' for sample in profile['samples'])
+
+def test_blocking_callback_is_reported_as_loop_lag():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+    
+    async def run():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        _block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+    
+    asyncio.run(run())
+    report = monitor.report()
+    assert report['blocked_over_threshold'] >= 1
+    assert report['max_ms'] >= 200
+    assert report['p50_ms'] < report['max_ms']
+    [(blocker, count)] = report['top_blockers']
+    assert count == 1
+    assert blocker.endswith('_block_the_loop')
+
+def test_profile_checks_writes_its_files(tmp_path):
+    async def check():
+        _busy_work(0.02)
+        await asyncio.sleep(0.01)
+    
+    summary = asyncio.run(profile_checks(check, checks=3, output_dir=str(tmp_path)))
+    assert summary['checks'] == 3
+    assert summary['samples'] > 0
+    assert [os.path.basename(path).split('.', 1)[1] for path in summary['files']] == [
+        'collapsed.txt', 'speedscope.json', 'summary.json'
+    ]
+    assert all(os.path.exists(path) for path in summary['files'])
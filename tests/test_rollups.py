@@ -0,0 +1,63 @@
+"""
+Tests for the incrementally maintained availability rollups
+"""
+
+from datetime import datetime, timedelta
+
+from src.rollups import AvailabilityRollups, is_available
+
+START = datetime(2026, 1, 1, 9, 30)
+
+def test_is_available():
+    assert is_available('available')
+    assert is_available('limited')
+    assert not is_available('sold_out')
+    assert not is_available('unknown')
+
+def test_checks_are_bucketed_by_hour_and_day(tmp_path):
+    rollups = AvailabilityRollups(str(tmp_path / 'rollups.json'))
+    rollups.record_check("Lot A", 'sold_out', START)
+    rollups.record_check("Lot A", 'available', START + timedelta(minutes=10))
+    rollups.record_check("Lot A", 'available', START + timedelta(hours=1))
+    
+    rollup = rollups.get_target("Lot A")
+    assert (rollup['checks'], rollup['available']) == (3, 2)
+    assert rollup['hours'] == {'09': [2, 1], '10': [1, 1]}
+    assert rollup['days'] == {'2026-01-01': [3, 2]}
+    assert rollup['first_check'] == START.isoformat()
+    assert rollup['last_status'] == 'available'
+
+def test_windows_and_time_to_sellout(tmp_path):
+    rollups = AvailabilityRollups(str(tmp_path / 'rollups.json'))
+    rollups.record_check("Lot A", 'available', START)
+    # Still open: nothing sold out yet
+    rollups.record_check("Lot A", 'available', START + timedelta(minutes=5))
+    assert AvailabilityRollups.mean_time_to_sellout(rollups.get_target("Lot A")) is None
+    rollups.record_check("Lot A", 'sold_out', START + timedelta(minutes=10))
+    # An unknown status neither opens nor closes a window
+    rollups.record_check("Lot A", 'unknown', START + timedelta(minutes=15))
+    rollups.record_check("Lot A", 'available', START + timedelta(hours=1))
+    rollups.record_check("Lot A", 'sold_out', START + timedelta(hours=1, minutes=30))
+    
+    windows = rollups.get_target("Lot A")['windows']
+    assert (windows['opened'], windows['closed'], windows['open_since']) == (2, 2, None)
+    assert windows['longest_open_seconds'] == 30 * 60
+    assert windows['opened_by_hour'] == {'09': 1, '10': 1}
+    assert AvailabilityRollups.mean_time_to_sellout(rollups.get_target("Lot A")) == 20 * 60
+
+def test_rollups_survive_a_reload(tmp_path):
+    path = str(tmp_path / 'rollups.json')
+    AvailabilityRollups(path).record_check("Lot A", 'available', START)
+    assert AvailabilityRollups(path).get_target("Lot A")['checks'] == 1
+
+def test_invalid_file_starts_empty(tmp_path):
+    path = tmp_path / 'rollups.json'
+    path.write_text("{not json")
+    assert AvailabilityRollups(str(path)).get_targets() == {}
+
+def test_restored_rollups_are_never_written(tmp_path):
+    path = tmp_path / 'rollups.json'
+    rollups = AvailabilityRollups(str(path), data={'version': 1, 'targets': {}})
+    rollups.record_check("Lot A", 'available', START)
+    assert rollups.get_target("Lot A")['checks'] == 1
+    assert not path.exists()
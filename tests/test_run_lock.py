@@ -0,0 +1,87 @@
+"""
+Tests for the run lock's skip and wait modes
+"""
+
+import asyncio
+import json
+
+from src.run_lock import SKIP, WAIT, RunLock
+
+def test_lock_records_runs_and_results(tmp_path):
+    path = str(tmp_path / 'locks' / 'lot-a.lock')
+    
+    async def run():
+        lock = RunLock(path)
+        assert await lock.acquire() is None
+        lock.release({'success': True})
+        assert await lock.acquire() is None
+        lock.release({'success': False})
+    
+    asyncio.run(run())
+    record = json.loads(open(path).read())
+    assert (record['runs'], record['contended_runs'], record['result']) == (2, 0, {'success': False})
+    assert record['finished_at']
+
+def test_skip_mode_exits_when_held(tmp_path):
+    path = str(tmp_path / 'lot-a.lock')
+    
+    async def run():
+        holder = RunLock(path)
+        await holder.acquire()
+        outcome = await RunLock(path, mode=SKIP).acquire()
+        holder.release()
+        return outcome
+    
+    outcome = asyncio.run(run())
+    assert (outcome['outcome'], outcome['contended']) == ('skipped', True)
+    assert outcome['holder']['runs'] == 1
+
+def test_waiting_run_reuses_a_result_finished_meanwhile(tmp_path):
+    path = str(tmp_path / 'lot-a.lock')
+    
+    async def run():
+        holder = RunLock(path)
+        await holder.acquire()
+        waiter = asyncio.create_task(RunLock(path, mode=WAIT, poll_interval=0.01).acquire())
+        await asyncio.sleep(0.05)
+        holder.release({'success': True, 'status': 'available'})
+        return await waiter
+    
+    outcome = asyncio.run(run())
+    assert outcome['outcome'] == 'reused'
+    assert outcome['result']['status'] == 'available'
+    # The reusing run released the lock again
+    lock = RunLock(path, mode=SKIP)
+    assert asyncio.run(lock.acquire()) is None
+    lock.release()
+
+def test_waiting_run_checks_if_there_is_no_result(tmp_path):
+    path = str(tmp_path / 'lot-a.lock')
+    
+    async def run():
+        holder = RunLock(path)
+        await holder.acquire()
+        waiter = RunLock(path, poll_interval=0.01)
+        task = asyncio.create_task(waiter.acquire())
+        await asyncio.sleep(0.05)
+        # A crashed check leaves no result to reuse
+        holder.release()
+        assert await task is None
+        waiter.release()
+    
+    asyncio.run(run())
+    record = json.loads(open(path).read())
+    assert (record['runs'], record['contended_runs']) == (2, 1)
+    assert record['total_wait_seconds'] > 0
+
+def test_wait_times_out(tmp_path):
+    path = str(tmp_path / 'lot-a.lock')
+    
+    async def run():
+        holder = RunLock(path)
+        await holder.acquire()
+        outcome = await RunLock(path, timeout=0.05, poll_interval=0.01).acquire()
+        holder.release()
+        return outcome
+    
+    assert asyncio.run(run())['outcome'] == 'timed_out'
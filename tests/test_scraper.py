@@ -0,0 +1,112 @@
+"""
+Tests for what a monitor's check writes to its state file, and its page loads
+"""
+
+import asyncio
+import json
+import socket
+
+import pytest
+from aiohttp import web
+
+from src.check_logger import CheckLogger
+from src.daemon import MonitorDaemon
+from src.scraper import ParkingMonitor
+from src.single_flight import PageTargets, SingleFlight
+
+PAGE = (
+    "<div><h3>Lot A Parking</h3><p>$67.45</p><button>Sold Out</button></div>"
+    "<div><h3>Lot B Garage</h3><p>$12.00</p><button>Add to Cart</button></div>"
+    "<div><h3>Lot C Deck</h3><p>$9.00</p><button>Sold Out</button></div>"
+    + "<p>Terms and conditions</p>" * 2000
+)
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Shared history, rollups and diagnostics go under data/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('PROXY_URLS', raising=False)
+    monkeypatch.delenv('STATE_SNAPSHOT_FILE', raising=False)
+
+def _new_monitor(tmp_path, name, url="https://example.com/reserve", **options) -> ParkingMonitor:
+    key = name.lower().replace(' ', '-')
+    return ParkingMonitor(
+        url, name,
+        state_file=str(tmp_path / f"{key}.json"),
+        snapshot_file=str(tmp_path / f"{key}.snapshot.json"),
+        **options
+    )
+
+@pytest.fixture
+def monitor(tmp_path):
+    monitor = _new_monitor(tmp_path, "Lot A")
+    
+    async def scrape():
+        # A slow page load, as far as the hedge window is concerned
+        monitor.hedge_policy.record_latency(12.5)
+        return False, None
+    
+    monitor.scrape_parking_status = scrape
+    return monitor
+
+def _state(tmp_path):
+    return json.loads((tmp_path / 'lot-a.json').read_text())
+
+def test_check_without_persist_leaves_the_state_file_alone(monitor, tmp_path):
+    before = _state(tmp_path)
+    asyncio.run(monitor.run_check(persist=False, notify=False, summary=False))
+    assert _state(tmp_path) == before
+    # The latency is still used in memory by the next check
+    assert monitor.hedge_policy.state['latencies'] == [12.5]
+
+def test_persisting_check_saves_the_hedge_window(monitor, tmp_path):
+    asyncio.run(monitor.run_check(persist=True, notify=False, summary=False))
+    state = _state(tmp_path)
+    assert state['hedging']['latencies'] == [12.5]
+    assert state['error_count'] == 1
+
+def test_http_load_reads_on_for_every_target_on_the_page(tmp_path):
+    async def page(request):
+        return web.Response(text=PAGE, content_type='text/html')
+    
+    async def run():
+        app = web.Application()
+        app.router.add_get('/reserve', page)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        
+        shared = {'page_flight': SingleFlight(), 'page_targets': PageTargets(), 'http_fast_path': True}
+        url = f"http://127.0.0.1:{port}/reserve"
+        lot_a = _new_monitor(tmp_path, "Lot A Parking", url, **shared)
+        _new_monitor(tmp_path, "Lot B Garage", url, **shared)
+        lot_a.check_diagnostics = lot_a.diagnostics.begin(lot_a.target_name, url)
+        try:
+            return await lot_a._load_snapshot_http()
+        finally:
+            await runner.cleanup()
+    
+    snapshot, partial = asyncio.run(run())
+    # The other monitor's listing is in the shared snapshot; reading still stopped early
+    assert set(snapshot) == {'lot-a-parking', 'lot-b-garage'}
+    assert partial
+
+def test_daemon_monitors_share_one_subscription_index(tmp_path):
+    daemon = MonitorDaemon(config_path=str(tmp_path / 'targets.json'), state_dir=str(tmp_path / 'state'))
+    lot_a, lot_b = (
+        daemon._new_monitor({'id': key, 'name': name, 'url': "https://example.com/reserve", 'interval': 60})
+        for key, name in (('lot-a', "Lot A"), ('lot-b', "Lot B"))
+    )
+    assert lot_a.subscriptions is lot_b.subscriptions is daemon.subscriptions
+
+def test_only_a_private_check_logger_is_reloaded(tmp_path, monkeypatch):
+    reloads = []
+    monkeypatch.setattr(CheckLogger, 'reload', lambda check_logger: reloads.append(check_logger))
+    own = _new_monitor(tmp_path, "Lot A")
+    shared = _new_monitor(tmp_path, "Lot B", check_logger=CheckLogger())
+    own.reload_state()
+    shared.reload_state()
+    assert reloads == [own.check_logger]
@@ -0,0 +1,106 @@
+"""
+Tests for coalesced page loads and the split of a shared page between targets
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.single_flight import PageTargets, SingleFlight, normalize_url
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.com/reserve/?b=2&a=1#top") == "https://example.com/reserve?a=1&b=2"
+    assert normalize_url("https://example.com") == normalize_url("https://example.com/")
+
+def test_concurrent_calls_share_one_load():
+    flight = SingleFlight()
+    loads = []
+    
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return {'lot-a': {}}
+    
+    async def run():
+        return await asyncio.gather(*(flight.do("page", load) for _ in range(3)))
+    
+    results = asyncio.run(run())
+    assert len(loads) == 1
+    assert [shared for _, shared in results] == [False, True, True]
+    assert flight.stats == {'loads': 1, 'coalesced': 2, 'cache_hits': 0}
+
+def test_results_are_cached_but_failures_are_not():
+    flight = SingleFlight(ttl=60)
+    calls = []
+    
+    async def failing():
+        calls.append('fail')
+        raise RuntimeError("blocked")
+    
+    async def ok():
+        calls.append('ok')
+        return {'lot-a': {}}
+    
+    async def run():
+        with pytest.raises(RuntimeError):
+            await flight.do("page", failing)
+        assert await flight.do("page", ok) == ({'lot-a': {}}, False)
+        assert await flight.do("page", ok) == ({'lot-a': {}}, True)
+        flight.invalidate("page")
+        await flight.do("page", ok)
+    
+    asyncio.run(run())
+    assert calls == ['fail', 'ok', 'ok']
+
+def test_follower_survives_owner_cancellation():
+    flight = SingleFlight()
+    
+    async def slow():
+        await asyncio.sleep(10)
+    
+    async def run():
+        owner = asyncio.create_task(flight.do("page", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("page", slow))
+        await asyncio.sleep(0)
+        owner.cancel()
+        with pytest.raises(RuntimeError, match="cancelled"):
+            await follower
+        # The next call starts a load of its own
+        assert "page" not in flight._in_flight
+    
+    asyncio.run(run())
+
+def _monitor(target_id):
+    return SimpleNamespace(target_id=target_id)
+
+def test_each_listing_is_handled_by_one_monitor():
+    targets = PageTargets()
+    lot_a, lot_b, lot_a_again = _monitor('lot-a'), _monitor('lot-b'), _monitor('lot-a')
+    for monitor in (lot_a, lot_b, lot_a_again):
+        targets.register("page", monitor)
+    
+    assert targets.owner("page") is lot_a
+    assert targets.handles("page", lot_a, 'lot-a')
+    assert not targets.handles("page", lot_a_again, 'lot-a')
+    assert targets.handles("page", lot_b, 'lot-b')
+    # Listings nobody watches go to the page's owner
+    assert targets.handles("page", lot_a, 'lot-c')
+    assert not targets.handles("page", lot_b, 'lot-c')
+    # An unknown page is handled by whoever checks it
+    assert targets.handles("other", lot_b, 'lot-c')
+    assert targets.target_ids("page") == {'lot-a', 'lot-b'}
+    assert targets.target_ids("other") == set()
+
+def test_unregister_hands_listings_on():
+    targets = PageTargets()
+    lot_a, lot_b = _monitor('lot-a'), _monitor('lot-b')
+    targets.register("page", lot_a)
+    targets.register("page", lot_b)
+    targets.unregister("page", lot_a)
+    
+    assert targets.owner("page") is lot_b
+    assert targets.handles("page", lot_b, 'lot-a')
+    targets.unregister("page", lot_b)
+    assert targets.owner("page") is None
@@ -0,0 +1,119 @@
+"""
+Tests for migrating to, restoring from and writing the state snapshot
+"""
+
+import json
+from types import SimpleNamespace
+
+from src import state_snapshot
+from src.check_logger import CheckLogger
+from src.listings import SnapshotStore, make_listing
+from src.report import main as report_main
+from src.state_manager import StateManager
+from src.state_snapshot import SNAPSHOT_VERSION, StateSnapshot, fingerprint
+
+def _files(tmp_path):
+    """Per-target files as written by runs without a snapshot"""
+    state_file = tmp_path / "state" / "lot-a.json"
+    snapshot_file = tmp_path / "state" / "lot-a.snapshot.json"
+    history_file = tmp_path / "check_history.json"
+    rollup_file = tmp_path / "rollups.json"
+    StateManager(str(state_file)).save_section('alerts', {'lot-a': {'state': 'sold_out'}})
+    SnapshotStore(str(snapshot_file)).save({'lot-a': make_listing("Lot A", 'sold_out', "$10.00")})
+    check_logger = CheckLogger(str(history_file), str(rollup_file))
+    check_logger.log_check('sold_out', "$10.00", target="Lot A")
+    check_logger.log_check('available', "$10.00", target="Lot A")
+    targets = {'lot-a': (str(state_file), str(snapshot_file))}
+    return targets, str(history_file), str(rollup_file)
+
+def test_fingerprint_ignores_listing_order():
+    rows = [['a', "A", 'available', "$1"], ['b', "B", 'sold_out', "$2"]]
+    assert fingerprint(rows) == fingerprint(rows[::-1])
+    assert fingerprint([]) is None
+
+def test_first_restore_migrates_the_files(tmp_path):
+    targets, history_file, rollup_file = _files(tmp_path)
+    snapshot = StateSnapshot(str(tmp_path / "state_snapshot.json"))
+    data = snapshot.restore(targets, history_file, rollup_file)
+    
+    entry = data['targets']['lot-a']
+    assert entry['state']['alerts'] == {'lot-a': {'state': 'sold_out'}}
+    assert entry['listings'] == [['lot-a', "Lot A", 'sold_out', "$10.00"]]
+    assert entry['fingerprint'] == fingerprint(entry['listings'])
+    assert len(data['history']['intervals']) == 2
+    assert data['rollups']['targets']["Lot A"]['checks'] == 2
+
+def test_save_and_restore_round_trip(tmp_path):
+    targets, history_file, rollup_file = _files(tmp_path)
+    path = tmp_path / "state_snapshot.json"
+    snapshot = StateSnapshot(str(path), history_tail=1)
+    snapshot.restore(targets, history_file, rollup_file)
+    check_logger = snapshot.check_logger(history_file, rollup_file)
+    check_logger.log_check('sold_out', "$10.00", target="Lot A")
+    monitor = SimpleNamespace(
+        state_manager=StateManager(initial={'alerts': {}}),
+        snapshot_store=SnapshotStore(initial=[['lot-a', "Lot A", 'available', "$10.00"]])
+    )
+    snapshot.save({'lot-a': monitor}, check_logger)
+    
+    restored = StateSnapshot(str(path))
+    data = restored.restore({'lot-a': targets['lot-a'], 'lot-b': ("missing", "missing")}, history_file, rollup_file)
+    assert data['version'] == SNAPSHOT_VERSION
+    assert data['targets']['lot-a']['listings'] == [['lot-a', "Lot A", 'available', "$10.00"]]
+    # Only the history tail is kept; the rollups still count every check
+    assert len(data['history']['intervals']) == 1
+    assert data['rollups']['targets']["Lot A"]['checks'] == 3
+    # A target added since the last run starts out empty
+    assert restored.target('lot-b') == {'state': None, 'listings': [], 'fingerprint': None}
+    # Nothing was left behind by the atomic write
+    assert [p.name for p in tmp_path.glob(".state_snapshot.json.*")] == []
+
+def test_newer_version_is_never_overwritten(tmp_path):
+    targets, history_file, rollup_file = _files(tmp_path)
+    path = tmp_path / "state_snapshot.json"
+    newer = json.dumps({'version': SNAPSHOT_VERSION + 1, 'targets': {}})
+    path.write_text(newer)
+    
+    snapshot = StateSnapshot(str(path))
+    data = snapshot.restore(targets, history_file, rollup_file)
+    # The run goes on from the per-target files...
+    assert data['targets']['lot-a']['listings'] == [['lot-a', "Lot A", 'sold_out', "$10.00"]]
+    # ...but leaves the newer snapshot alone
+    snapshot.save({}, snapshot.check_logger(history_file, rollup_file))
+    assert path.read_text() == newer
+
+def test_unreadable_snapshot_is_moved_aside(tmp_path):
+    targets, history_file, rollup_file = _files(tmp_path)
+    path = tmp_path / "state_snapshot.json"
+    path.write_text("{not json")
+    
+    snapshot = StateSnapshot(str(path))
+    snapshot.restore(targets, history_file, rollup_file)
+    assert (tmp_path / "state_snapshot.json.unreadable").read_text() == "{not json"
+    snapshot.save({}, snapshot.check_logger(history_file, rollup_file))
+    assert json.loads(path.read_text())['version'] == SNAPSHOT_VERSION
+
+def test_older_version_is_upgraded(tmp_path, monkeypatch):
+    def add_notes(data):
+        return dict(data, notes=[])
+    
+    monkeypatch.setattr(state_snapshot, 'SNAPSHOT_VERSION', 2)
+    monkeypatch.setattr(state_snapshot, 'UPGRADES', {1: add_notes})
+    path = tmp_path / "state_snapshot.json"
+    path.write_text(json.dumps({'version': 1, 'targets': {}}))
+    
+    data = StateSnapshot(str(path)).load()
+    assert (data['version'], data['notes']) == (2, [])
+    # No upgrade path from version 0
+    path.write_text(json.dumps({'version': 0, 'targets': {}}))
+    assert StateSnapshot(str(path)).load() is None
+
+def test_report_reads_rollups_from_snapshot(tmp_path, capsys):
+    targets, history_file, rollup_file = _files(tmp_path)
+    path = tmp_path / "state_snapshot.json"
+    snapshot = StateSnapshot(str(path))
+    snapshot.restore(targets, history_file, rollup_file)
+    snapshot.save({}, snapshot.check_logger(history_file, rollup_file))
+    
+    assert report_main(['--snapshot', str(path), '--file', str(tmp_path / "stale.json")]) == 0
+    assert "Lot A" in capsys.readouterr().out
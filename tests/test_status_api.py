@@ -0,0 +1,162 @@
+"""
+Tests for the status board's versions and ETags, and the status server
+"""
+
+import asyncio
+import socket
+import time
+
+import aiohttp
+
+from src.status_api import StatusBoard, StatusServer
+
+TARGET = {'id': 'lot-a', 'name': "Lot A", 'url': "https://example.com/a", 'interval': 60}
+
+def _result(status='sold_out', price="$10.00", **extra):
+    return dict(success=True, status=status, price=price, checked_at="2026-01-01T12:00:00", **extra)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def test_version_moves_only_on_changes():
+    board = StatusBoard()
+    board.add_target(TARGET)
+    version, revision = board.version, board.revision
+    
+    board.update('lot-a', _result())
+    assert board.version == version + 1
+    # Same status and price again: a new revision, not a new version
+    board.update('lot-a', _result())
+    assert board.version == version + 1
+    assert board.revision == revision + 2
+    
+    board.update('lot-a', _result(transitions=[{'kind': 'available', 'listing_id': 'lot-a'}]))
+    assert board.version == version + 2
+    assert board.recent_transitions()[-1]['seq'] == board.transition_seq == 1
+
+def test_failed_checks_are_counted():
+    board = StatusBoard()
+    board.add_target(TARGET)
+    board.update('lot-a', {'success': False, 'skipped': 'circuit_open'}, circuit='open')
+    entry = board.targets['lot-a']
+    assert (entry['checks'], entry['failures'], entry['circuit']) == (1, 1, 'open')
+    assert entry['last_failure']['skipped'] == 'circuit_open'
+    # Results for unknown targets are ignored
+    board.update('lot-z', _result())
+    assert 'lot-z' not in board.targets
+
+def test_render_is_cached_per_revision():
+    board = StatusBoard()
+    board.add_target(TARGET)
+    builds = []
+    
+    def build():
+        builds.append(1)
+        return board.status()
+    
+    body, etag = board.render('status', build)
+    assert board.render('status', build) == (body, etag)
+    assert len(builds) == 1
+    
+    board.update('lot-a', _result(status='available'))
+    new_body, new_etag = board.render('status', build)
+    assert new_etag != etag
+    assert len(builds) == 2
+
+def test_wait_for_change():
+    board = StatusBoard()
+    
+    async def run():
+        assert not await board.wait_for_change(board.version, 0.01)
+        waiter = asyncio.create_task(board.wait_for_change(board.version, 1))
+        await asyncio.sleep(0)
+        board.add_target(TARGET)
+        assert await waiter
+    
+    asyncio.run(run())
+
+def test_health_marks_stale_targets():
+    board = StatusBoard(stale_after=1)
+    board.add_target(dict(TARGET, interval=0.01))
+    time.sleep(0.02)
+    health = board.health()
+    assert not health['ok']
+    assert health['targets']['lot-a']['stale']
+
+def test_server_etags_and_stopping_with_open_streams():
+    board = StatusBoard()
+    board.add_target(TARGET)
+    port = _free_port()
+    server = StatusServer(board, port=port)
+    
+    async def run():
+        await server.start()
+        base = f"http://127.0.0.1:{port}"
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base}/status") as response:
+                assert response.status == 200
+                etag = response.headers['ETag']
+            async with session.get(f"{base}/status", headers={'If-None-Match': etag}) as response:
+                assert response.status == 304
+            async with session.get(f"{base}/status/lot-z") as response:
+                assert response.status == 404
+            
+            events = await session.get(f"{base}/events")
+            assert (await events.content.readline()).startswith(b"id: ")
+            assert len(server._streams) == 1
+            
+            # An open stream must not hold the shutdown up
+            started = time.monotonic()
+            await server.stop()
+            assert time.monotonic() - started < 5
+            assert not server._streams
+            events.close()
+    
+    asyncio.run(run())
+def test_reconnecting_stream_replays_missed_transitions():
+    board = StatusBoard()
+    board.add_target(TARGET)
+    board.update('lot-a', _result(transitions=[{'kind': 'sold_out', 'listing_id': 'lot-a'}]))
+    port = _free_port()
+    server = StatusServer(board, port=port)
+    
+    async def read_events(session, count, **headers):
+        events = []
+        async with session.get(f"http://127.0.0.1:{port}/events", headers=headers) as response:
+            event = {}
+            while len(events) < count:
+                line = (await response.content.readline()).decode().rstrip('\n')
+                if not line:
+                    events.append(event)
+                    event = {}
+                elif not line.startswith(':'):
+                    field, _, value = line.partition(': ')
+                    event[field] = value
+        return events
+    
+    async def run():
+        await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                # A new stream only gets the current status
+                [status] = await read_events(session, 1)
+                assert (status['event'], status['id']) == ('status', '1')
+                
+                # Transitions made while the dashboard was away
+                board.update('lot-a', _result('available', transitions=[{'kind': 'available', 'listing_id': 'lot-a'}]))
+                board.update('lot-a', _result('sold_out', transitions=[{'kind': 'sold_out', 'listing_id': 'lot-a'}]))
+                events = await read_events(session, 3, **{'Last-Event-ID': status['id']})
+                assert [(event['event'], event['id']) for event in events] == [
+                    ('transition', '2'), ('transition', '3'), ('status', '3')
+                ]
+                assert '"available"' in events[0]['data']
+                
+                # Ids from before a restart don't hold the stream back
+                [status] = await read_events(session, 1, **{'Last-Event-ID': '99'})
+                assert (status['event'], status['id']) == ('status', '3')
+        finally:
+            await server.stop()
+    
+    asyncio.run(run())
@@ -0,0 +1,79 @@
+"""
+Tests for subscription filters, the target index and destination grouping
+"""
+
+import json
+from datetime import datetime
+
+from src.subscriptions import Subscription, SubscriptionStore, parse_price
+
+NOON = datetime(2026, 1, 1, 12, 0)
+LISTING = {'id': 'fall-parking', 'name': "Fall Parking", 'status': 'available', 'price': "$80.00"}
+
+def _store(tmp_path, subscribers) -> SubscriptionStore:
+    path = tmp_path / 'subscriptions.json'
+    path.write_text(json.dumps({'subscribers': subscribers}))
+    return SubscriptionStore(str(path))
+
+def _webhook(name, **filters):
+    return dict(id=name, destination={'type': 'webhook', 'url': f"https://example.com/{name}"}, **filters)
+
+def test_parse_price():
+    assert parse_price("$1,234.50") == 1234.5
+    assert parse_price("Free") is None
+    assert parse_price(None) is None
+
+def test_filters():
+    subscription = Subscription(_webhook('alice', max_price=50, hours=[22, 6], events=['available']))
+    assert subscription.accepts('available', 40, datetime(2026, 1, 1, 23))
+    assert subscription.accepts('available', None, datetime(2026, 1, 1, 5))
+    assert not subscription.accepts('available', 40, NOON)
+    assert not subscription.accepts('available', 60, datetime(2026, 1, 1, 23))
+    assert not subscription.accepts('new_listing', 40, datetime(2026, 1, 1, 23))
+
+def test_targets_are_indexed_by_listing_id(tmp_path):
+    store = _store(tmp_path, [
+        _webhook('alice', targets=["Fall Parking"]),
+        _webhook('bob', targets=["Spring Parking"]),
+        _webhook('carol'),
+        {'id': 'broken'}
+    ])
+    # The invalid entry is skipped
+    assert store.count == 3
+    assert set(store.by_target) == {'fall-parking', 'spring-parking'}
+    
+    groups = store.resolve(LISTING, 'available', NOON)
+    matched = sorted(subscription.id for subscriptions in groups.values() for subscription in subscriptions)
+    assert matched == ['alice', 'carol']
+
+def test_a_subscriber_is_matched_once(tmp_path):
+    store = _store(tmp_path, [_webhook('alice', targets=["Fall Parking", "*"])])
+    groups = store.resolve(LISTING, 'available', NOON)
+    assert [len(subscriptions) for subscriptions in groups.values()] == [1]
+
+def test_shared_webhook_is_one_channel(tmp_path):
+    destination = {'type': 'webhook', 'url': "https://example.com/shared"}
+    store = _store(tmp_path, [{'id': 'alice', 'destination': destination}, {'id': 'bob', 'destination': destination}])
+    channels = store.channels_for(LISTING, 'available', NOON)
+    assert len(channels) == 1
+    # Channels are reused across alerts
+    assert store.channels_for(LISTING, 'available', NOON) == channels
+
+def test_email_subscribers_share_one_message(tmp_path):
+    store = _store(tmp_path, [
+        {'id': 'alice', 'destination': {'type': 'email', 'to': "alice@example.com"}},
+        {'id': 'bob', 'destination': {'type': 'email', 'to': ["bob@example.com"]}, 'max_price': 50}
+    ])
+    channels = store.channels_for(LISTING, 'available', NOON)
+    # Bob's price filter leaves only Alice on this alert
+    assert [channel.recipients for channel in channels] == [["alice@example.com"]]
+    cheap = dict(LISTING, price="$40.00")
+    assert [channel.recipients for channel in store.channels_for(cheap, 'available', NOON)] == [
+        ["alice@example.com", "bob@example.com"]
+    ]
+
+def test_missing_or_invalid_file_loads_nothing(tmp_path):
+    assert SubscriptionStore(str(tmp_path / 'missing.json')).count == 0
+    path = tmp_path / 'subscriptions.json'
+    path.write_text("{not json")
+    assert SubscriptionStore(str(path)).count == 0
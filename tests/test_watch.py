@@ -0,0 +1,84 @@
+"""
+Tests for the watch() event stream
+"""
+
+import asyncio
+
+import pytest
+
+from src.watch import CheckError, CheckResult, Transition, Watcher, events_from_result
+
+class FakeMonitor:
+    """Stands in for a ParkingMonitor: run_check() returns the next scripted result"""
+    
+    def __init__(self, name, results):
+        self.target_name = name
+        self.target_id = name.lower()
+        self.results = list(results)
+        self.deadlines = []
+    
+    def fit_deadline(self, interval):
+        self.deadlines.append(interval)
+    
+    async def run_check(self, **options):
+        await asyncio.sleep(0)
+        outcome = self.results.pop(0) if self.results else asyncio.Event()
+        if isinstance(outcome, asyncio.Event):
+            # Nothing more to report: block until cancelled
+            await outcome.wait()
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+TRANSITION = {
+    'kind': 'available', 'listing_id': 'lot-a', 'name': "Lot A",
+    'previous_status': 'sold_out', 'status': 'available', 'price': "$10.00"
+}
+
+def test_events_from_result():
+    assert events_from_result("Lot A", None)[0].skipped == 'run_lock'
+    check, transition = events_from_result("Lot A", {'success': True, 'status': 'available', 'transitions': [TRANSITION]})
+    assert isinstance(check, CheckResult) and check.success
+    assert isinstance(transition, Transition) and transition.transition == 'available'
+
+def test_watcher_yields_checks_transitions_and_errors():
+    monitor = FakeMonitor("Lot A", [
+        {'success': True, 'status': 'available', 'transitions': [TRANSITION]},
+        RuntimeError("page crashed")
+    ])
+    
+    async def run():
+        async with Watcher([monitor], [0]) as events:
+            return [await events.__anext__() for _ in range(3)]
+    
+    check, transition, error = asyncio.run(run())
+    assert (check.kind, transition.kind, error.kind) == ('check', 'transition', 'error')
+    assert isinstance(error, CheckError) and "page crashed" in error.error
+    assert monitor.deadlines == [0]
+
+def test_close_ends_a_waiting_consumer():
+    monitor = FakeMonitor("Lot A", [])
+    
+    async def run():
+        watcher = Watcher([monitor], [60])
+        consumer = asyncio.create_task(watcher.__anext__())
+        await asyncio.sleep(0.01)
+        await watcher.aclose()
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(consumer, 1)
+    
+    asyncio.run(run())
+
+def test_dead_check_task_is_raised_in_the_consumer():
+    class Fatal(BaseException):
+        pass
+    
+    monitor = FakeMonitor("Lot A", [Fatal("event loop policy")])
+    
+    async def run():
+        async with Watcher([monitor], [60]) as events:
+            with pytest.raises(Fatal):
+                await asyncio.wait_for(events.__anext__(), 1)
+            assert events.closed
+    
+    asyncio.run(run())